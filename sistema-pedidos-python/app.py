@@ -3,11 +3,13 @@ Sistema de Pedidos Online - POO II
 Aplicação Flask com autenticação, validações e controle de sessões
 """
 
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash
+from flask import Flask, Response, g, render_template, request, redirect, url_for, session, jsonify, flash
 from flask_session import Session
 from werkzeug.security import check_password_hash
 from functools import wraps
 import os
+import time
+import uuid
 from dotenv import load_dotenv
 
 # Carrega variáveis de ambiente
@@ -17,13 +19,26 @@ load_dotenv()
 from models.user import User
 from models.product import Product
 from models.order import Order, OrderItem
-from utils.validations import formatar_preco
+from utils.database import DatabaseError
+from utils.validations import formatar_preco, validar_cpf, validar_email
+from utils import assets, cache_consultas, carrinho, compressao, disponibilidade, eventos, idempotencia, jobs, mapa_identidade, metricas, profiler, rollups, throttle
 
-# Inicializa Flask
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'chave-secreta-desenvolvimento')
-app.config['SESSION_TYPE'] = 'filesystem'
-Session(app)
+# Rotas registradas pelo decorator @rota e instaladas por create_app
+_rotas = []
+
+
+def rota(regra, **opcoes):
+    """
+    Registra uma view para ser instalada na aplicação criada por create_app
+    
+    Args:
+        regra (str): Regra de URL
+        **opcoes: Opções repassadas a add_url_rule (ex.: methods)
+    """
+    def decorator(f):
+        _rotas.append((regra, f, opcoes))
+        return f
+    return decorator
 
 
 # ==================== DECORATORS ====================
@@ -58,13 +73,13 @@ def admin_required(f):
 
 # ==================== ROTAS PÚBLICAS ====================
 
-@app.route('/')
+@rota('/')
 def index():
     """Landing page"""
     return render_template('index.html')
 
 
-@app.route('/login', methods=['GET', 'POST'])
+@rota('/login', methods=['GET', 'POST'])
 def login():
     """Página de login"""
     if request.method == 'POST':
@@ -72,6 +87,12 @@ def login():
             email = request.form.get('email')
             senha = request.form.get('senha')
             
+            # Limita tentativas antes de consultar o banco ou calcular hash
+            bloqueio = throttle.permitir_login(request.remote_addr, email)
+            if bloqueio:
+                flash('Muitas tentativas de login. Aguarde alguns minutos e tente novamente', 'error')
+                return render_template('login.html'), 429
+            
             # Estrutura de decisão: valida campos
             if not email or not senha:
                 flash('Email e senha são obrigatórios', 'error')
@@ -82,6 +103,8 @@ def login():
             
             # Estrutura de decisão: verifica se usuário existe e senha está correta
             if user and user.verificar_senha(senha):
+                throttle.registrar_sucesso(email)
+                
                 # Cria sessão
                 session['user_id'] = user.id
                 session['user_name'] = user.nome
@@ -95,6 +118,7 @@ def login():
                 else:
                     return redirect(url_for('cliente_dashboard'))
             else:
+                throttle.registrar_falha(email)
                 flash('Email ou senha incorretos', 'error')
         
         except Exception as e:
@@ -104,7 +128,7 @@ def login():
     return render_template('login.html')
 
 
-@app.route('/cadastro', methods=['GET', 'POST'])
+@rota('/cadastro', methods=['GET', 'POST'])
 def cadastro():
     """Página de cadastro"""
     if request.method == 'POST':
@@ -145,7 +169,32 @@ def cadastro():
     return render_template('cadastro.html')
 
 
-@app.route('/logout')
+@rota('/cadastro/disponibilidade')
+def cadastro_disponibilidade():
+    """Verifica se email e/ou CPF estão livres para cadastro (JSON)"""
+    if not throttle.permitir_disponibilidade(request.remote_addr):
+        return jsonify({'erro': 'Muitas verificações. Aguarde alguns instantes'}), 429
+    
+    email = request.args.get('email', '').strip()
+    cpf = request.args.get('cpf', '').strip()
+    
+    # Estrutura de decisão: só consulta valores com formato válido
+    resposta = {}
+    if email and not validar_email(email)[0]:
+        resposta['email'] = {'valido': False}
+        email = ''
+    if cpf and not validar_cpf(cpf)[0]:
+        resposta['cpf'] = {'valido': False}
+        cpf = ''
+    
+    em_uso = disponibilidade.campos_em_uso(email or None, cpf or None)
+    for campo, valor in (('email', email), ('cpf', cpf)):
+        if valor:
+            resposta[campo] = {'valido': True, 'disponivel': campo not in em_uso}
+    return jsonify(resposta)
+
+
+@rota('/logout')
 def logout():
     """Logout - limpa sessão"""
     session.clear()
@@ -155,25 +204,33 @@ def logout():
 
 # ==================== ROTAS DO CLIENTE ====================
 
-@app.route('/cliente/dashboard')
+@rota('/cliente/dashboard')
 @login_required
 def cliente_dashboard():
     """Dashboard do cliente"""
     try:
         user = User.buscar_por_id(session['user_id'])
-        pedidos = Order.buscar_por_usuario(user.id)
+        cursor = request.args.get('cursor')
+        
+        # Histórico paginado por cursor; cursor inválido volta à primeira página
+        try:
+            pedidos, proximo_cursor = Order.buscar_por_usuario_paginado(user.id, cursor=cursor)
+        except ValueError:
+            cursor = None
+            pedidos, proximo_cursor = Order.buscar_por_usuario_paginado(user.id)
         
-        # Estatísticas
-        total_pedidos = len(pedidos)
-        pedidos_entregues = len([p for p in pedidos if p.status == 'entregue'])
-        pedidos_pendentes = len([p for p in pedidos if p.status in ['pendente', 'processando']])
+        # Estatísticas calculadas no banco com uma consulta agrupada
+        resumo = Order.resumo_por_usuario(user.id)
         
         return render_template('cliente_dashboard.html',
                              user=user,
                              pedidos=pedidos,
-                             total_pedidos=total_pedidos,
-                             pedidos_entregues=pedidos_entregues,
-                             pedidos_pendentes=pedidos_pendentes,
+                             total_pedidos=resumo['total_pedidos'],
+                             pedidos_entregues=resumo['entregues'],
+                             pedidos_pendentes=resumo['pendentes'],
+                             valor_total_gasto=resumo['valor_total'],
+                             proximo_cursor=proximo_cursor,
+                             primeira_pagina=not cursor,
                              formatar_preco=formatar_preco)
     
     except Exception as e:
@@ -182,31 +239,113 @@ def cliente_dashboard():
         return redirect(url_for('index'))
 
 
+# ==================== CATÁLOGO E CARRINHO ====================
+
+@rota('/produtos')
+@login_required
+def catalogo():
+    """Catálogo de produtos ativos"""
+    try:
+        colunas = ('nome', 'descricao', 'preco', 'estoque', 'categoria')
+        return render_template('catalogo.html', produtos=Product.listar_ativos(colunas), formatar_preco=formatar_preco)
+    
+    except Exception as e:
+        print(f"❌ Erro ao carregar catálogo: {e}")
+        flash('Erro ao carregar produtos', 'error')
+        return redirect(url_for('cliente_dashboard'))
+
+
+@rota('/carrinho')
+@login_required
+def ver_carrinho():
+    """Carrinho com preços e estoque atuais (uma consulta para todos os itens)"""
+    try:
+        user = User.buscar_por_id(session['user_id'])
+        return render_template('carrinho.html',
+                             carrinho=carrinho.resumo(),
+                             endereco_padrao=user.endereco if user else '',
+                             formatar_preco=formatar_preco)
+    
+    except Exception as e:
+        print(f"❌ Erro ao carregar carrinho: {e}")
+        flash('Erro ao carregar carrinho', 'error')
+        return redirect(url_for('catalogo'))
+
+
+@rota('/carrinho/adicionar', methods=['POST'])
+@login_required
+def adicionar_ao_carrinho():
+    """Adiciona um produto ao carrinho"""
+    try:
+        carrinho.adicionar(request.form.get('product_id'), request.form.get('quantidade', 1))
+        flash('Produto adicionado ao carrinho', 'success')
+    except carrinho.CarrinhoInvalido as e:
+        flash(str(e), 'error')
+    except (TypeError, ValueError):
+        flash('Produto inválido', 'error')
+    
+    return redirect(url_for('catalogo'))
+
+
+@rota('/carrinho/atualizar', methods=['POST'])
+@login_required
+def atualizar_carrinho():
+    """Altera as quantidades do carrinho (campos quantidade_<id>; 0 remove)"""
+    try:
+        quantidades = {campo.removeprefix('quantidade_'): valor
+                       for campo, valor in request.form.items() if campo.startswith('quantidade_')}
+        carrinho.alterar(quantidades)
+        flash('Carrinho atualizado', 'success')
+    except carrinho.CarrinhoInvalido as e:
+        flash(str(e), 'error')
+    except ValueError:
+        flash('Produto inválido', 'error')
+    
+    return redirect(url_for('ver_carrinho'))
+
+
+@rota('/carrinho/remover/<int:product_id>', methods=['POST'])
+@login_required
+def remover_do_carrinho(product_id):
+    """Remove um produto do carrinho"""
+    carrinho.remover(product_id)
+    return redirect(url_for('ver_carrinho'))
+
+
+@rota('/carrinho/finalizar', methods=['POST'])
+@login_required
+@idempotencia.idempotente
+def finalizar_pedido():
+    """Fecha o pedido com os itens do carrinho"""
+    try:
+        pedido = carrinho.finalizar(session['user_id'],
+                                    request.form.get('endereco_entrega'),
+                                    request.form.get('observacoes'))
+        idempotencia.marcar_concluida()
+        flash(f'Pedido #{pedido.id} realizado com sucesso!', 'success')
+        return redirect(url_for('cliente_dashboard'))
+    
+    except carrinho.CarrinhoInvalido as e:
+        flash(str(e), 'error')
+    except Exception as e:
+        print(f"❌ Erro ao finalizar pedido: {e}")
+        flash('Erro ao finalizar pedido. Tente novamente', 'error')
+    
+    return redirect(url_for('ver_carrinho'))
+
+
 # ==================== ROTAS DO ADMIN ====================
 
-@app.route('/admin/dashboard')
+@rota('/admin/dashboard')
 @admin_required
 def admin_dashboard():
-    """Dashboard administrativo"""
+    """Dashboard administrativo (apenas os indicadores; as abas carregam sob demanda)"""
     try:
-        produtos = Product.listar_todos()
-        pedidos = Order.listar_todos()
-        usuarios = User.listar_todos()
-        
-        # Estatísticas
-        total_pedidos = len(pedidos)
-        receita_total = sum(p.valor_total for p in pedidos)
-        produtos_ativos = len([p for p in produtos if p.ativo])
-        total_clientes = len(usuarios)
-        
         return render_template('admin_dashboard.html',
-                             produtos=produtos,
-                             pedidos=pedidos,
-                             usuarios=usuarios,
-                             total_pedidos=total_pedidos,
-                             receita_total=receita_total,
-                             produtos_ativos=produtos_ativos,
-                             total_clientes=total_clientes,
+                             total_pedidos=Order.contar(),
+                             receita_total=rollups.totais()['receita'],
+                             produtos_ativos=Product.contar_ativos(),
+                             total_clientes=User.contar(),
                              formatar_preco=formatar_preco)
     
     except Exception as e:
@@ -215,8 +354,50 @@ def admin_dashboard():
         return redirect(url_for('index'))
 
 
-@app.route('/admin/produto/criar', methods=['POST'])
+def renderizar_aba(template, **contexto):
+    """
+    Renderiza o fragmento HTML de uma aba do dashboard admin
+    
+    Args:
+        template (str): Template do fragmento
+        **contexto: Variáveis do template
+    
+    Returns:
+        Response: Fragmento sem cache compartilhado (dados por administrador)
+    """
+    resposta = Response(render_template(template, formatar_preco=formatar_preco, **contexto),
+                        mimetype='text/html')
+    resposta.headers['Cache-Control'] = 'private, no-cache'
+    return resposta
+
+
+@rota('/admin/dashboard/produtos')
+@admin_required
+def admin_aba_produtos():
+    """Aba de produtos do dashboard admin (fragmento HTML)"""
+    colunas = ('nome', 'preco', 'estoque', 'categoria', 'ativo')
+    return renderizar_aba('admin_produtos.html', produtos=Product.listar_todos(colunas))
+
+
+@rota('/admin/dashboard/pedidos')
+@admin_required
+def admin_aba_pedidos():
+    """Aba de pedidos do dashboard admin (fragmento HTML)"""
+    colunas = ('user_id', 'status', 'valor_total', 'created_at', 'endereco_resumo')
+    return renderizar_aba('admin_pedidos.html', pedidos=Order.listar_todos(colunas))
+
+
+@rota('/admin/dashboard/clientes')
+@admin_required
+def admin_aba_clientes():
+    """Aba de clientes do dashboard admin (fragmento HTML)"""
+    colunas = ('nome', 'email', 'cpf', 'telefone', 'role')
+    return renderizar_aba('admin_clientes.html', usuarios=User.listar_todos(colunas))
+
+
+@rota('/admin/produto/criar', methods=['POST'])
 @admin_required
+@idempotencia.idempotente
 def criar_produto():
     """Cria novo produto"""
     try:
@@ -239,23 +420,26 @@ def criar_produto():
         )
         
         produto.salvar()
+        idempotencia.marcar_concluida()
         flash('Produto criado com sucesso!', 'success')
     
     except Exception as e:
         print(f"❌ Erro ao criar produto: {e}")
         flash('Erro ao criar produto', 'error')
     
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('admin_dashboard', _anchor='produtos'))
 
 
-@app.route('/admin/produto/deletar/<int:product_id>', methods=['POST'])
+@rota('/admin/produto/deletar/<int:product_id>', methods=['POST'])
 @admin_required
+@idempotencia.idempotente
 def deletar_produto(product_id):
     """Deleta produto (soft delete)"""
     try:
         produto = Product.buscar_por_id(product_id)
         if produto:
             produto.deletar()
+            idempotencia.marcar_concluida()
             flash('Produto removido com sucesso!', 'success')
         else:
             flash('Produto não encontrado', 'error')
@@ -264,38 +448,227 @@ def deletar_produto(product_id):
         print(f"❌ Erro ao deletar produto: {e}")
         flash('Erro ao deletar produto', 'error')
     
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('admin_dashboard', _anchor='produtos'))
 
 
-@app.route('/admin/pedido/atualizar-status/<int:order_id>', methods=['POST'])
+@rota('/admin/pedido/atualizar-status/<int:order_id>', methods=['POST'])
 @admin_required
+@idempotencia.idempotente
 def atualizar_status_pedido(order_id):
     """Atualiza status do pedido"""
     try:
         novo_status = request.form.get('status')
-        pedido = Order.buscar_por_id(order_id)
+        resultado = Order.atualizar_status_em_lote([order_id], novo_status)[order_id]
         
-        if pedido:
-            pedido.atualizar_status(novo_status)
+        # Estrutura de decisão: mensagem conforme resultado da transição
+        if resultado in ('atualizado', 'inalterado'):
+            idempotencia.marcar_concluida()
             flash('Status atualizado com sucesso!', 'success')
+        elif resultado == 'transicao_invalida':
+            flash('Transição de status não permitida', 'error')
         else:
             flash('Pedido não encontrado', 'error')
     
+    except ValueError as e:
+        flash(str(e), 'error')
     except Exception as e:
         print(f"❌ Erro ao atualizar status: {e}")
         flash('Erro ao atualizar status', 'error')
     
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('admin_dashboard', _anchor='pedidos'))
+
+
+@rota('/admin/pedidos/atualizar-status', methods=['POST'])
+@admin_required
+@idempotencia.idempotente
+def atualizar_status_pedidos_lote():
+    """Atualiza status de vários pedidos (API JSON)"""
+    try:
+        dados = request.get_json(silent=True) or {}
+        order_ids = dados.get('order_ids') or request.form.getlist('order_ids')
+        novo_status = dados.get('status') or request.form.get('status')
+        
+        if not order_ids or not novo_status:
+            return jsonify({'erro': 'order_ids e status são obrigatórios'}), 400
+        if not isinstance(order_ids, list):
+            return jsonify({'erro': 'order_ids deve ser uma lista de IDs'}), 400
+        if not isinstance(novo_status, str):
+            return jsonify({'erro': f'Status inválido: {novo_status}'}), 400
+        
+        # IDs que não são números voltam como nao_encontrado
+        resultados = Order.atualizar_status_em_lote(order_ids, novo_status)
+        idempotencia.marcar_concluida()
+        
+        resumo = {}
+        for resultado in resultados.values():
+            resumo[resultado] = resumo.get(resultado, 0) + 1
+        
+        return jsonify({
+            'status': novo_status,
+            'resultados': {str(order_id): resultado for order_id, resultado in resultados.items()},
+            'resumo': resumo
+        })
+    
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Erro ao atualizar status em lote: {e}")
+        return jsonify({'erro': 'Erro ao atualizar status'}), 500
+
+
+@rota('/admin/metricas/jobs')
+@admin_required
+def metricas_jobs():
+    """Profundidade da fila de tarefas e latência dos jobs (JSON)"""
+    try:
+        return jsonify(jobs.metricas())
+    
+    except Exception as e:
+        print(f"❌ Erro ao obter métricas da fila: {e}")
+        return jsonify({'erro': 'Erro ao obter métricas da fila'}), 500
+
+
+@rota('/admin/metricas/login')
+@admin_required
+def metricas_login():
+    """Contadores do throttling de login (JSON)"""
+    return jsonify(throttle.metricas())
+
+
+@rota('/admin/metricas/cache')
+@admin_required
+def metricas_cache():
+    """Acertos, faltas e tamanho do cache de consultas deste processo (JSON)"""
+    return jsonify(cache_consultas.estatisticas())
+
+
+@rota('/admin/eventos')
+@admin_required
+def admin_eventos():
+    """Stream de eventos dos pedidos (Server-Sent Events) para o dashboard"""
+    ultimo_id = request.headers.get('Last-Event-ID', type=int)
+    try:
+        corpo = eventos.stream(ultimo_id)
+    except eventos.LimiteAssinantes:
+        return Response('Limite de conexões atingido\n', status=503, mimetype='text/plain',
+                        headers={'Retry-After': '30'})
+    
+    return Response(corpo, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@rota('/assets/<path:arquivo>')
+def asset(arquivo):
+    """Asset versionado pelo build: variante pré-comprimida com cache imutável"""
+    return assets.servir(arquivo)
+
+
+@rota('/metrics')
+@compressao.nivel(1)
+def metrics():
+    """Métricas no formato de exposição do Prometheus"""
+    token = os.getenv('METRICAS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Não autorizado\n', status=401, mimetype='text/plain')
+    
+    return Response(metricas.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ==================== MÉTRICAS DAS REQUISIÇÕES ====================
+
+def iniciar_medicao():
+    """Marca o início da requisição"""
+    g.inicio_requisicao = time.perf_counter()
+    metricas.requisicoes_em_andamento.inc()
+
+
+def registrar_status(response):
+    """Guarda o status da resposta para a medição"""
+    g.status_resposta = response.status_code
+    return response
+
+
+def finalizar_medicao(erro=None):
+    """Registra duração e status da requisição por rota"""
+    inicio = g.pop('inicio_requisicao', None)
+    if inicio is None:
+        return
+    
+    # Rótulo pela regra da rota (não pela URL) para manter a cardinalidade baixa
+    rota_atual = request.url_rule.rule if request.url_rule else 'nao_encontrada'
+    status = g.pop('status_resposta', 500)
+    metricas.requisicoes_em_andamento.dec()
+    metricas.requisicoes_duracao.observar(time.perf_counter() - inicio, rota_atual, request.method)
+    metricas.requisicoes_total.inc(rota_atual, request.method, str(status))
+
+
+def banco_indisponivel(erro):
+    """Resposta para falhas do banco não tratadas pela rota (503, não 'não encontrado')"""
+    if request.is_json or request.path.startswith('/admin/metricas'):
+        return jsonify({'erro': 'Banco de dados indisponível'}), 503
+    
+    flash('Serviço temporariamente indisponível. Tente novamente em instantes', 'error')
+    return render_template('index.html'), 503
 
 
 # ==================== FILTRO JINJA2 ====================
 
-@app.template_filter('preco')
 def preco_filter(centavos):
     """Filtro para formatar preço"""
     return formatar_preco(centavos)
 
 
+def nova_chave_idempotencia():
+    """Chave de idempotência para o campo oculto de um formulário"""
+    return uuid.uuid4().hex
+
+
+# ==================== FÁBRICA DA APLICAÇÃO ====================
+
+def create_app(config=None):
+    """
+    Cria e configura a aplicação Flask
+    
+    Não acessa o banco: a conexão é aberta no primeiro uso, em cada processo.
+    
+    Args:
+        config (dict): Configurações que sobrescrevem os padrões
+    
+    Returns:
+        Flask: Aplicação configurada
+    """
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'chave-secreta-desenvolvimento')
+    app.config['SESSION_TYPE'] = 'filesystem'
+    if config:
+        app.config.update(config)
+    Session(app)
+    app.session_interface = metricas.SessaoMedida(app.session_interface)
+    
+    app.before_request(iniciar_medicao)
+    app.after_request(registrar_status)
+    app.after_request(mapa_identidade.anotar_resposta)
+    app.after_request(compressao.comprimir_resposta)
+    app.teardown_request(finalizar_medicao)
+    app.register_error_handler(DatabaseError, banco_indisponivel)
+    
+    for regra, view, opcoes in _rotas:
+        app.add_url_rule(regra, view_func=view, **opcoes)
+    app.add_template_filter(preco_filter, 'preco')
+    app.add_template_global(assets.asset_url, 'asset_url')
+    app.add_template_global(carrinho.quantidade_itens, 'carrinho_quantidade')
+    app.add_template_global(nova_chave_idempotencia, 'chave_idempotencia')
+    
+    # Profiling sob demanda (só envolve a aplicação se configurado)
+    profiler.instalar(app)
+    
+    return app
+
+
+# Instância usada por `python app.py` e servidores WSGI (app:app)
+app = create_app()
+
+
 # ==================== EXECUÇÃO ====================
 
 if __name__ == '__main__':
@@ -0,0 +1,48 @@
+"""
+Arquivamento de pedidos finalizados antigos
+
+Move pedidos entregues/cancelados sem alteração há mais de ARQUIVAMENTO_DIAS
+dias (padrão 365) para as tabelas orders_arquivo/order_items_arquivo.
+
+Uso:
+    python arquivar.py                 # arquiva todos os elegíveis
+    python arquivar.py --simular       # apenas conta os elegíveis
+    python arquivar.py --max-lotes 10  # limita a execução (ex.: cron noturno)
+"""
+
+import argparse
+import sys
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente
+load_dotenv()
+
+from utils import arquivamento
+
+
+def main():
+    """Interpreta os argumentos e executa o arquivamento"""
+    parser = argparse.ArgumentParser(description='Arquivamento de pedidos finalizados')
+    parser.add_argument('--lote', type=int, default=arquivamento.TAMANHO_LOTE,
+                        help='Pedidos por transação')
+    parser.add_argument('--max-lotes', type=int, help='Limite de lotes nesta execução')
+    parser.add_argument('--simular', action='store_true', help='Apenas conta os pedidos elegíveis')
+    args = parser.parse_args()
+    
+    try:
+        if args.simular:
+            total = arquivamento.contar_elegiveis()
+            print(f"📋 {total} pedido(s) elegível(is) para arquivamento "
+                  f"(finalizados há mais de {arquivamento.DIAS_ARQUIVAMENTO} dias)")
+            return
+        
+        total = arquivamento.arquivar(lote=args.lote, max_lotes=args.max_lotes)
+        print(f"🎉 {total} pedido(s) arquivado(s)")
+    
+    except Exception as e:
+        print(f"❌ Erro ao arquivar pedidos: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Backfill e relatório dos rollups diários de pedidos
+
+Uso:
+    python backfill.py --backfill                    # recalcula todo o histórico
+    python backfill.py --backfill --desde 2025-01-01 # recalcula a partir da data
+    python backfill.py --relatorio --dias 30         # receita x período anterior
+"""
+
+import argparse
+import sys
+from datetime import date, timedelta
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente
+load_dotenv()
+
+from utils import analytics
+from utils import rollups
+from utils.validations import formatar_preco
+
+
+def imprimir_relatorio(dias):
+    """
+    Exibe receita do período, média móvel de 7 dias e variação
+    
+    Args:
+        dias (int): Tamanho do período em dias (terminando hoje)
+    """
+    fim = date.today()
+    inicio = fim - timedelta(days=dias - 1)
+    comparacao = analytics.comparar_periodos(inicio, fim)
+    medias = analytics.media_movel(comparacao['atual'], 7)
+    
+    print(f"📈 Receita de {inicio:%d/%m/%Y} a {fim:%d/%m/%Y}")
+    for dia, valor, media in zip(comparacao['dias'], comparacao['atual'], medias):
+        media_texto = formatar_preco(int(media)) if media == media else '-'
+        print(f"   {dia}  {formatar_preco(int(valor)):>16}  média 7d: {media_texto}")
+    
+    print(f"\nTotal atual:    {formatar_preco(comparacao['total_atual'])}")
+    print(f"Total anterior: {formatar_preco(comparacao['total_anterior'])}")
+    if comparacao['variacao_percentual'] is not None:
+        print(f"Variação:       {comparacao['variacao_percentual']:+.1f}%")
+
+
+def main():
+    """Interpreta os argumentos e executa a ação escolhida"""
+    parser = argparse.ArgumentParser(description='Rollups diários de pedidos')
+    parser.add_argument('--backfill', action='store_true', help='Recalcula os rollups')
+    parser.add_argument('--desde', type=date.fromisoformat, help='Primeiro dia a recalcular (AAAA-MM-DD)')
+    parser.add_argument('--relatorio', action='store_true', help='Exibe relatório de receita')
+    parser.add_argument('--dias', type=int, default=30, help='Dias do relatório')
+    args = parser.parse_args()
+    
+    if not args.backfill and not args.relatorio:
+        parser.print_help()
+        return
+    
+    try:
+        if args.backfill:
+            print("⏳ Recalculando rollups...")
+            linhas = rollups.backfill(args.desde)
+            for tabela, quantidade in linhas.items():
+                print(f"✅ {tabela}: {quantidade} linha(s)")
+        
+        if args.relatorio:
+            imprimir_relatorio(args.dias)
+    
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
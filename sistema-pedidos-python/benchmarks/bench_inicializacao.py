@@ -0,0 +1,83 @@
+"""
+Benchmark de inicialização: tempo de import e cold start
+
+Cada medição roda em um processo Python novo. O modo "eager" abre a conexão
+logo após o import, reproduzindo o comportamento anterior (db = Database()
+conectando no import); o modo "lazy" é o atual. A diferença é o handshake
+com o MySQL configurado no .env (DB_HOST), maior quanto mais distante o servidor.
+
+Uso:
+    python benchmarks/bench_inicializacao.py
+    python benchmarks/bench_inicializacao.py --repeticoes 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código executado em cada processo medido
+CENARIOS = {
+    'import models': "import models.user, models.product, models.order",
+    'import app': "import app",
+    'cold start (GET /)': (
+        "import app\n"
+        "resposta = app.create_app().test_client().get('/')\n"
+        "assert resposta.status_code == 200"
+    ),
+}
+
+MODELO = """
+import time, json, io, contextlib
+from dotenv import load_dotenv
+load_dotenv()
+inicio = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+{codigo}
+    if {eager}:
+        from utils.database import db
+        try:
+            db.obter_conexao()
+        except Exception:
+            pass
+print(json.dumps((time.perf_counter() - inicio) * 1000))
+"""
+
+
+def medir(codigo, eager):
+    """
+    Executa o código em um processo novo e retorna o tempo em ms
+    
+    Args:
+        codigo (str): Código a medir
+        eager (bool): Abre a conexão com o banco após o import
+    
+    Returns:
+        float: Tempo decorrido em milissegundos
+    """
+    recuado = '\n'.join('    ' + linha for linha in codigo.splitlines())
+    script = MODELO.format(codigo=recuado, eager=eager)
+    saida = subprocess.run([sys.executable, '-c', script], cwd=RAIZ, check=True,
+                           capture_output=True, text=True).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main():
+    """Executa os cenários e imprime a tabela de resultados"""
+    parser = argparse.ArgumentParser(description='Benchmark de inicialização')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Processos por cenário')
+    args = parser.parse_args()
+    
+    print(f"{'cenário':<22} {'eager (ms)':>12} {'lazy (ms)':>12} {'ganho':>8}")
+    for nome, codigo in CENARIOS.items():
+        eager = statistics.median(medir(codigo, True) for _ in range(args.repeticoes))
+        lazy = statistics.median(medir(codigo, False) for _ in range(args.repeticoes))
+        print(f"{nome:<22} {eager:>12.1f} {lazy:>12.1f} {eager / lazy:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""
+Build dos assets estáticos
+
+Minifica static/css/styles.css e static/js/validations.js, grava as versões
+com hash do conteúdo no nome (e as variantes .gz/.br) em static/dist e o
+manifest.json usado pelo helper asset_url dos templates. Rode a cada deploy.
+
+Uso:
+    python build_assets.py
+"""
+
+import sys
+
+from utils import assets
+
+
+def main():
+    """Executa o build e informa o resultado"""
+    try:
+        manifesto = assets.construir()
+        print(f"🎉 {len(manifesto)} asset(s) gerado(s) em static/dist")
+    
+    except Exception as e:
+        print(f"❌ Erro no build dos assets: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
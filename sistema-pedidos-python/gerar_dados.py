@@ -0,0 +1,94 @@
+"""
+Gerador de dados sintéticos para testes de carga
+
+Uso:
+    python gerar_dados.py --usuarios 1000000                    # 1M usuários, 3M pedidos
+    python gerar_dados.py --usuarios 50000 --semente 7          # outra massa, também reproduzível
+    python gerar_dados.py --usuarios 2000000 --metodo load-data # LOAD DATA LOCAL INFILE (MySQL)
+
+Use um banco de teste: os dados são acrescentados às tabelas existentes.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente
+load_dotenv()
+
+from utils import gerador, rollups
+
+
+def main():
+    """Interpreta os argumentos e gera a massa de dados"""
+    parser = argparse.ArgumentParser(description='Gera dados sintéticos para testes de carga')
+    parser.add_argument('--usuarios', type=int, default=10000, help='Quantidade de usuários')
+    parser.add_argument('--produtos', type=int, help='Quantidade de produtos (padrão: 1 a cada 100 usuários, mínimo 50)')
+    parser.add_argument('--pedidos', type=int, help='Quantidade de pedidos (padrão: 3 por usuário)')
+    parser.add_argument('--dias', type=int, default=365, help='Janela de datas de cadastro e pedidos')
+    parser.add_argument('--semente', type=int, default=42, help='Semente (mesma semente = mesmos dados)')
+    parser.add_argument('--metodo', choices=('executemany', 'load-data'), default='executemany',
+                        help='Forma de carga no banco')
+    parser.add_argument('--lote', type=int, default=5000, help='Linhas por lote/commit')
+    args = parser.parse_args()
+    
+    produtos = args.produtos if args.produtos is not None else max(args.usuarios // 100, 50)
+    pedidos = args.pedidos if args.pedidos is not None else args.usuarios * 3
+    if args.usuarios > gerador.FAIXA_CPF:
+        parser.error(f"no máximo {gerador.FAIXA_CPF} usuários (CPFs únicos)")
+    if pedidos and (not args.usuarios or not produtos):
+        parser.error("pedidos exigem usuários e produtos")
+    
+    # A conexão é aberta no primeiro comando: o driver já lê a opção
+    if args.metodo == 'load-data':
+        os.environ['DB_LOCAL_INFILE'] = '1'
+    
+    # Datas relativas ao início do dia: a mesma semente gera os mesmos dados no mesmo dia
+    agora = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    carregador = gerador.Carregador(args.metodo, args.lote)
+    
+    try:
+        primeiro_usuario = gerador.proximo_id('users')
+        primeiro_produto = gerador.proximo_id('products')
+        primeiro_pedido = gerador.proximo_id('orders', 'orders_arquivo')
+        primeiro_item = gerador.proximo_id('order_items', 'order_items_arquivo')
+        
+        print(f"🌱 Gerando {args.usuarios} usuários, {produtos} produtos e {pedidos} pedidos "
+              f"(semente {args.semente}, {args.metodo})...")
+        
+        carregador.adicionar('users', gerador.gerar_usuarios(
+            primeiro_usuario, args.usuarios, args.semente, agora, args.dias))
+        carregador.gravar('users')
+        print(f"✅ users: {carregador.totais['users']} ({carregador.vazao():,.0f} linhas/s)")
+        
+        linhas_produtos = gerador.gerar_produtos(primeiro_produto, produtos, args.semente, agora, args.dias)
+        carregador.adicionar('products', linhas_produtos)
+        carregador.gravar('products')
+        print(f"✅ products: {carregador.totais['products']}")
+        
+        usuarios = range(primeiro_usuario, primeiro_usuario + args.usuarios)
+        precos = [(linha[0], linha[3]) for linha in linhas_produtos if linha[5]]
+        inicio = time.perf_counter()
+        for pedido, itens in gerador.gerar_pedidos(primeiro_pedido, primeiro_item, pedidos, usuarios,
+                                                   precos, args.semente, agora, args.dias):
+            carregador.adicionar_pedido(pedido, itens)
+        carregador.finalizar()
+        print(f"✅ orders: {carregador.totais['orders']}, order_items: {carregador.totais['order_items']} "
+              f"({(carregador.totais['orders'] + carregador.totais['order_items']) / max(time.perf_counter() - inicio, 1e-9):,.0f} linhas/s)")
+        
+        print("⏳ Recalculando rollups...")
+        rollups.backfill()
+        
+        print(f"\n🎉 Massa gerada: {sum(carregador.totais.values())} linhas "
+              f"({carregador.vazao():,.0f} linhas/s). Senha dos usuários: {gerador.SENHA_PADRAO}")
+    
+    except Exception as e:
+        print(f"❌ Erro ao gerar dados: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
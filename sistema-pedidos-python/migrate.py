@@ -0,0 +1,63 @@
+"""
+Executor de migrações do schema e index advisor
+
+Uso:
+    python migrate.py                  # aplica migrações pendentes
+    python migrate.py --schema         # cria o schema completo (banco novo, ex.: SQLite)
+    python migrate.py --status         # lista migrações aplicadas/pendentes
+    python migrate.py --ate 3          # aplica até a versão 3
+    python migrate.py --marcar         # registra pendentes sem executar (baseline)
+    python migrate.py --analisar       # index advisor: EXPLAIN das queries dos models
+"""
+
+import argparse
+import sys
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente
+load_dotenv()
+
+from utils import migrations, index_advisor
+
+
+def main():
+    """Interpreta os argumentos e executa a ação escolhida"""
+    parser = argparse.ArgumentParser(description='Migrações do schema e análise de índices')
+    parser.add_argument('--schema', action='store_true', help='Cria o schema completo a partir do schema.sql')
+    parser.add_argument('--status', action='store_true', help='Lista migrações aplicadas e pendentes')
+    parser.add_argument('--ate', type=int, help='Última versão a aplicar')
+    parser.add_argument('--marcar', action='store_true', help='Registra pendentes sem executar')
+    parser.add_argument('--analisar', action='store_true', help='Executa o index advisor')
+    args = parser.parse_args()
+    
+    try:
+        if args.schema:
+            comandos = migrations.criar_schema()
+            print(f"✅ Schema criado ({comandos} comandos)")
+        
+        elif args.analisar:
+            consultas = index_advisor.capturar_consultas_modelos()
+            print(f"📋 {len(consultas)} queries capturadas dos models")
+            index_advisor.imprimir_relatorio(index_advisor.analisar(consultas))
+        
+        elif args.status:
+            aplicadas = migrations.versoes_aplicadas()
+            for versao, nome, _ in migrations.listar_migracoes():
+                marcador = '✅' if versao in aplicadas else '⏳'
+                print(f"{marcador} {versao:04d} {nome}")
+        
+        elif args.marcar:
+            marcadas = migrations.marcar_aplicadas(args.ate)
+            print(f"✅ {len(marcadas)} migração(ões) marcada(s) como aplicada(s)")
+        
+        else:
+            aplicadas = migrations.aplicar(args.ate)
+            print(f"🎉 {len(aplicadas)} migração(ões) aplicada(s)")
+    
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
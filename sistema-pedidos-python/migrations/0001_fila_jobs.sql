@@ -0,0 +1,19 @@
+-- Fila de tarefas em segundo plano (status 'morto' = dead-letter)
+CREATE TABLE IF NOT EXISTS jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    tarefa VARCHAR(100) NOT NULL,
+    payload TEXT NOT NULL,
+    status ENUM('pendente', 'executando', 'concluido', 'morto') DEFAULT 'pendente' NOT NULL,
+    tentativas INT NOT NULL DEFAULT 0,
+    max_tentativas INT NOT NULL DEFAULT 5,
+    executar_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    reservado_por VARCHAR(32),
+    iniciado_em TIMESTAMP(3) NULL,
+    concluido_em TIMESTAMP(3) NULL,
+    ultimo_erro TEXT,
+    created_at TIMESTAMP(3) DEFAULT CURRENT_TIMESTAMP(3),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_jobs_status_executar_em ON jobs(status, executar_em);
+CREATE INDEX idx_jobs_reservado_por ON jobs(reservado_por);
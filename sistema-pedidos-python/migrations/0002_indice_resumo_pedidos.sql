@@ -0,0 +1,2 @@
+-- Índice de cobertura para o resumo de pedidos do cliente
+CREATE INDEX idx_orders_resumo_usuario ON orders(user_id, status, created_at, valor_total);
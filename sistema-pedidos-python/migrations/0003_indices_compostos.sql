@@ -0,0 +1,9 @@
+-- Índices compostos para os padrões de acesso dos models
+-- Histórico do cliente ordenado por data (buscar_por_usuario / paginação)
+CREATE INDEX idx_orders_user_created ON orders(user_id, created_at);
+
+-- Listagem geral de pedidos ordenada por data (listar_todos)
+CREATE INDEX idx_orders_created_id ON orders(created_at, id);
+
+-- Catálogo de produtos ativos ordenado por data (listar_ativos)
+CREATE INDEX idx_products_ativo_created ON products(ativo, created_at);
@@ -0,0 +1,18 @@
+-- Rollups diários mantidos incrementalmente pelas escritas de pedidos
+-- Pedidos e receita por dia e status
+CREATE TABLE IF NOT EXISTS rollup_pedidos_diario (
+    dia DATE NOT NULL,
+    status ENUM('pendente', 'processando', 'enviado', 'entregue', 'cancelado') NOT NULL,
+    pedidos INT NOT NULL DEFAULT 0,
+    receita BIGINT NOT NULL DEFAULT 0 COMMENT 'Valor em centavos',
+    PRIMARY KEY (dia, status)
+);
+
+-- Itens vendidos e receita por dia e categoria
+CREATE TABLE IF NOT EXISTS rollup_itens_diario (
+    dia DATE NOT NULL,
+    categoria VARCHAR(100) NOT NULL,
+    itens INT NOT NULL DEFAULT 0,
+    receita BIGINT NOT NULL DEFAULT 0 COMMENT 'Valor em centavos',
+    PRIMARY KEY (dia, categoria)
+);
@@ -0,0 +1,29 @@
+-- Tabelas de arquivo para pedidos finalizados antigos (python arquivar.py)
+CREATE TABLE IF NOT EXISTS orders_arquivo (
+    id INT PRIMARY KEY,
+    user_id INT NOT NULL,
+    status ENUM('pendente', 'processando', 'enviado', 'entregue', 'cancelado') NOT NULL,
+    valor_total INT NOT NULL COMMENT 'Valor em centavos',
+    observacoes TEXT,
+    endereco_entrega TEXT NOT NULL,
+    created_at TIMESTAMP NULL,
+    updated_at TIMESTAMP NULL,
+    arquivado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS order_items_arquivo (
+    id INT PRIMARY KEY,
+    order_id INT NOT NULL,
+    product_id INT NOT NULL,
+    quantidade INT NOT NULL,
+    preco_unitario INT NOT NULL COMMENT 'Preço em centavos',
+    subtotal INT NOT NULL COMMENT 'quantidade * preco_unitario',
+    created_at TIMESTAMP NULL
+);
+
+CREATE INDEX idx_orders_arquivo_user_created ON orders_arquivo(user_id, created_at);
+CREATE INDEX idx_orders_arquivo_resumo ON orders_arquivo(user_id, status, valor_total);
+CREATE INDEX idx_order_items_arquivo_order_id ON order_items_arquivo(order_id);
+
+-- Seleção dos pedidos finalizados mais antigos para arquivar
+CREATE INDEX idx_orders_status_updated ON orders(status, updated_at);
@@ -0,0 +1,12 @@
+-- Respostas de requisições com chave de idempotência (status_http NULL = em processamento)
+CREATE TABLE IF NOT EXISTS idempotencia (
+    chave CHAR(64) PRIMARY KEY,
+    impressao CHAR(64) NOT NULL,
+    status_http INT NULL,
+    cabecalhos TEXT,
+    corpo MEDIUMBLOB,
+    expira_em TIMESTAMP NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_idempotencia_expira_em ON idempotencia(expira_em);
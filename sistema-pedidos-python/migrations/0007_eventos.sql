@@ -0,0 +1,9 @@
+-- Eventos do painel administrativo, gravados na transação da alteração e lidos por todos os processos
+CREATE TABLE IF NOT EXISTS eventos (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    tipo VARCHAR(50) NOT NULL,
+    dados TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_eventos_created_at ON eventos(created_at);
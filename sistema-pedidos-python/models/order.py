@@ -3,12 +3,58 @@ Model Order - Programação Orientada a Objetos
 Representa um pedido do sistema
 """
 
+import base64
+from datetime import datetime, timedelta
+
 from utils.database import db
+from utils.projecao import Projetavel
+from utils.validations import formatar_preco
+from utils import arquivamento, cache_consultas, eventos, jobs, mapa_identidade, rollups
+
+
+# Máquina de estados do pedido: status atual -> status permitidos em seguida
+TRANSICOES_STATUS = {
+    'pendente': ('processando', 'cancelado'),
+    'processando': ('enviado', 'cancelado'),
+    'enviado': ('entregue', 'cancelado'),
+    'entregue': (),
+    'cancelado': ()
+}
+
+# Quantidade máxima de IDs por cláusula IN nas atualizações em lote
+TAMANHO_LOTE_STATUS = 1000
+
+# Paginação do histórico de pedidos
+LIMITE_PAGINA_PADRAO = 20
+LIMITE_PAGINA_MAXIMO = 100
+
+
+def _converter_id(valor):
+    """
+    ID de pedido recebido na API (número ou texto com dígitos)
+    
+    Returns:
+        int: ID convertido ou None se o valor não for um ID válido
+    """
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        return valor if valor > 0 else None
+    if isinstance(valor, str) and valor.strip().isdigit():
+        return int(valor.strip()) or None
+    return None
 
 
-class Order:
+class Order(Projetavel):
     """Classe que representa um pedido"""
     
+    TABELA = 'orders'
+    COLUNAS = ('id', 'user_id', 'status', 'valor_total', 'observacoes', 'endereco_entrega',
+               'created_at', 'updated_at')
+    
+    # Início do endereço para listagens (sem transferir o TEXT inteiro)
+    EXPRESSOES = {'endereco_resumo': 'SUBSTR(endereco_entrega, 1, 30)'}
+    
     def __init__(self, id=None, user_id=None, status='pendente', valor_total=0,
                  observacoes=None, endereco_entrega=None, created_at=None, updated_at=None):
         """
@@ -49,7 +95,17 @@ class Order:
             params = (self.user_id, self.status, self.valor_total, 
                      self.observacoes, self.endereco_entrega)
             
-            self.id = db.execute_query(query, params)
+            # Pedido, rollup e job em um único commit
+            with db.transaction(savepoint=False):
+                self.id = db.execute_query(query, params)
+                rollups.registrar_pedido(self.status, self.valor_total)
+                
+                # Efeitos colaterais (confirmação, análise): o worker só vê o job após o commit
+                jobs.enfileirar('pedido_criado', {'order_id': self.id, 'user_id': self.user_id})
+                
+                # Painéis administrativos conectados recebem o pedido após o commit
+                eventos.publicar('pedido_criado', self.evento_criacao())
+                mapa_identidade.gravado('orders', self)
             return self.id
         
         except Exception as e:
@@ -65,20 +121,170 @@ class Order:
         
         Returns:
             int: Número de linhas afetadas
+        
+        Raises:
+            ValueError: Se a transição não for permitida
         """
         try:
+            # Estrutura de decisão: valida transição na máquina de estados
+            if not Order.transicao_permitida(self.status, novo_status):
+                raise ValueError(f"Transição de status inválida: {self.status} -> {novo_status}")
+            
             query = "UPDATE orders SET status = %s WHERE id = %s"
+            status_antigo = self.status
+            dia = self.created_at.date() if self.created_at else None
+            
+            with db.transaction(savepoint=False):
+                afetados = db.execute_query(query, (novo_status, self.id))
+                rollups.registrar_mudancas_status([(dia, status_antigo, novo_status, self.valor_total)])
+                jobs.enfileirar('pedido_status_alterado', {'order_id': self.id, 'status': novo_status})
+                eventos.publicar('pedido_status', {'ids': [self.id], 'status': novo_status})
+                mapa_identidade.gravado('orders', self)
+            
             self.status = novo_status
-            return db.execute_query(query, (novo_status, self.id))
+            return afetados
         
         except Exception as e:
             print(f"❌ Erro ao atualizar status: {e}")
             raise e
     
     @staticmethod
+    def transicao_permitida(status_atual, novo_status):
+        """
+        Verifica se a máquina de estados permite a transição
+        
+        Args:
+            status_atual (str): Status atual do pedido
+            novo_status (str): Status desejado
+        
+        Returns:
+            bool: True se a transição é permitida
+        """
+        return novo_status in TRANSICOES_STATUS.get(status_atual, ())
+    
+    @staticmethod
+    def atualizar_status_em_lote(order_ids, novo_status):
+        """
+        Aplica uma transição de status a vários pedidos de uma vez
+        
+        Usa um único UPDATE ... WHERE id IN (...) AND status IN (...) por lote,
+        sem carregar os itens dos pedidos. A condição no status garante que
+        apenas transições válidas sejam aplicadas mesmo com alterações
+        concorrentes.
+        
+        Args:
+            order_ids (list): IDs dos pedidos (int ou texto com dígitos)
+            novo_status (str): Novo status
+        
+        Returns:
+            dict: Resultado por ID ('atualizado', 'inalterado',
+                  'transicao_invalida' ou 'nao_encontrado'); valores que não
+                  são IDs válidos aparecem como texto, com 'nao_encontrado'
+        
+        Raises:
+            ValueError: Se o status informado não existir
+        """
+        if novo_status not in TRANSICOES_STATUS:
+            raise ValueError(f"Status inválido: {novo_status}")
+        
+        # Remove duplicados preservando a ordem recebida; IDs inválidos não existem
+        chaves = []
+        for order_id in order_ids:
+            convertido = _converter_id(order_id)
+            chaves.append(convertido if convertido is not None else str(order_id))
+        chaves = list(dict.fromkeys(chaves))
+        ids = [chave for chave in chaves if isinstance(chave, int)]
+        resultados = {chave: 'nao_encontrado' for chave in chaves if not isinstance(chave, int)}
+        
+        # Status de origem a partir dos quais o novo status é alcançável
+        origens = [status for status, destinos in TRANSICOES_STATUS.items()
+                   if novo_status in destinos]
+        
+        try:
+            # Todos os lotes, rollups e jobs em um único commit
+            with db.transaction(savepoint=False):
+                for inicio in range(0, len(ids), TAMANHO_LOTE_STATUS):
+                    lote = ids[inicio:inicio + TAMANHO_LOTE_STATUS]
+                    marcadores = ', '.join(['%s'] * len(lote))
+                    
+                    # Lê apenas o necessário (status e dados do rollup), sem os itens
+                    query = f"""
+                        SELECT id, status, valor_total, DATE(created_at) AS dia
+                        FROM orders WHERE id IN ({marcadores})
+                    """
+                    linhas = {row['id']: row for row in db.fetch_all(query, tuple(lote))}
+                    atuais = {order_id: row['status'] for order_id, row in linhas.items()}
+                    
+                    elegiveis = []
+                    for order_id in lote:
+                        status_atual = atuais.get(order_id)
+                        
+                        # Estrutura de decisão: classifica cada pedido do lote
+                        if status_atual is None:
+                            resultados[order_id] = 'nao_encontrado'
+                        elif status_atual == novo_status:
+                            resultados[order_id] = 'inalterado'
+                        elif status_atual not in origens:
+                            resultados[order_id] = 'transicao_invalida'
+                        else:
+                            elegiveis.append(order_id)
+                    
+                    if not elegiveis or not origens:
+                        continue
+                    
+                    marcadores_ids = ', '.join(['%s'] * len(elegiveis))
+                    marcadores_status = ', '.join(['%s'] * len(origens))
+                    query = f"""
+                        UPDATE orders SET status = %s
+                        WHERE id IN ({marcadores_ids}) AND status IN ({marcadores_status})
+                    """
+                    afetados = db.execute_query(query, (novo_status, *elegiveis, *origens))
+                    
+                    if afetados == len(elegiveis):
+                        for order_id in elegiveis:
+                            resultados[order_id] = 'atualizado'
+                    else:
+                        # Algum pedido mudou de status entre a leitura e o UPDATE:
+                        # confirma o resultado relendo apenas os elegíveis
+                        query = f"SELECT id, status FROM orders WHERE id IN ({marcadores_ids})"
+                        finais = {row['id']: row['status'] for row in db.fetch_all(query, tuple(elegiveis))}
+                        for order_id in elegiveis:
+                            if finais.get(order_id) == novo_status:
+                                resultados[order_id] = 'atualizado'
+                            else:
+                                resultados[order_id] = 'transicao_invalida'
+                    
+                    rollups.registrar_mudancas_status([
+                        (linhas[order_id]['dia'], atuais[order_id], novo_status, linhas[order_id]['valor_total'])
+                        for order_id in elegiveis if resultados[order_id] == 'atualizado'
+                    ])
+                
+                # Devolve os resultados na mesma ordem dos IDs recebidos
+                resultados = {chave: resultados[chave] for chave in chaves}
+                
+                # Notificações dos pedidos atualizados em um único INSERT
+                jobs.enfileirar_varios('pedido_status_alterado', [
+                    {'order_id': order_id, 'status': novo_status}
+                    for order_id, resultado in resultados.items() if resultado == 'atualizado'
+                ])
+                
+                # Um único evento para o lote inteiro
+                atualizados = [order_id for order_id, resultado in resultados.items() if resultado == 'atualizado']
+                mapa_identidade.descartar('orders', atualizados)
+                if atualizados:
+                    eventos.publicar('pedido_status', {'ids': atualizados, 'status': novo_status})
+                return resultados
+        
+        except Exception as e:
+            print(f"❌ Erro ao atualizar status em lote: {e}")
+            raise e
+    
+    @staticmethod
+    @mapa_identidade.mapeado('orders')
+    @cache_consultas.em_cache('orders', 'orders_arquivo', 'order_items', 'order_items_arquivo')
     def buscar_por_id(order_id):
         """
-        Busca pedido por ID
+        Busca pedido por ID, com os itens (uma vez por requisição)
         
         Args:
             order_id (int): ID do pedido
@@ -94,9 +300,19 @@ class Order:
             # Busca itens do pedido
             order.items = OrderItem.buscar_por_pedido(order_id)
             return order
+        
+        # Não está na tabela quente: procura no arquivo de pedidos finalizados
+        query = f"SELECT {arquivamento.COLUNAS_PEDIDO} FROM orders_arquivo WHERE id = %s"
+        result = db.fetch_one(query, (order_id,))
+        
+        if result:
+            order = Order(**result)
+            order.items = OrderItem.buscar_por_pedido(order_id, arquivado=True)
+            return order
         return None
     
     @staticmethod
+    @cache_consultas.em_cache('orders', 'orders_arquivo')
     def buscar_por_usuario(user_id):
         """
         Busca pedidos de um usuário
@@ -110,20 +326,215 @@ class Order:
         query = "SELECT * FROM orders WHERE user_id = %s ORDER BY created_at DESC"
         results = db.fetch_all(query, (user_id,))
         
+        # Inclui pedidos arquivados mantendo a ordem por data
+        query = f"""
+            SELECT {arquivamento.COLUNAS_PEDIDO} FROM orders_arquivo
+            WHERE user_id = %s ORDER BY created_at DESC
+        """
+        arquivados = db.fetch_all(query, (user_id,))
+        if arquivados:
+            results = Order.mesclar_por_data(results, arquivados)
+        
         return [Order(**row) for row in results]
     
     @staticmethod
-    def listar_todos():
+    @cache_consultas.em_cache('orders', 'orders_arquivo')
+    def buscar_por_usuario_paginado(user_id, limite=LIMITE_PAGINA_PADRAO, cursor=None):
+        """
+        Busca uma página do histórico de pedidos de um usuário
+        
+        Usa paginação por cursor (keyset) sobre (created_at, id): o custo de
+        cada página não depende de quantas páginas vieram antes.
+        
+        Args:
+            user_id (int): ID do usuário
+            limite (int): Quantidade de pedidos por página
+            cursor (str): Cursor retornado pela página anterior
+        
+        Returns:
+            tuple: (lista de objetos Order, cursor da próxima página ou None)
+        
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        limite = max(1, min(int(limite), LIMITE_PAGINA_MAXIMO))
+        
+        # Estrutura de decisão: primeira página ou continuação pelo cursor
+        if cursor:
+            created_at, order_id = Order.decodificar_cursor(cursor)
+            condicao = "user_id = %s AND (created_at < %s OR (created_at = %s AND id < %s))"
+            params = (user_id, created_at, created_at, order_id, limite + 1)
+        else:
+            condicao = "user_id = %s"
+            params = (user_id, limite + 1)
+        
+        query = f"""
+            SELECT {{colunas}} FROM {{tabela}}
+            WHERE {condicao}
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s
+        """
+        results = db.fetch_all(query.format(colunas='*', tabela='orders'), params)
+        
+        # Só pedidos sem alteração há DIAS_ARQUIVAMENTO são arquivados, e a criação
+        # vem antes da última alteração: todo arquivado foi criado antes desse
+        # limiar. O arquivo só é consultado se a página quente não está cheia ou
+        # já chegou perto dele (a margem de um dia é no sentido de consultar mais)
+        limiar = datetime.now() - timedelta(days=arquivamento.DIAS_ARQUIVAMENTO - 1)
+        if len(results) <= limite or results[-1]['created_at'] < limiar:
+            query = query.format(colunas=arquivamento.COLUNAS_PEDIDO, tabela='orders_arquivo')
+            arquivados = db.fetch_all(query, params)
+            if arquivados:
+                results = Order.mesclar_por_data(results, arquivados)[:limite + 1]
+        
+        pedidos = [Order(**row) for row in results[:limite]]
+        
+        # Um registro a mais indica que existe próxima página
+        proximo_cursor = None
+        if len(results) > limite:
+            ultimo = pedidos[-1]
+            proximo_cursor = Order.codificar_cursor(ultimo.created_at, ultimo.id)
+        
+        return pedidos, proximo_cursor
+    
+    @staticmethod
+    def mesclar_por_data(*listas):
+        """
+        Mescla registros de pedidos em ordem decrescente de (created_at, id)
+        
+        Args:
+            *listas (list): Listas de registros (dict) de pedidos
+        
+        Returns:
+            list: Registros mesclados
+        """
+        registros = [row for lista in listas for row in lista]
+        return sorted(registros, key=lambda row: (row['created_at'] or datetime.min, row['id']), reverse=True)
+    
+    @staticmethod
+    def codificar_cursor(created_at, order_id):
+        """
+        Gera cursor opaco a partir da posição (created_at, id)
+        
+        Args:
+            created_at (datetime): Data de criação do último pedido da página
+            order_id (int): ID do último pedido da página
+        
+        Returns:
+            str: Cursor seguro para URL
+        """
+        valor = f"{created_at.isoformat()}|{order_id}"
+        return base64.urlsafe_b64encode(valor.encode()).decode().rstrip('=')
+    
+    @staticmethod
+    def decodificar_cursor(cursor):
+        """
+        Recupera a posição (created_at, id) de um cursor
+        
+        Args:
+            cursor (str): Cursor gerado por codificar_cursor
+        
+        Returns:
+            tuple: (datetime, int)
+        
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        try:
+            preenchimento = '=' * (-len(cursor) % 4)
+            valor = base64.urlsafe_b64decode(cursor + preenchimento).decode()
+            created_at, order_id = valor.split('|')
+            return datetime.fromisoformat(created_at), int(order_id)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError("Cursor de paginação inválido") from e
+    
+    @staticmethod
+    @cache_consultas.em_cache('orders', 'orders_arquivo')
+    def resumo_por_usuario(user_id):
+        """
+        Calcula estatísticas dos pedidos de um usuário
+        
+        Uma consulta agrupada por status em cada tabela (quente e arquivo),
+        atendidas pelos índices de resumo sem ler as linhas das tabelas.
+        
+        Args:
+            user_id (int): ID do usuário
+        
+        Returns:
+            dict: Totais por status, total de pedidos e valor gasto (centavos)
+        """
+        query = """
+            SELECT status, COUNT(*) AS quantidade, COALESCE(SUM(valor_total), 0) AS valor
+            FROM {tabela}
+            WHERE user_id = %s
+            GROUP BY status
+        """
+        results = db.fetch_all(query.format(tabela='orders'), (user_id,))
+        results += db.fetch_all(query.format(tabela='orders_arquivo'), (user_id,))
+        
+        por_status = {status: 0 for status in TRANSICOES_STATUS}
+        valor_total = 0
+        for row in results:
+            por_status[row['status']] += row['quantidade']
+            
+            # Pedidos cancelados não entram no valor gasto
+            if row['status'] != 'cancelado':
+                valor_total += int(row['valor'])
+        
+        return {
+            'total_pedidos': sum(por_status.values()),
+            'por_status': por_status,
+            'entregues': por_status['entregue'],
+            'pendentes': por_status['pendente'] + por_status['processando'],
+            'valor_total': valor_total
+        }
+    
+    @staticmethod
+    @cache_consultas.em_cache('orders')
+    def listar_todos(colunas=None):
         """
         Lista todos os pedidos
         
+        Args:
+            colunas (tuple): Colunas a ler (None = todas), incluindo as de
+                             EXPRESSOES; as demais são buscadas no primeiro acesso
+        
         Returns:
             list: Lista de objetos Order
         """
-        query = "SELECT * FROM orders ORDER BY created_at DESC"
+        query = f"SELECT {Order.selecao(colunas)} FROM orders ORDER BY created_at DESC"
         results = db.fetch_all(query)
         
-        return [Order(**row) for row in results]
+        return [Order.de_linha(row, colunas) for row in results]
+    
+    @staticmethod
+    @cache_consultas.em_cache('orders')
+    def contar():
+        """
+        Conta os pedidos da tabela principal sem carregá-los
+        
+        Returns:
+            int: Quantidade de pedidos
+        """
+        return db.fetch_one("SELECT COUNT(*) AS total FROM orders")['total']
+    
+    def evento_criacao(self):
+        """
+        Dados do pedido para a linha inserida no painel administrativo
+        
+        Returns:
+            dict: Campos exibidos na tabela de pedidos
+        """
+        criado_em = self.created_at or datetime.now()
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'status': self.status,
+            'valor_total': self.valor_total,
+            'valor_formatado': formatar_preco(self.valor_total),
+            'endereco_entrega': (self.endereco_entrega or '')[:30],
+            'data': criado_em.strftime('%d/%m/%Y %H:%M')
+        }
     
     def to_dict(self):
         """
@@ -185,7 +596,9 @@ class OrderItem:
             params = (self.order_id, self.product_id, self.quantidade, 
                      self.preco_unitario, self.subtotal)
             
-            self.id = db.execute_query(query, params)
+            with db.transaction(savepoint=False):
+                self.id = db.execute_query(query, params)
+                rollups.registrar_item(self.product_id, self.quantidade, self.subtotal)
             return self.id
         
         except Exception as e:
@@ -193,17 +606,42 @@ class OrderItem:
             raise e
     
     @staticmethod
-    def buscar_por_pedido(order_id):
+    def salvar_varios(itens):
+        """
+        Salva vários itens com um único INSERT (sem atualizar rollups)
+        
+        Args:
+            itens (list): Objetos OrderItem
+        
+        Returns:
+            int: Quantidade de itens gravados
+        """
+        if not itens:
+            return 0
+        
+        query = """
+            INSERT INTO order_items (order_id, product_id, quantidade, preco_unitario, subtotal)
+            VALUES (%s, %s, %s, %s, %s)
+        """
+        params = [(item.order_id, item.product_id, item.quantidade, item.preco_unitario, item.subtotal)
+                  for item in itens]
+        return db.execute_many(query, params)
+    
+    @staticmethod
+    @cache_consultas.em_cache('order_items', 'order_items_arquivo')
+    def buscar_por_pedido(order_id, arquivado=False):
         """
         Busca itens de um pedido
         
         Args:
             order_id (int): ID do pedido
+            arquivado (bool): Se o pedido está no arquivo
         
         Returns:
             list: Lista de objetos OrderItem
         """
-        query = "SELECT * FROM order_items WHERE order_id = %s"
+        tabela = 'order_items_arquivo' if arquivado else 'order_items'
+        query = f"SELECT * FROM {tabela} WHERE order_id = %s"
         results = db.fetch_all(query, (order_id,))
         
         return [OrderItem(**row) for row in results]
@@ -4,11 +4,17 @@ Representa um produto do sistema
 """
 
 from utils.database import db
+from utils import cache_consultas, mapa_identidade
+from utils.projecao import Projetavel
 
 
-class Product:
+class Product(Projetavel):
     """Classe que representa um produto"""
     
+    TABELA = 'products'
+    COLUNAS = ('id', 'nome', 'descricao', 'preco', 'estoque', 'ativo', 'imagem_url', 'categoria',
+               'created_at', 'updated_at')
+    
     def __init__(self, id=None, nome=None, descricao=None, preco=None, 
                  estoque=0, ativo=True, imagem_url=None, categoria=None,
                  created_at=None, updated_at=None):
@@ -89,6 +95,7 @@ class Product:
                      self.ativo, self.imagem_url, self.categoria)
             
             self.id = db.execute_query(query, params)
+            mapa_identidade.gravado('products', self)
             return self.id
         
         except Exception as e:
@@ -119,7 +126,9 @@ class Product:
             params = (self.nome, self.descricao, self.preco, self.estoque, 
                      self.ativo, self.imagem_url, self.categoria, self.id)
             
-            return db.execute_query(query, params)
+            afetados = db.execute_query(query, params)
+            mapa_identidade.gravado('products', self)
+            return afetados
         
         except Exception as e:
             print(f"❌ Erro ao atualizar produto: {e}")
@@ -134,16 +143,21 @@ class Product:
         """
         try:
             query = "UPDATE products SET ativo = FALSE WHERE id = %s"
-            return db.execute_query(query, (self.id,))
+            afetados = db.execute_query(query, (self.id,))
+            self.ativo = False
+            mapa_identidade.gravado('products', self)
+            return afetados
         
         except Exception as e:
             print(f"❌ Erro ao deletar produto: {e}")
             raise e
     
     @staticmethod
+    @mapa_identidade.mapeado('products')
+    @cache_consultas.em_cache('products')
     def buscar_por_id(product_id):
         """
-        Busca produto por ID
+        Busca produto por ID (uma vez por requisição)
         
         Args:
             product_id (int): ID do produto
@@ -159,30 +173,79 @@ class Product:
         return None
     
     @staticmethod
-    def listar_ativos():
+    @cache_consultas.em_cache('products')
+    def buscar_por_ids(product_ids):
+        """
+        Busca vários produtos com uma única consulta
+        
+        Produtos já carregados na requisição vêm do mapa de identidade; só os
+        demais são consultados.
+        
+        Args:
+            product_ids (list): IDs dos produtos
+        
+        Returns:
+            dict: {id: Product} apenas com os produtos encontrados
+        """
+        ids = list(dict.fromkeys(int(product_id) for product_id in product_ids))
+        if not ids:
+            return {}
+        
+        def carregar(faltantes):
+            marcadores = ', '.join(['%s'] * len(faltantes))
+            query = f"SELECT * FROM products WHERE id IN ({marcadores})"
+            results = db.fetch_all(query, tuple(faltantes))
+            return {row['id']: Product(**row) for row in results}
+        
+        return mapa_identidade.buscar_varios('products', ids, carregar)
+    
+    @staticmethod
+    @cache_consultas.em_cache('products')
+    def listar_ativos(colunas=None):
         """
         Lista produtos ativos
         
+        Args:
+            colunas (tuple): Colunas a ler (None = todas); as demais são
+                             buscadas no primeiro acesso
+        
         Returns:
             list: Lista de objetos Product
         """
-        query = "SELECT * FROM products WHERE ativo = TRUE ORDER BY created_at DESC"
+        query = f"SELECT {Product.selecao(colunas)} FROM products WHERE ativo = TRUE ORDER BY created_at DESC"
         results = db.fetch_all(query)
         
-        return [Product(**row) for row in results]
+        return [Product.de_linha(row, colunas) for row in results]
     
     @staticmethod
-    def listar_todos():
+    @cache_consultas.em_cache('products')
+    def listar_todos(colunas=None):
         """
         Lista todos os produtos (incluindo inativos)
         
+        Args:
+            colunas (tuple): Colunas a ler (None = todas); as demais são
+                             buscadas no primeiro acesso
+        
         Returns:
             list: Lista de objetos Product
         """
-        query = "SELECT * FROM products ORDER BY created_at DESC"
+        query = f"SELECT {Product.selecao(colunas)} FROM products ORDER BY created_at DESC"
         results = db.fetch_all(query)
         
-        return [Product(**row) for row in results]
+        return [Product.de_linha(row, colunas) for row in results]
+    
+    @staticmethod
+    @cache_consultas.em_cache('products')
+    def contar_ativos():
+        """
+        Conta os produtos ativos sem carregá-los
+        
+        Returns:
+            int: Quantidade de produtos ativos
+        """
+        query = "SELECT COUNT(*) AS total FROM products WHERE ativo = TRUE"
+        return db.fetch_one(query)['total']
     
     def to_dict(self):
         """
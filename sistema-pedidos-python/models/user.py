@@ -3,14 +3,67 @@ Model User - Programação Orientada a Objetos
 Representa um usuário do sistema
 """
 
+import re
+import time
 from werkzeug.security import generate_password_hash, check_password_hash
-from utils.database import db
+from utils.database import db, DatabaseError
+from utils import cache_consultas, disponibilidade, jobs, mapa_identidade, metricas
+from utils.projecao import Projetavel
 from utils.validations import validar_cpf, validar_email, validar_telefone, validar_idade, validar_nome, validar_endereco, formatar_cpf, formatar_telefone
 
 
-class User:
+# Código MySQL de violação de chave única
+ERRO_DUPLICADO = 1062
+
+MENSAGENS_DUPLICADO = {
+    'email': 'Email já cadastrado',
+    'cpf': 'CPF já cadastrado',
+}
+
+
+class RegistroDuplicado(ValueError):
+    """Email ou CPF já cadastrado (campo indica qual)"""
+    
+    def __init__(self, campo):
+        """
+        Args:
+            campo (str): 'email' ou 'cpf'
+        """
+        super().__init__(MENSAGENS_DUPLICADO[campo])
+        self.campo = campo
+
+
+def campo_duplicado(erro):
+    """
+    Identifica o campo de uma violação de chave única
+    
+    Args:
+        erro (DatabaseError): Erro do INSERT/UPDATE
+    
+    Returns:
+        str: 'email', 'cpf' ou None se não for duplicidade desses campos
+    """
+    if erro.errno != ERRO_DUPLICADO:
+        return None
+    
+    # MySQL: Duplicate entry '...' for key 'users.email' (ou 'email')
+    # SQLite: UNIQUE constraint failed: users.email
+    chave = re.search(r"(?:for key '|constraint failed: )(?:\w+\.)?(\w+)", str(erro))
+    if chave and chave.group(1) in MENSAGENS_DUPLICADO:
+        return chave.group(1)
+    return None
+
+
+class User(Projetavel):
     """Classe que representa um usuário do sistema"""
     
+    TABELA = 'users'
+    COLUNAS = ('id', 'nome', 'email', 'senha', 'cpf', 'telefone', 'idade', 'endereco', 'role',
+               'created_at', 'updated_at')
+    
+    # Colunas lidas nas buscas em cache: o hash da senha só é lido do banco, quando usado
+    COLUNAS_SEM_SENHA = tuple(coluna for coluna in COLUNAS if coluna != 'senha')
+    
     def __init__(self, id=None, nome=None, email=None, senha=None, cpf=None, 
                  telefone=None, idade=None, endereco=None, role='user', 
                  created_at=None, updated_at=None):
@@ -98,7 +151,9 @@ class User:
         Args:
             senha (str): Senha em texto plano
         """
+        inicio = time.perf_counter()
         self.senha = generate_password_hash(senha)
+        metricas.senha_duracao.observar(time.perf_counter() - inicio, 'gerar')
     
     def verificar_senha(self, senha):
         """
@@ -110,7 +165,11 @@ class User:
         Returns:
             bool: True se senha está correta
         """
-        return check_password_hash(self.senha, senha)
+        inicio = time.perf_counter()
+        try:
+            return check_password_hash(self.senha, senha)
+        finally:
+            metricas.senha_duracao.observar(time.perf_counter() - inicio, 'verificar')
     
     def salvar(self):
         """
@@ -133,14 +192,6 @@ class User:
             self.cpf = formatar_cpf(self.cpf)
             self.telefone = formatar_telefone(self.telefone)
             
-            # Verifica se email já existe
-            if self.email_existe():
-                raise ValueError("Email já cadastrado")
-            
-            # Verifica se CPF já existe
-            if self.cpf_existe():
-                raise ValueError("CPF já cadastrado")
-            
             # Hasheia senha se ainda não foi hasheada
             if not self.senha.startswith('pbkdf2:sha256:'):
                 self.set_senha(self.senha)
@@ -153,7 +204,24 @@ class User:
             params = (self.nome, self.email, self.senha, self.cpf, self.telefone, 
                      self.idade, self.endereco, self.role)
             
-            self.id = db.execute_query(query, params)
+            # Usuário e job de boas-vindas em um único commit (hash calculado antes).
+            # Sem consulta prévia: as chaves únicas do banco apontam o email ou CPF
+            # já cadastrado (inclusive em cadastros simultâneos)
+            try:
+                with db.transaction(savepoint=False):
+                    self.id = db.execute_query(query, params)
+                    
+                    # Efeitos colaterais (confirmação de cadastro): o worker só vê o job após o commit
+                    jobs.enfileirar('usuario_cadastrado', {'user_id': self.id})
+                    
+                    email, cpf = self.email, self.cpf
+                    db.ao_confirmar(lambda: disponibilidade.registrar(email, cpf))
+                    mapa_identidade.gravado('users', self)
+            except DatabaseError as e:
+                campo = campo_duplicado(e)
+                if campo:
+                    raise RegistroDuplicado(campo) from e
+                raise
             return self.id
         
         except Exception as e:
@@ -188,7 +256,18 @@ class User:
             params = (self.nome, self.email, self.cpf, self.telefone, 
                      self.idade, self.endereco, self.role, self.id)
             
-            return db.execute_query(query, params)
+            try:
+                afetados = db.execute_query(query, params)
+            except DatabaseError as e:
+                campo = campo_duplicado(e)
+                if campo:
+                    raise RegistroDuplicado(campo) from e
+                raise
+            
+            email, cpf = self.email, self.cpf
+            db.ao_confirmar(lambda: disponibilidade.registrar(email, cpf))
+            mapa_identidade.gravado('users', self)
+            return afetados
         
         except Exception as e:
             print(f"❌ Erro ao atualizar usuário: {e}")
@@ -226,9 +305,13 @@ class User:
         return False
     
     @staticmethod
+    @mapa_identidade.mapeado('users')
+    @cache_consultas.em_cache('users')
     def buscar_por_id(user_id):
         """
-        Busca usuário por ID
+        Busca usuário por ID (uma vez por requisição)
+        
+        A senha fica fora da consulta (e do cache): é lida no primeiro acesso.
         
         Args:
             user_id (int): ID do usuário
@@ -236,11 +319,11 @@ class User:
         Returns:
             User: Objeto User ou None
         """
-        query = "SELECT * FROM users WHERE id = %s"
+        query = f"SELECT {User.selecao(User.COLUNAS_SEM_SENHA)} FROM users WHERE id = %s"
         result = db.fetch_one(query, (user_id,))
         
         if result:
-            return User(**result)
+            return User.de_linha(result, User.COLUNAS_SEM_SENHA)
         return None
     
     @staticmethod
@@ -262,17 +345,33 @@ class User:
         return None
     
     @staticmethod
-    def listar_todos():
+    @cache_consultas.em_cache('users')
+    def listar_todos(colunas=None):
         """
         Lista todos os usuários
         
+        Args:
+            colunas (tuple): Colunas a ler (None = todas); as demais são
+                             buscadas no primeiro acesso
+        
         Returns:
             list: Lista de objetos User
         """
-        query = "SELECT * FROM users ORDER BY created_at DESC"
+        query = f"SELECT {User.selecao(colunas)} FROM users ORDER BY created_at DESC"
         results = db.fetch_all(query)
         
-        return [User(**row) for row in results]
+        return [User.de_linha(row, colunas) for row in results]
+    
+    @staticmethod
+    @cache_consultas.em_cache('users')
+    def contar():
+        """
+        Conta os usuários sem carregá-los
+        
+        Returns:
+            int: Quantidade de usuários
+        """
+        return db.fetch_one("SELECT COUNT(*) AS total FROM users")['total']
     
     def to_dict(self):
         """
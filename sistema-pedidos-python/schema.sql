@@ -59,10 +59,116 @@ CREATE TABLE IF NOT EXISTS order_items (
     FOREIGN KEY (product_id) REFERENCES products(id)
 );
 
+-- Tabela da fila de tarefas em segundo plano (status 'morto' = dead-letter)
+CREATE TABLE IF NOT EXISTS jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    tarefa VARCHAR(100) NOT NULL,
+    payload TEXT NOT NULL,
+    status ENUM('pendente', 'executando', 'concluido', 'morto') DEFAULT 'pendente' NOT NULL,
+    tentativas INT NOT NULL DEFAULT 0,
+    max_tentativas INT NOT NULL DEFAULT 5,
+    executar_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    reservado_por VARCHAR(32),
+    iniciado_em TIMESTAMP(3) NULL,
+    concluido_em TIMESTAMP(3) NULL,
+    ultimo_erro TEXT,
+    created_at TIMESTAMP(3) DEFAULT CURRENT_TIMESTAMP(3),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Rollups diários de pedidos e receita por status
+CREATE TABLE IF NOT EXISTS rollup_pedidos_diario (
+    dia DATE NOT NULL,
+    status ENUM('pendente', 'processando', 'enviado', 'entregue', 'cancelado') NOT NULL,
+    pedidos INT NOT NULL DEFAULT 0,
+    receita BIGINT NOT NULL DEFAULT 0 COMMENT 'Valor em centavos',
+    PRIMARY KEY (dia, status)
+);
+
+-- Rollups diários de itens vendidos por categoria
+CREATE TABLE IF NOT EXISTS rollup_itens_diario (
+    dia DATE NOT NULL,
+    categoria VARCHAR(100) NOT NULL,
+    itens INT NOT NULL DEFAULT 0,
+    receita BIGINT NOT NULL DEFAULT 0 COMMENT 'Valor em centavos',
+    PRIMARY KEY (dia, categoria)
+);
+
+-- Arquivo de pedidos finalizados antigos (mesmas colunas, sem chaves estrangeiras)
+CREATE TABLE IF NOT EXISTS orders_arquivo (
+    id INT PRIMARY KEY,
+    user_id INT NOT NULL,
+    status ENUM('pendente', 'processando', 'enviado', 'entregue', 'cancelado') NOT NULL,
+    valor_total INT NOT NULL COMMENT 'Valor em centavos',
+    observacoes TEXT,
+    endereco_entrega TEXT NOT NULL,
+    created_at TIMESTAMP NULL,
+    updated_at TIMESTAMP NULL,
+    arquivado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS order_items_arquivo (
+    id INT PRIMARY KEY,
+    order_id INT NOT NULL,
+    product_id INT NOT NULL,
+    quantidade INT NOT NULL,
+    preco_unitario INT NOT NULL COMMENT 'Preço em centavos',
+    subtotal INT NOT NULL COMMENT 'quantidade * preco_unitario',
+    created_at TIMESTAMP NULL
+);
+
+-- Respostas de requisições com chave de idempotência (status_http NULL = em processamento)
+CREATE TABLE IF NOT EXISTS idempotencia (
+    chave CHAR(64) PRIMARY KEY,
+    impressao CHAR(64) NOT NULL,
+    status_http INT NULL,
+    cabecalhos TEXT,
+    corpo MEDIUMBLOB,
+    expira_em TIMESTAMP NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Eventos do painel administrativo (lidos por todos os processos)
+CREATE TABLE IF NOT EXISTS eventos (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    tipo VARCHAR(50) NOT NULL,
+    dados TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Índices para melhor performance
 CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_users_cpf ON users(cpf);
 CREATE INDEX idx_orders_user_id ON orders(user_id);
 CREATE INDEX idx_orders_status ON orders(status);
+CREATE INDEX idx_orders_resumo_usuario ON orders(user_id, status, created_at, valor_total);
+CREATE INDEX idx_orders_user_created ON orders(user_id, created_at);
+CREATE INDEX idx_orders_created_id ON orders(created_at, id);
+CREATE INDEX idx_orders_status_updated ON orders(status, updated_at);
+CREATE INDEX idx_products_ativo_created ON products(ativo, created_at);
 CREATE INDEX idx_order_items_order_id ON order_items(order_id);
 CREATE INDEX idx_order_items_product_id ON order_items(product_id);
+CREATE INDEX idx_jobs_status_executar_em ON jobs(status, executar_em);
+CREATE INDEX idx_jobs_reservado_por ON jobs(reservado_por);
+CREATE INDEX idx_orders_arquivo_user_created ON orders_arquivo(user_id, created_at);
+CREATE INDEX idx_orders_arquivo_resumo ON orders_arquivo(user_id, status, valor_total);
+CREATE INDEX idx_order_items_arquivo_order_id ON order_items_arquivo(order_id);
+CREATE INDEX idx_idempotencia_expira_em ON idempotencia(expira_em);
+CREATE INDEX idx_eventos_created_at ON eventos(created_at);
+
+-- Controle de versões do schema (python migrate.py)
+-- Este arquivo já contém todas as migrações listadas abaixo
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    versao INT PRIMARY KEY,
+    nome VARCHAR(255) NOT NULL,
+    aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT IGNORE INTO schema_migrations (versao, nome) VALUES
+    (1, 'fila_jobs'),
+    (2, 'indice_resumo_pedidos'),
+    (3, 'indices_compostos'),
+    (4, 'rollups_diarios'),
+    (5, 'arquivo_pedidos'),
+    (6, 'idempotencia'),
+    (7, 'eventos');
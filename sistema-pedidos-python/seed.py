@@ -1,12 +1,11 @@
 """
 Script para popular banco de dados com produtos de exemplo
 """
-import os
 from dotenv import load_dotenv
 load_dotenv()
-print("PASSWORD LIDO:", os.getenv("DB_PASSWORD"))
 from models.product import Product
 from models.user import User
+from utils.database import db
 
 print("🌱 Iniciando seed do banco de dados...")
 
@@ -95,10 +94,12 @@ produtos = [
 ]
 
 try:
-    for produto_data in produtos:
-        produto = Product(**produto_data)
-        produto.salvar()
-        print(f"✅ Produto criado: {produto.nome}")
+    # Todos os produtos em um único commit
+    with db.transaction():
+        for produto_data in produtos:
+            produto = Product(**produto_data)
+            produto.salvar()
+            print(f"✅ Produto criado: {produto.nome}")
     
     print(f"\n🎉 Seed concluído! {len(produtos)} produtos adicionados ao banco.")
     
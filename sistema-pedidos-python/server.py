@@ -0,0 +1,354 @@
+"""
+Servidor de produção (prefork + pool de threads)
+
+O processo mestre abre o socket, carrega a aplicação e cria N processos worker
+(fork). Cada worker atende requisições com um pool de threads e abre as suas
+próprias conexões com o banco; só aceita uma conexão quando há thread livre (as
+demais esperam na fila do socket, onde outro worker pode aceitá-las). Depois de
+SERVER_MAX_REQUISICOES requisições (contadas por requisição, inclusive as de
+conexões keep-alive) o worker para de aceitar conexões e avisa o mestre, que
+cria o substituto na hora; as requisições em andamento têm até
+SERVER_TEMPO_ENCERRAMENTO segundos para terminar. SIGTERM/Ctrl+C encerram tudo
+em ordem.
+
+Configuração (.env):
+    SERVER_HOST, SERVER_PORTA          endereço (0.0.0.0:5000)
+    SERVER_PROCESSOS                   workers (número de CPUs)
+    SERVER_THREADS                     threads por worker (8)
+    SERVER_MAX_REQUISICOES             reciclagem do worker (1000, 0 = nunca)
+    SERVER_MAX_REQUISICOES_VARIACAO    variação aleatória da reciclagem (100)
+    SERVER_TEMPO_ENCERRAMENTO          espera (s) pelas requisições ao encerrar ou reciclar (30)
+    SERVER_KEEPALIVE                   tempo (s) de conexão ociosa (5)
+
+Uso:
+    python server.py
+    python server.py --processos 4 --threads 16
+"""
+
+import argparse
+import os
+import random
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+# Carrega variáveis de ambiente
+load_dotenv()
+
+from app import app
+from utils import eventos
+from utils.database import db
+
+
+class ManipuladorRequisicao(WSGIRequestHandler):
+    """Handler HTTP/1.1 com tempo limite para conexões ociosas"""
+    
+    protocol_version = 'HTTP/1.1'
+    timeout = int(os.getenv('SERVER_KEEPALIVE', '5'))
+    
+    def handle_one_request(self):
+        """Atende uma requisição; com o worker encerrando, fecha a conexão em seguida"""
+        self.raw_requestline = b''  # continua vazio se a conexão ociosa expirar
+        super().handle_one_request()
+        if self.raw_requestline:
+            self.server.requisicao_atendida()
+        if self.server.encerrando.is_set():
+            self.close_connection = True
+
+
+class ServidorPool(BaseWSGIServer):
+    """Servidor WSGI que atende as conexões em um pool de threads de tamanho fixo"""
+    
+    multithread = True
+    multiprocess = True
+    
+    def __init__(self, aplicacao, host, porta, fd, threads, max_requisicoes, tempo_encerramento, aviso):
+        """
+        Inicializa o servidor sobre um socket já aberto pelo mestre
+        
+        Args:
+            aplicacao: Aplicação WSGI
+            host (str): Endereço de escuta
+            porta (int): Porta de escuta
+            fd (int): Descritor do socket de escuta
+            threads (int): Tamanho do pool de threads
+            max_requisicoes (int): Requisições atendidas antes de reciclar (0 = sem limite)
+            tempo_encerramento (float): Segundos para terminar as conexões ao encerrar
+            aviso (int): Descritor do pipe que avisa o mestre do encerramento
+        """
+        super().__init__(host, porta, aplicacao, handler=ManipuladorRequisicao, fd=fd)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http')
+        self.vagas = threading.Semaphore(threads)
+        self.max_requisicoes = max_requisicoes
+        self.tempo_encerramento = tempo_encerramento
+        self.aviso = aviso
+        self.atendidas = 0
+        self.em_andamento = 0
+        self.condicao = threading.Condition()
+        self.encerrando = threading.Event()
+        self.prazo = None
+    
+    def process_request(self, request, client_address):
+        """Entrega a conexão ao pool quando houver uma thread livre"""
+        # Sem thread livre, as próximas conexões ficam na fila do socket, para outro worker
+        while not self.vagas.acquire(timeout=0.5):
+            if self.encerrando.is_set() and time.monotonic() >= self.prazo:
+                self.shutdown_request(request)
+                return
+        
+        with self.condicao:
+            self.em_andamento += 1
+        self.pool.submit(self._atender, request, client_address)
+    
+    def _atender(self, request, client_address):
+        """Atende uma conexão em uma thread do pool"""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.vagas.release()
+            with self.condicao:
+                self.em_andamento -= 1
+                self.condicao.notify_all()
+    
+    def requisicao_atendida(self):
+        """Conta uma requisição (chamado pelo handler) e verifica o limite de reciclagem"""
+        with self.condicao:
+            self.atendidas += 1
+            atingido = self.max_requisicoes and self.atendidas >= self.max_requisicoes
+        if atingido:
+            self.encerrar()
+    
+    def encerrar(self):
+        """Para de aceitar conexões e avisa o mestre (pode ser chamado de qualquer thread ou sinal)"""
+        if not self.encerrando.is_set():
+            self.prazo = time.monotonic() + self.tempo_encerramento
+            self.encerrando.set()
+            eventos.encerrar_streams()
+            try:
+                os.write(self.aviso, f"{os.getpid()}\n".encode())
+            except OSError:
+                pass
+            threading.Thread(target=self.shutdown, daemon=True).start()
+    
+    def drenar(self):
+        """
+        Aguarda as conexões em andamento até o prazo do encerramento
+        
+        Returns:
+            bool: True se todas terminaram a tempo
+        """
+        with self.condicao:
+            return self.condicao.wait_for(lambda: self.em_andamento == 0,
+                                          timeout=max(0, self.prazo - time.monotonic()))
+
+
+def executar_worker(host, porta, fd, threads, max_requisicoes, tempo_encerramento, aviso):
+    """
+    Laço de um processo worker
+    
+    Args:
+        host (str): Endereço de escuta
+        porta (int): Porta de escuta
+        fd (int): Descritor do socket de escuta herdado do mestre
+        threads (int): Tamanho do pool de threads
+        max_requisicoes (int): Requisições atendidas antes de reciclar
+        tempo_encerramento (float): Segundos para terminar as conexões ao encerrar
+        aviso (int): Descritor do pipe que avisa o mestre do encerramento
+    """
+    servidor = ServidorPool(app, host, porta, fd, threads, max_requisicoes, tempo_encerramento, aviso)
+    eventos.limitar_assinantes(threads)
+    
+    # Ctrl+C é tratado pelo mestre; SIGTERM inicia o encerramento
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: servidor.encerrar())
+    
+    print(f"👷 Worker {os.getpid()} pronto ({threads} threads)")
+    servidor.serve_forever()
+    
+    # Drena as requisições em andamento (até o prazo) e fecha as conexões do processo;
+    # as threads que passarem do prazo terminam com o processo
+    if servidor.drenar():
+        servidor.pool.shutdown(wait=True)
+        db.fechar_todas()
+    else:
+        print(f"⚠️ Worker {os.getpid()}: {servidor.em_andamento} conexão(ões) em andamento após "
+              f"{tempo_encerramento:g}s; encerrando")
+        servidor.pool.shutdown(wait=False, cancel_futures=True)
+    
+    if max_requisicoes and servidor.atendidas >= max_requisicoes:
+        print(f"♻️ Worker {os.getpid()} reciclado após {servidor.atendidas} requisições")
+
+
+def criar_worker(host, porta, fd, threads, max_requisicoes, variacao, tempo_encerramento, aviso):
+    """
+    Cria um processo worker por fork
+    
+    Args:
+        host (str): Endereço de escuta
+        porta (int): Porta de escuta
+        fd (int): Descritor do socket de escuta
+        threads (int): Tamanho do pool de threads
+        max_requisicoes (int): Requisições antes de reciclar
+        variacao (int): Variação aleatória do limite (evita reciclar todos juntos)
+        tempo_encerramento (float): Segundos para terminar as conexões ao encerrar
+        aviso (int): Descritor do pipe que avisa o mestre do encerramento
+    
+    Returns:
+        int: PID do worker
+    """
+    limite = max_requisicoes + random.randint(0, variacao) if max_requisicoes else 0
+    pid = os.fork()
+    if pid == 0:
+        codigo = 0
+        try:
+            executar_worker(host, porta, fd, threads, limite, tempo_encerramento, aviso)
+        except Exception as e:
+            print(f"❌ Erro no worker {os.getpid()}: {e}")
+            codigo = 1
+        finally:
+            sys.stdout.flush()
+            os._exit(codigo)
+    return pid
+
+
+def ler_avisos(leitura, pendente):
+    """
+    Lê do pipe os PIDs dos workers que pararam de aceitar conexões
+    
+    Args:
+        leitura (int): Descritor de leitura do pipe (não bloqueante)
+        pendente (bytearray): Sobra de leituras anteriores (linha incompleta)
+    
+    Returns:
+        list: PIDs (int) avisados desde a última leitura
+    """
+    try:
+        pendente += os.read(leitura, 4096)
+    except BlockingIOError:
+        return []
+    *linhas, resto = pendente.split(b'\n')
+    pendente[:] = resto
+    return [int(linha) for linha in linhas if linha]
+
+
+def encerrar_workers(workers, tempo_limite):
+    """
+    Pede o encerramento dos workers e aguarda; força após o tempo limite
+    
+    Args:
+        workers (set): PIDs dos workers
+        tempo_limite (float): Segundos de espera pela drenagem
+    """
+    for pid in workers:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    
+    prazo = time.monotonic() + tempo_limite
+    while workers and time.monotonic() < prazo:
+        pid, _ = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            workers.discard(pid)
+        else:
+            time.sleep(0.1)
+    
+    for pid in workers:
+        print(f"⚠️ Worker {pid} não terminou a tempo; finalizando")
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except ProcessLookupError:
+            pass
+
+
+def main():
+    """Abre o socket, cria os workers e os supervisiona até o encerramento"""
+    parser = argparse.ArgumentParser(description='Servidor de produção do Sistema de Pedidos')
+    parser.add_argument('--host', default=os.getenv('SERVER_HOST', '0.0.0.0'))
+    parser.add_argument('--porta', type=int, default=int(os.getenv('SERVER_PORTA', '5000')))
+    parser.add_argument('--processos', type=int,
+                        default=int(os.getenv('SERVER_PROCESSOS', str(os.cpu_count() or 2))),
+                        help='Quantidade de processos worker')
+    parser.add_argument('--threads', type=int, default=int(os.getenv('SERVER_THREADS', '8')),
+                        help='Threads por worker')
+    parser.add_argument('--max-requisicoes', type=int,
+                        default=int(os.getenv('SERVER_MAX_REQUISICOES', '1000')),
+                        help='Requisições atendidas antes de reciclar o worker (0 = nunca)')
+    parser.add_argument('--variacao', type=int,
+                        default=int(os.getenv('SERVER_MAX_REQUISICOES_VARIACAO', '100')),
+                        help='Variação aleatória do limite de reciclagem')
+    parser.add_argument('--tempo-encerramento', type=float,
+                        default=float(os.getenv('SERVER_TEMPO_ENCERRAMENTO', '30')),
+                        help='Espera (s) pelas requisições em andamento ao encerrar ou reciclar')
+    args = parser.parse_args()
+    
+    if not hasattr(os, 'fork'):
+        print("❌ O servidor prefork requer um sistema com fork (Linux/Mac). Use python app.py")
+        sys.exit(1)
+    
+    # Socket compartilhado: todos os workers aceitam conexões da mesma fila
+    ouvinte = socket.create_server((args.host, args.porta), backlog=2048)
+    ouvinte.set_inheritable(True)
+    fd = ouvinte.fileno()
+    
+    # Pipe pelo qual cada worker avisa que parou de aceitar conexões
+    leitura, aviso = os.pipe()
+    os.set_blocking(leitura, False)
+    pendente = bytearray()
+    
+    parando = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: parando.set())
+    signal.signal(signal.SIGINT, lambda *_: parando.set())
+    
+    def novo_worker():
+        return criar_worker(args.host, args.porta, fd, args.threads, args.max_requisicoes, args.variacao,
+                            args.tempo_encerramento, aviso)
+    
+    workers = {novo_worker() for _ in range(args.processos)}
+    drenando = set()
+    
+    print(f"🚀 Servidor em http://{args.host}:{args.porta} com {args.processos} processo(s) "
+          f"x {args.threads} threads. Ctrl+C para encerrar")
+    
+    # Supervisão: repõe workers reciclados (assim que param de aceitar) ou que falharam
+    while not parando.is_set():
+        for pid in ler_avisos(leitura, pendente):
+            if pid in workers:
+                workers.discard(pid)
+                drenando.add(pid)
+                workers.add(novo_worker())
+        
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if not pid:
+            select.select([leitura], [], [], 0.5)
+            continue
+        
+        # Worker que já foi substituído terminou a drenagem
+        if pid in drenando:
+            drenando.discard(pid)
+            continue
+        
+        workers.discard(pid)
+        if os.waitstatus_to_exitcode(status) != 0:
+            print(f"⚠️ Worker {pid} terminou com erro; criando outro")
+            time.sleep(1)
+        workers.add(novo_worker())
+    
+    print("\n🛑 Encerrando: aguardando requisições em andamento...")
+    ouvinte.close()
+    encerrar_workers(workers | drenando, args.tempo_encerramento)
+    print("✅ Servidor encerrado")
+
+
+if __name__ == '__main__':
+    main()
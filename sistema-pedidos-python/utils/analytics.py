@@ -0,0 +1,132 @@
+"""
+Módulo de análises de séries temporais sobre os rollups diários
+Consultas vetorizadas com NumPy: médias móveis e comparação entre períodos
+"""
+
+from datetime import timedelta
+
+import numpy as np
+
+from utils.database import db
+
+
+# Tabelas e métricas permitidas (evita interpolar nomes arbitrários no SQL)
+ROLLUPS = {
+    'pedidos': ('rollup_pedidos_diario', 'status', ('pedidos', 'receita')),
+    'itens': ('rollup_itens_diario', 'categoria', ('itens', 'receita'))
+}
+
+
+def serie_diaria(inicio, fim, metrica='receita', rollup='pedidos', filtro=None):
+    """
+    Monta a série diária de uma métrica, com zero nos dias sem movimento
+    
+    Args:
+        inicio (date): Primeiro dia (inclusive)
+        fim (date): Último dia (inclusive)
+        metrica (str): 'pedidos', 'itens' ou 'receita'
+        rollup (str): 'pedidos' (por status) ou 'itens' (por categoria)
+        filtro (str): Status ou categoria específico (None = todos)
+    
+    Returns:
+        tuple: (np.ndarray de datetime64[D], np.ndarray de int64)
+    
+    Raises:
+        ValueError: Se rollup ou métrica forem inválidos
+    """
+    if rollup not in ROLLUPS or metrica not in ROLLUPS[rollup][2]:
+        raise ValueError(f"Métrica inválida: {rollup}.{metrica}")
+    
+    tabela, dimensao, _ = ROLLUPS[rollup]
+    query = f"""
+        SELECT dia, SUM({metrica}) AS valor
+        FROM {tabela}
+        WHERE dia BETWEEN %s AND %s {f'AND {dimensao} = %s' if filtro else ''}
+        GROUP BY dia
+    """
+    params = (inicio, fim, filtro) if filtro else (inicio, fim)
+    results = db.fetch_all(query, params)
+    
+    dias = np.arange(np.datetime64(inicio, 'D'), np.datetime64(fim, 'D') + 1)
+    valores = np.zeros(len(dias), dtype=np.int64)
+    
+    if results:
+        posicoes = (np.array([row['dia'] for row in results], dtype='datetime64[D]') - dias[0]).astype(np.int64)
+        valores[posicoes] = [int(row['valor']) for row in results]
+    
+    return dias, valores
+
+
+def media_movel(valores, janela=7):
+    """
+    Calcula a média móvel simples da série
+    
+    Args:
+        valores (np.ndarray): Série diária
+        janela (int): Tamanho da janela em dias
+    
+    Returns:
+        np.ndarray: Médias (NaN nos primeiros janela-1 dias)
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    resultado = np.full(len(valores), np.nan)
+    if janela <= 0 or len(valores) < janela:
+        return resultado
+    
+    acumulado = np.cumsum(np.insert(valores, 0, 0.0))
+    resultado[janela - 1:] = (acumulado[janela:] - acumulado[:-janela]) / janela
+    return resultado
+
+
+def agregar_mensal(dias, valores):
+    """
+    Agrupa uma série diária por mês
+    
+    Args:
+        dias (np.ndarray): Dias da série (datetime64[D])
+        valores (np.ndarray): Valores diários
+    
+    Returns:
+        tuple: (np.ndarray de datetime64[M], np.ndarray de totais)
+    """
+    meses = dias.astype('datetime64[M]')
+    unicos, indices = np.unique(meses, return_inverse=True)
+    return unicos, np.bincount(indices, weights=valores).astype(np.int64)
+
+
+def comparar_periodos(inicio, fim, metrica='receita', rollup='pedidos', filtro=None):
+    """
+    Compara um período com o período imediatamente anterior de mesma duração
+    
+    Args:
+        inicio (date): Primeiro dia do período atual
+        fim (date): Último dia do período atual
+        metrica (str): Métrica a comparar
+        rollup (str): 'pedidos' ou 'itens'
+        filtro (str): Status ou categoria específico (None = todos)
+    
+    Returns:
+        dict: Totais, variação absoluta e percentual e séries dia a dia
+    """
+    duracao = (fim - inicio).days + 1
+    inicio_anterior = inicio - timedelta(days=duracao)
+    
+    # Uma única consulta cobre os dois períodos
+    dias, valores = serie_diaria(inicio_anterior, fim, metrica, rollup, filtro)
+    anterior, atual = valores[:duracao], valores[duracao:]
+    
+    total_atual = int(atual.sum())
+    total_anterior = int(anterior.sum())
+    variacao = total_atual - total_anterior
+    
+    return {
+        'periodo_atual': (inicio, fim),
+        'periodo_anterior': (inicio_anterior, inicio - timedelta(days=1)),
+        'total_atual': total_atual,
+        'total_anterior': total_anterior,
+        'variacao': variacao,
+        'variacao_percentual': (variacao / total_anterior * 100) if total_anterior else None,
+        'dias': dias[duracao:],
+        'atual': atual,
+        'anterior': anterior
+    }
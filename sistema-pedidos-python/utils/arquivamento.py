@@ -0,0 +1,120 @@
+"""
+Módulo de arquivamento de pedidos finalizados
+Move pedidos entregues/cancelados antigos (com seus itens) para as tabelas *_arquivo
+"""
+
+import os
+
+from utils.database import db
+
+
+# Idade mínima (dias desde a última alteração) para arquivar um pedido
+DIAS_ARQUIVAMENTO = int(os.getenv('ARQUIVAMENTO_DIAS', '365'))
+TAMANHO_LOTE = int(os.getenv('ARQUIVAMENTO_LOTE', '500'))
+
+# Status finais: a máquina de estados não permite sair deles
+STATUS_FINALIZADOS = ('entregue', 'cancelado')
+
+COLUNAS_PEDIDO = 'id, user_id, status, valor_total, observacoes, endereco_entrega, created_at, updated_at'
+COLUNAS_ITEM = 'id, order_id, product_id, quantidade, preco_unitario, subtotal, created_at'
+
+
+def selecionar_lote(dias=DIAS_ARQUIVAMENTO, lote=TAMANHO_LOTE):
+    """
+    Seleciona IDs de pedidos finalizados elegíveis para arquivamento
+    
+    Args:
+        dias (int): Idade mínima em dias
+        lote (int): Quantidade máxima de pedidos
+    
+    Returns:
+        list: IDs dos pedidos
+    """
+    query = """
+        SELECT id FROM orders
+        WHERE status IN (%s, %s) AND updated_at < NOW() - INTERVAL %s DAY
+        ORDER BY id
+        LIMIT %s
+    """
+    results = db.fetch_all(query, (*STATUS_FINALIZADOS, dias, lote))
+    return [row['id'] for row in results]
+
+
+def arquivar_lote(order_ids):
+    """
+    Move um lote de pedidos e seus itens para o arquivo em uma transação
+    
+    Args:
+        order_ids (list): IDs dos pedidos
+    
+    Returns:
+        int: Número de pedidos arquivados
+    """
+    if not order_ids:
+        return 0
+    
+    marcadores = ', '.join(['%s'] * len(order_ids))
+    ids = tuple(order_ids)
+    
+    # Estrutura de decisão: tudo ou nada (um único commit por lote)
+    with db.transaction():
+        db.execute_query(f"""
+            INSERT INTO orders_arquivo ({COLUNAS_PEDIDO})
+            SELECT {COLUNAS_PEDIDO} FROM orders WHERE id IN ({marcadores})
+        """, ids)
+        db.execute_query(f"""
+            INSERT INTO order_items_arquivo ({COLUNAS_ITEM})
+            SELECT {COLUNAS_ITEM} FROM order_items WHERE order_id IN ({marcadores})
+        """, ids)
+        db.execute_query(f"DELETE FROM order_items WHERE order_id IN ({marcadores})", ids)
+        return db.execute_query(f"DELETE FROM orders WHERE id IN ({marcadores})", ids)
+
+
+def arquivar(dias=DIAS_ARQUIVAMENTO, lote=TAMANHO_LOTE, max_lotes=None):
+    """
+    Arquiva pedidos finalizados antigos em lotes até esgotar os elegíveis
+    
+    Cada lote é uma transação curta, para não bloquear as tabelas quentes.
+    
+    Args:
+        dias (int): Idade mínima em dias
+        lote (int): Pedidos por transação
+        max_lotes (int): Limite de lotes nesta execução (None = sem limite)
+    
+    Returns:
+        int: Total de pedidos arquivados
+    """
+    total = 0
+    lotes = 0
+    
+    while max_lotes is None or lotes < max_lotes:
+        order_ids = selecionar_lote(dias, lote)
+        if not order_ids:
+            break
+        
+        total += arquivar_lote(order_ids)
+        lotes += 1
+        print(f"📦 Lote {lotes}: {len(order_ids)} pedido(s) arquivado(s)")
+        
+        if len(order_ids) < lote:
+            break
+    
+    return total
+
+
+def contar_elegiveis(dias=DIAS_ARQUIVAMENTO):
+    """
+    Conta pedidos que seriam arquivados
+    
+    Args:
+        dias (int): Idade mínima em dias
+    
+    Returns:
+        int: Quantidade de pedidos elegíveis
+    """
+    query = """
+        SELECT COUNT(*) AS total FROM orders
+        WHERE status IN (%s, %s) AND updated_at < NOW() - INTERVAL %s DAY
+    """
+    result = db.fetch_one(query, (*STATUS_FINALIZADOS, dias))
+    return result['total'] if result else 0
@@ -0,0 +1,259 @@
+"""
+Módulo de build e entrega dos assets estáticos (CSS/JS)
+Minifica, gera nomes com hash do conteúdo e variantes gzip/brotli em
+static/dist; a rota /assets serve a variante pré-comprimida com cache imutável
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+
+from flask import abort, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_STATIC = os.path.join(RAIZ, 'static')
+DIRETORIO_DIST = os.path.join(DIRETORIO_STATIC, 'dist')
+ARQUIVO_MANIFESTO = os.path.join(DIRETORIO_DIST, 'manifest.json')
+
+# Assets processados pelo build (caminhos relativos a static/)
+ASSETS = ('css/styles.css', 'js/validations.js')
+
+# Um ano: o nome muda sempre que o conteúdo muda
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+
+TIPOS = {'.css': 'text/css', '.js': 'text/javascript'}
+
+# Nome gerado pelo build: nome.<hash de 12 dígitos>.ext
+PADRAO_VERSIONADO = re.compile(r'\.[0-9a-f]{12}\.(css|js)$')
+
+# Variantes em ordem de preferência: (codificação, extensão)
+VARIANTES = (('br', '.br'), ('gzip', '.gz'))
+
+
+# ==================== MINIFICAÇÃO ====================
+
+def minificar_css(texto):
+    """
+    Remove comentários e espaços desnecessários do CSS
+    
+    Args:
+        texto (str): CSS original
+    
+    Returns:
+        str: CSS minificado
+    """
+    texto = re.sub(r'/\*.*?\*/', '', texto, flags=re.S)
+    texto = re.sub(r'\s+', ' ', texto)
+    texto = re.sub(r'\s*([{};,>])\s*', r'\1', texto)
+    # Espaço antes de ':' é significativo em seletores (".menu :hover")
+    texto = re.sub(r':\s+', ':', texto)
+    texto = texto.replace(';}', '}')
+    return texto.strip()
+
+
+def minificar_js(texto):
+    """
+    Remove comentários, indentação e linhas vazias do JavaScript
+    
+    Conservador: preserva strings, template literals e expressões regulares, e
+    mantém as quebras de linha (a inserção automática de ponto e vírgula
+    continua funcionando).
+    
+    Args:
+        texto (str): JavaScript original
+    
+    Returns:
+        str: JavaScript minificado
+    """
+    saida = []
+    i = 0
+    anterior = ''  # último caractere significativo (decide se '/' inicia regex)
+    while i < len(texto):
+        c = texto[i]
+        
+        if c in '\'"`':
+            fim = i + 1
+            while fim < len(texto) and texto[fim] != c:
+                fim += 2 if texto[fim] == '\\' else 1
+            saida.append(texto[i:fim + 1])
+            anterior = c
+            i = fim + 1
+        
+        elif texto.startswith('//', i):
+            i = texto.find('\n', i)
+            i = len(texto) if i < 0 else i
+        
+        elif texto.startswith('/*', i):
+            fim = texto.find('*/', i + 2)
+            i = len(texto) if fim < 0 else fim + 2
+        
+        elif c == '/' and (not anterior or anterior in '(,=:[!&|?{};\n'):
+            fim, classe = i + 1, False
+            while fim < len(texto) and (texto[fim] != '/' or classe):
+                if texto[fim] == '\\':
+                    fim += 1
+                elif texto[fim] in '[]':
+                    classe = texto[fim] == '['
+                fim += 1
+            saida.append(texto[i:fim + 1])
+            anterior = '/'
+            i = fim + 1
+        
+        else:
+            saida.append(c)
+            if not c.isspace() or c == '\n':
+                anterior = c
+            i += 1
+    
+    linhas = (linha.strip() for linha in ''.join(saida).splitlines())
+    return '\n'.join(linha for linha in linhas if linha)
+
+
+MINIFICADORES = {'.css': minificar_css, '.js': minificar_js}
+
+
+# ==================== BUILD ====================
+
+def construir(destino=DIRETORIO_DIST):
+    """
+    Gera os assets versionados e o manifesto
+    
+    Para cada asset grava nome.<hash>.ext (minificado), .gz e, se o pacote
+    brotli estiver instalado, .br. Versões antigas são mantidas para páginas
+    já servidas que ainda as referenciam.
+    
+    Args:
+        destino (str): Diretório de saída
+    
+    Returns:
+        dict: Manifesto {caminho original: caminho versionado}
+    """
+    manifesto = {}
+    for caminho in ASSETS:
+        base, extensao = os.path.splitext(caminho)
+        with open(os.path.join(DIRETORIO_STATIC, caminho), encoding='utf-8') as arquivo:
+            original = arquivo.read()
+        
+        conteudo = MINIFICADORES[extensao](original).encode('utf-8')
+        versionado = f'{base}.{hashlib.sha256(conteudo).hexdigest()[:12]}{extensao}'
+        saida = os.path.join(destino, versionado)
+        os.makedirs(os.path.dirname(saida), exist_ok=True)
+        
+        with open(saida, 'wb') as arquivo:
+            arquivo.write(conteudo)
+        with open(saida + '.gz', 'wb') as arquivo:
+            arquivo.write(gzip.compress(conteudo, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(saida + '.br', 'wb') as arquivo:
+                arquivo.write(brotli.compress(conteudo, quality=11))
+        
+        manifesto[caminho] = versionado
+        print(f"✅ {caminho}: {len(original.encode('utf-8'))} -> {len(conteudo)} bytes ({versionado})")
+    
+    with open(os.path.join(destino, 'manifest.json'), 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, indent=2)
+    
+    if brotli is None:
+        print("⚠️ Pacote brotli não instalado: apenas variantes gzip geradas")
+    return manifesto
+
+
+# ==================== ENTREGA ====================
+
+class Manifesto:
+    """Manifesto do build, relido quando o arquivo muda (novo build sem reiniciar)"""
+    
+    def __init__(self, caminho=ARQUIVO_MANIFESTO):
+        """
+        Args:
+            caminho (str): Arquivo manifest.json
+        """
+        self.caminho = caminho
+        self.mtime = None
+        self.mapa = {}
+        self.lock = threading.Lock()
+    
+    def _atualizar(self):
+        """Recarrega o manifesto se o arquivo mudou"""
+        try:
+            mtime = os.stat(self.caminho).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self.mtime:
+            return
+        
+        with self.lock:
+            mapa = {}
+            if mtime is not None:
+                with open(self.caminho, encoding='utf-8') as arquivo:
+                    mapa = json.load(arquivo)
+            self.mapa, self.mtime = mapa, mtime
+    
+    def versionado(self, caminho):
+        """
+        Returns:
+            str: Caminho versionado em static/dist, ou None se não houver build
+        """
+        self._atualizar()
+        return self.mapa.get(caminho)
+
+
+_manifesto = Manifesto()
+
+
+def asset_url(caminho):
+    """
+    URL de um asset para os templates
+    
+    Usa a versão com hash quando o build existe; sem build, o arquivo original
+    em /static (desenvolvimento).
+    
+    Args:
+        caminho (str): Caminho relativo a static/ (ex.: 'css/styles.css')
+    
+    Returns:
+        str: URL do asset
+    """
+    versionado = _manifesto.versionado(caminho)
+    if versionado:
+        return url_for('asset', arquivo=versionado)
+    return url_for('static', filename=caminho)
+
+
+def servir(arquivo):
+    """
+    Resposta de um asset versionado, na melhor codificação aceita pelo cliente
+    
+    Versões de builds anteriores continuam disponíveis (páginas em cache).
+    
+    Args:
+        arquivo (str): Caminho versionado (relativo a static/dist)
+    
+    Returns:
+        Response: Arquivo com Cache-Control imutável e Vary: Accept-Encoding
+    """
+    if not PADRAO_VERSIONADO.search(arquivo):
+        abort(404)
+    
+    nome, codificacao = arquivo, None
+    for candidata, extensao in VARIANTES:
+        if request.accept_encodings[candidata] and os.path.exists(os.path.join(DIRETORIO_DIST, arquivo + extensao)):
+            nome, codificacao = arquivo + extensao, candidata
+            break
+    
+    resposta = send_from_directory(DIRETORIO_DIST, nome, mimetype=TIPOS[os.path.splitext(arquivo)[1]],
+                                   max_age=31536000, etag=True)
+    resposta.headers['Cache-Control'] = CACHE_IMUTAVEL
+    resposta.vary.add('Accept-Encoding')
+    if codificacao:
+        resposta.headers['Content-Encoding'] = codificacao
+    return resposta
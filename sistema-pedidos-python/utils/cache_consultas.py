@@ -0,0 +1,638 @@
+"""
+Módulo de cache das consultas dos models
+Finders marcados com @em_cache guardam as linhas lidas (chave: query e
+parâmetros) com etiquetas das tabelas e dos IDs de que dependem. Cada escrita
+feita por db.execute_query/execute_many invalida as etiquetas da tabela
+alterada: consultas por ID só quando o próprio registro muda, as demais a
+cada escrita na tabela. O cache fica em um arquivo SQLite compartilhado pelos
+processos da máquina (workers do server.py, worker.py, scripts), para que uma
+escrita em qualquer um deles invalide o cache de todos; o arquivo fica em um
+diretório privado do usuário do sistema e guarda as linhas em JSON. Linhas com
+colunas sensíveis (senha) nunca são guardadas. Se o armazenamento falhar, o
+cache é desativado no processo e as consultas vão direto ao banco. Com
+CACHE_CONSULTAS_LOCAL=1 ele fica na memória do processo (LRU limitado), o que
+só é seguro quando um único processo escreve no banco.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as horario, timedelta
+from decimal import Decimal
+from functools import wraps
+
+from utils.database import db
+from utils import metricas
+
+
+# Configurações (podem ser ajustadas no .env)
+ATIVO = os.getenv('CACHE_CONSULTAS', '1') != '0'
+VALIDADE = float(os.getenv('CACHE_CONSULTAS_TTL', '30'))
+MAX_ITENS = int(os.getenv('CACHE_CONSULTAS_MAX_ITENS', '5000'))
+MAX_LINHAS = int(os.getenv('CACHE_CONSULTAS_MAX_LINHAS', '1000'))
+
+# Colunas que nunca vão para o cache (o arquivo fica fora do banco)
+COLUNAS_SENSIVEIS = {'senha'}
+
+# Falhas do armazenamento que desativam o cache (nunca a operação no banco)
+ERROS_ARMAZENAMENTO = (sqlite3.Error, OSError)
+
+_TABELAS_LIDAS = re.compile(r'\b(?:FROM|JOIN)\s+`?(\w+)', re.I)
+_TABELA_ESCRITA = re.compile(
+    r'^\s*(?:(?:INSERT|REPLACE)\s+(?:IGNORE\s+)?INTO|UPDATE|DELETE\s+FROM)\s+`?(\w+)', re.I
+)
+_INSERCAO = re.compile(r'^\s*INSERT\b', re.I)
+_DUPLICADO = re.compile(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', re.I)
+_POR_ID = re.compile(r'\bWHERE\s+id\s*(?:=\s*%s|IN\s*\(\s*%s(?:\s*,\s*%s)*\s*\))', re.I)
+_OU = re.compile(r'\bOR\b', re.I)
+
+# Tabelas lidas por finders em cache (escritas nas demais não invalidam nada).
+# As dos models vêm fixas: processos que não importam os models (arquivar.py,
+# gerar_dados.py) também invalidam o cache compartilhado ao escrever nelas
+_tabelas_cacheaveis = {'users', 'products', 'orders', 'order_items', 'orders_arquivo', 'order_items_arquivo'}
+
+# Finder em execução na thread: tabelas que ele pode ler do cache
+_escopo = threading.local()
+
+
+def ids_da_condicao(query, params):
+    """
+    IDs de um filtro WHERE id = %s / WHERE id IN (%s, ...)
+    
+    Condições extras com AND só restringem o resultado; com OR não há como
+    saber quais linhas são afetadas.
+    
+    Args:
+        query (str): Comando SQL
+        params (tuple): Parâmetros do comando
+    
+    Returns:
+        list: IDs (int) ou None se o comando não filtra por ID
+    """
+    encontrado = _POR_ID.search(query)
+    if not encontrado or _OU.search(query, encontrado.start()):
+        return None
+    inicio = query.count('%s', 0, encontrado.start())
+    try:
+        return [int(valor) for valor in params[inicio:inicio + encontrado.group(0).count('%s')]]
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def etiquetas_leitura(query, params):
+    """
+    Etiquetas de uma consulta
+    
+    Returns:
+        tuple: (tabelas lidas, etiquetas, IDs consultados ou None)
+    """
+    tabelas = set(_TABELAS_LIDAS.findall(query))
+    ids = ids_da_condicao(query, params) if len(tabelas) == 1 else None
+    if ids is None:
+        return tabelas, sorted(tabelas), None
+    
+    # Consulta por ID: depende só dessas linhas
+    tabela = next(iter(tabelas))
+    return tabelas, [f'{tabela}:*'] + [f'{tabela}:{registro_id}' for registro_id in ids], ids
+
+
+def etiquetas_escrita(query, lista_params):
+    """
+    Etiquetas invalidadas por um comando de escrita
+    
+    Toda escrita invalida as consultas gerais da tabela. UPDATE/DELETE por ID
+    invalidam também as consultas desses IDs; sem filtro por ID (ou com ON
+    DUPLICATE KEY UPDATE), todas as consultas por ID da tabela. INSERT simples
+    só cria linhas novas, e consultas por ID sem resultado não ficam em cache.
+    
+    Args:
+        query (str): Comando SQL
+        lista_params (list): Parâmetros de cada execução
+    
+    Returns:
+        list: Etiquetas (vazia se a tabela não tem consultas em cache)
+    """
+    encontrada = _TABELA_ESCRITA.match(query)
+    if not encontrada or encontrada.group(1) not in _tabelas_cacheaveis:
+        return []
+    
+    tabela = encontrada.group(1)
+    etiquetas = [tabela]
+    if _INSERCAO.match(query) and not _DUPLICADO.search(query):
+        return etiquetas
+    
+    for params in lista_params:
+        ids = ids_da_condicao(query, params or ())
+        if ids is None:
+            return etiquetas + [f'{tabela}:*']
+        etiquetas.extend(f'{tabela}:{registro_id}' for registro_id in ids)
+    return etiquetas
+
+
+def _codificar(valor):
+    """Converte os tipos das colunas que o JSON não representa (json.dumps default)"""
+    if isinstance(valor, datetime):
+        return {'$tipo': 'datetime', 'valor': valor.isoformat()}
+    if isinstance(valor, date):
+        return {'$tipo': 'date', 'valor': valor.isoformat()}
+    if isinstance(valor, horario):
+        return {'$tipo': 'time', 'valor': valor.isoformat()}
+    if isinstance(valor, timedelta):
+        return {'$tipo': 'timedelta', 'valor': valor.total_seconds()}
+    if isinstance(valor, Decimal):
+        return {'$tipo': 'decimal', 'valor': str(valor)}
+    raise TypeError(f"Tipo não suportado no cache: {type(valor).__name__}")
+
+
+def _decodificar(objeto):
+    """Reconstrói os valores convertidos por _codificar (json.loads object_hook)"""
+    tipo = objeto.get('$tipo')
+    if tipo is None or len(objeto) != 2:
+        return objeto
+    valor = objeto['valor']
+    if tipo == 'datetime':
+        return datetime.fromisoformat(valor)
+    if tipo == 'date':
+        return date.fromisoformat(valor)
+    if tipo == 'time':
+        return horario.fromisoformat(valor)
+    if tipo == 'timedelta':
+        return timedelta(seconds=valor)
+    if tipo == 'decimal':
+        return Decimal(valor)
+    return objeto
+
+
+class CacheMemoria:
+    """Cache na memória do processo: LRU de consultas e horário da última invalidação por etiqueta"""
+    
+    def __init__(self, max_itens=MAX_ITENS, validade=VALIDADE):
+        """
+        Inicializa cache
+        
+        Args:
+            max_itens (int): Consultas guardadas antes de descartar as menos usadas
+            validade (float): Segundos de vida de cada consulta
+        """
+        self.max_itens = max_itens
+        self.validade = validade
+        self.itens = OrderedDict()
+        self.invalidacoes = {}
+        self.ultima_limpeza = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def agora(self):
+        """Relógio usado nos horários do cache"""
+        return time.monotonic()
+    
+    def obter(self, chave, etiquetas):
+        """
+        Retorna o valor guardado, se ainda válido
+        
+        Args:
+            chave (str): Chave da consulta
+            etiquetas (list): Etiquetas da consulta
+        
+        Returns:
+            Valor guardado ou None
+        """
+        with self.lock:
+            item = self.itens.get(chave)
+            if item is None:
+                return None
+            inicio, valor = item
+            if inicio + self.validade <= self.agora() or any(
+                    self.invalidacoes.get(etiqueta, -1) >= inicio for etiqueta in etiquetas):
+                del self.itens[chave]
+                return None
+            self.itens.move_to_end(chave)
+            return valor
+    
+    def guardar(self, chave, etiquetas, valor, inicio):
+        """
+        Guarda o resultado de uma consulta iniciada em `inicio`
+        
+        Não guarda se alguma etiqueta foi invalidada depois do início (a
+        consulta pode ter lido dados antigos).
+        
+        Returns:
+            int: Consultas descartadas para abrir espaço
+        """
+        with self.lock:
+            if any(self.invalidacoes.get(etiqueta, -1) >= inicio for etiqueta in etiquetas):
+                return 0
+            self.itens[chave] = (inicio, valor)
+            self.itens.move_to_end(chave)
+            descartadas = 0
+            while len(self.itens) > self.max_itens:
+                self.itens.popitem(last=False)
+                descartadas += 1
+            return descartadas
+    
+    def invalidar(self, etiquetas):
+        """Marca as etiquetas como alteradas agora"""
+        with self.lock:
+            agora = self.agora()
+            for etiqueta in etiquetas:
+                self.invalidacoes[etiqueta] = agora
+            
+            # Invalidações mais antigas que a validade não afetam mais nenhuma consulta
+            if agora - self.ultima_limpeza > self.validade:
+                self.ultima_limpeza = agora
+                self.invalidacoes = {etiqueta: momento for etiqueta, momento in self.invalidacoes.items()
+                                     if momento > agora - self.validade}
+    
+    def tamanho(self):
+        """Quantidade de consultas guardadas"""
+        return len(self.itens)
+    
+    def limpar(self):
+        """Esvazia o cache"""
+        with self.lock:
+            self.itens.clear()
+            self.invalidacoes.clear()
+
+
+class CacheSQLite:
+    """Cache compartilhado entre processos em um arquivo SQLite local"""
+    
+    def __init__(self, caminho, max_itens=MAX_ITENS, validade=VALIDADE):
+        """
+        Inicializa cache
+        
+        Args:
+            caminho (str): Caminho do arquivo SQLite
+            max_itens (int): Consultas guardadas antes de descartar as mais antigas
+            validade (float): Segundos de vida de cada consulta
+        
+        Raises:
+            PermissionError: Se o arquivo ou o diretório não forem privados
+            sqlite3.Error: Se o arquivo não puder ser aberto
+        """
+        self.caminho = caminho
+        self.max_itens = max_itens
+        self.validade = validade
+        self.local = threading.local()
+        self.gravacoes = 0
+        _preparar_arquivo(caminho)
+        conexao = self._conexao()
+        conexao.execute("""
+            CREATE TABLE IF NOT EXISTS consultas (
+                chave TEXT PRIMARY KEY,
+                inicio REAL NOT NULL,
+                valor TEXT NOT NULL
+            ) WITHOUT ROWID
+        """)
+        conexao.execute("CREATE INDEX IF NOT EXISTS idx_consultas_inicio ON consultas(inicio)")
+        conexao.execute("""
+            CREATE TABLE IF NOT EXISTS invalidacoes (
+                etiqueta TEXT PRIMARY KEY,
+                momento REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+    
+    def _conexao(self):
+        """Conexão SQLite própria de cada thread (e de cada processo)"""
+        conexao = getattr(self.local, 'conexao', None)
+        if conexao is None or getattr(self.local, 'pid', None) != os.getpid():
+            conexao = sqlite3.connect(self.caminho, timeout=1, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=OFF")
+            self.local.conexao = conexao
+            self.local.pid = os.getpid()
+        return conexao
+    
+    def agora(self):
+        """Relógio usado nos horários do cache (o mesmo em todos os processos)"""
+        return time.time()
+    
+    def _invalidada_desde(self, conexao, etiquetas, inicio):
+        """Se alguma etiqueta foi invalidada a partir de `inicio`"""
+        marcadores = ', '.join('?' * len(etiquetas))
+        return conexao.execute(
+            f"SELECT 1 FROM invalidacoes WHERE etiqueta IN ({marcadores}) AND momento >= ? LIMIT 1",
+            (*etiquetas, inicio)
+        ).fetchone() is not None
+    
+    def obter(self, chave, etiquetas):
+        """
+        Retorna o valor guardado, se ainda válido
+        
+        Args:
+            chave (str): Chave da consulta
+            etiquetas (list): Etiquetas da consulta
+        
+        Returns:
+            Valor guardado ou None
+        """
+        conexao = self._conexao()
+        linha = conexao.execute("SELECT inicio, valor FROM consultas WHERE chave = ? AND inicio > ?",
+                                (chave, self.agora() - self.validade)).fetchone()
+        if linha is None or self._invalidada_desde(conexao, etiquetas, linha[0]):
+            return None
+        return json.loads(linha[1], object_hook=_decodificar)
+    
+    def guardar(self, chave, etiquetas, valor, inicio):
+        """
+        Guarda o resultado de uma consulta iniciada em `inicio`
+        
+        Returns:
+            int: Consultas descartadas (vencidas ou as mais antigas acima do limite)
+        """
+        try:
+            texto = json.dumps(valor, default=_codificar)
+        except (TypeError, ValueError):
+            return 0
+        
+        conexao = self._conexao()
+        if self._invalidada_desde(conexao, etiquetas, inicio):
+            return 0
+        conexao.execute("INSERT OR REPLACE INTO consultas (chave, inicio, valor) VALUES (?, ?, ?)",
+                        (chave, inicio, texto))
+        
+        # Limpeza periódica em cada processo
+        self.gravacoes += 1
+        if self.gravacoes % 100:
+            return 0
+        limite = self.agora() - self.validade
+        descartadas = conexao.execute("DELETE FROM consultas WHERE inicio <= ?", (limite,)).rowcount
+        conexao.execute("DELETE FROM invalidacoes WHERE momento <= ?", (limite,))
+        excesso = conexao.execute("SELECT COUNT(*) FROM consultas").fetchone()[0] - self.max_itens
+        if excesso > 0:
+            descartadas += conexao.execute(
+                "DELETE FROM consultas WHERE chave IN (SELECT chave FROM consultas ORDER BY inicio LIMIT ?)",
+                (excesso,)
+            ).rowcount
+        return descartadas
+    
+    def invalidar(self, etiquetas):
+        """Marca as etiquetas como alteradas agora"""
+        self._conexao().executemany("""
+            INSERT INTO invalidacoes (etiqueta, momento) VALUES (?, ?)
+            ON CONFLICT (etiqueta) DO UPDATE SET momento = excluded.momento
+        """, [(etiqueta, self.agora()) for etiqueta in etiquetas])
+    
+    def tamanho(self):
+        """Quantidade de consultas guardadas"""
+        return self._conexao().execute("SELECT COUNT(*) FROM consultas").fetchone()[0]
+    
+    def limpar(self):
+        """Esvazia o cache"""
+        conexao = self._conexao()
+        conexao.execute("DELETE FROM consultas")
+        conexao.execute("DELETE FROM invalidacoes")
+
+
+class CacheConsultas:
+    """Liga o armazenamento às leituras e escritas do Database"""
+    
+    def __init__(self, armazenamento):
+        """
+        Args:
+            armazenamento: CacheMemoria ou CacheSQLite
+        """
+        self.armazenamento = armazenamento
+        self.contadores = {'acertos': 0, 'faltas': 0, 'gravacoes': 0, 'descartes': 0, 'invalidacoes': 0,
+                           'erros': 0}
+    
+    def _desativar(self, erro):
+        """
+        Desliga o cache neste processo após uma falha do armazenamento
+        
+        A operação no banco segue normalmente; um erro do cache nunca pode
+        fazer uma escrita já confirmada parecer ter falhado.
+        
+        Args:
+            erro (Exception): Falha do armazenamento
+        """
+        self.contadores['erros'] += 1
+        if db.cache is self:
+            db.cache = None
+            print(f"❌ Cache de consultas desativado após erro no armazenamento: {erro}")
+    
+    def ler(self, modo, query, params, executar):
+        """
+        Executa uma consulta de fetch_one/fetch_all, usando o cache se permitido
+        
+        Fora de um finder em cache, dentro de uma transação (que precisa ver as
+        próprias escritas) ou lendo tabelas não declaradas, vai direto ao banco.
+        
+        Args:
+            modo (str): 'um' (fetch_one) ou 'todos' (fetch_all)
+            query (str): Query SQL
+            params (tuple): Parâmetros
+            executar (callable): Executa a consulta no banco
+        
+        Returns:
+            Resultado da consulta
+        """
+        permitidas = getattr(_escopo, 'tabelas', None)
+        if not permitidas or db.transacao_atual() is not None:
+            return executar()
+        tabelas, etiquetas, ids = etiquetas_leitura(query, params or ())
+        if not tabelas or not tabelas <= permitidas:
+            return executar()
+        
+        chave = hashlib.sha256(f'{modo}\x1f{query}\x1f{params!r}'.encode('utf-8')).hexdigest()
+        try:
+            valor = self.armazenamento.obter(chave, etiquetas)
+        except ERROS_ARMAZENAMENTO as e:
+            self._desativar(e)
+            return executar()
+        if valor is not None:
+            self.contadores['acertos'] += 1
+            return _copiar(valor)
+        
+        self.contadores['faltas'] += 1
+        inicio = self.armazenamento.agora()
+        resultado = executar()
+        
+        # Estrutura de decisão: só guarda resultados completos, limitados e sem colunas sensíveis
+        if modo == 'um':
+            guardar = resultado is not None and not COLUNAS_SENSIVEIS & resultado.keys()
+        else:
+            guardar = (len(resultado) <= MAX_LINHAS and (ids is None or len(resultado) >= len(set(ids)))
+                       and not any(COLUNAS_SENSIVEIS & linha.keys() for linha in resultado))
+        if guardar:
+            try:
+                self.contadores['descartes'] += self.armazenamento.guardar(chave, etiquetas, _copiar(resultado), inicio)
+                self.contadores['gravacoes'] += 1
+            except ERROS_ARMAZENAMENTO as e:
+                self._desativar(e)
+        return resultado
+    
+    def invalidar(self, query, lista_params):
+        """
+        Invalida as consultas afetadas por um comando de escrita
+        
+        Args:
+            query (str): Comando SQL
+            lista_params (list): Parâmetros de cada execução
+        """
+        etiquetas = etiquetas_escrita(query, lista_params)
+        if etiquetas:
+            self.contadores['invalidacoes'] += 1
+            try:
+                self.armazenamento.invalidar(etiquetas)
+            except ERROS_ARMAZENAMENTO as e:
+                self._desativar(e)
+    
+    def estatisticas(self):
+        """
+        Resumo do uso do cache neste processo
+        
+        Returns:
+            dict: Contadores, taxa de acerto e consultas guardadas
+        """
+        leituras = self.contadores['acertos'] + self.contadores['faltas']
+        return {
+            **self.contadores,
+            'taxa_acerto': round(self.contadores['acertos'] / leituras, 4) if leituras else 0.0,
+            'itens': self.armazenamento.tamanho(),
+            'armazenamento': type(self.armazenamento).__name__,
+            'ativo': db.cache is self
+        }
+
+
+def _copiar(resultado):
+    """Cópia das linhas (quem recebe pode alterá-las sem afetar o cache)"""
+    if isinstance(resultado, dict):
+        return dict(resultado)
+    return [dict(linha) for linha in resultado]
+
+
+def em_cache(*tabelas):
+    """
+    Decorator para finders cujas consultas podem vir do cache
+    
+    Args:
+        *tabelas (str): Tabelas que o finder lê (consultas em outras vão ao banco)
+    """
+    _tabelas_cacheaveis.update(tabelas)
+    
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            anteriores = getattr(_escopo, 'tabelas', None)
+            _escopo.tabelas = set(tabelas)
+            try:
+                return f(*args, **kwargs)
+            finally:
+                _escopo.tabelas = anteriores
+        return decorated_function
+    return decorator
+
+
+def _verificar_privado(caminho, info, permissoes_proibidas):
+    """
+    Recusa arquivo ou diretório de outro usuário ou com permissões abertas demais
+    
+    Raises:
+        PermissionError: Se o dono não for o usuário do processo ou houver
+                         alguma das permissões proibidas
+    """
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"{caminho} pertence a outro usuário")
+    if info.st_mode & permissoes_proibidas:
+        raise PermissionError(f"{caminho} tem permissões {oct(stat.S_IMODE(info.st_mode))}")
+
+
+def _preparar_arquivo(caminho):
+    """
+    Cria o arquivo do cache com permissão 0600 (ou confere o existente)
+    
+    O diretório não pode ser gravável por outros usuários (senão poderiam
+    trocar o arquivo ou criar os arquivos -wal/-shm do SQLite) e o arquivo
+    precisa ser do usuário do processo, sem acesso de grupo ou de outros.
+    
+    Args:
+        caminho (str): Caminho do arquivo SQLite
+    
+    Raises:
+        PermissionError: Se o arquivo ou o diretório não forem privados
+    """
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    _verificar_privado(diretorio, os.stat(diretorio), stat.S_IWGRP | stat.S_IWOTH)
+    
+    descritor = os.open(caminho, os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+    try:
+        _verificar_privado(caminho, os.fstat(descritor), stat.S_IRWXG | stat.S_IRWXO)
+    finally:
+        os.close(descritor)
+
+
+def _arquivo_padrao():
+    """
+    Arquivo do cache compartilhado, um por banco de dados
+    
+    Fica em um diretório do usuário do processo (0700) dentro do diretório
+    temporário; um diretório com o mesmo nome criado por outro usuário é recusado.
+    
+    Raises:
+        PermissionError: Se o diretório existente não for privado
+    """
+    diretorio = os.path.join(tempfile.gettempdir(), f'sistema_pedidos_{os.getuid()}')
+    try:
+        os.mkdir(diretorio, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(diretorio)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"{diretorio} não é um diretório")
+    _verificar_privado(diretorio, info, stat.S_IRWXG | stat.S_IRWXO)
+    
+    if os.getenv('DB_DRIVER', 'mysql').lower() == 'sqlite':
+        banco = os.path.abspath(os.getenv('DB_ARQUIVO', 'sistema_pedidos.db'))
+    else:
+        banco = f"{os.getenv('DB_HOST', 'localhost')}/{os.getenv('DB_NAME', 'sistema_pedidos')}"
+    sufixo = hashlib.sha256(banco.encode()).hexdigest()[:12]
+    return os.path.join(diretorio, f'cache_consultas_{sufixo}.db')
+
+
+def criar_armazenamento():
+    """
+    Escolhe o armazenamento conforme CACHE_CONSULTAS_LOCAL e CACHE_CONSULTAS_ARQUIVO
+    
+    Returns:
+        CacheMemoria se CACHE_CONSULTAS_LOCAL=1, senão CacheSQLite (no arquivo
+        configurado ou no padrão do banco); None se o arquivo não puder ser aberto
+    """
+    if os.getenv('CACHE_CONSULTAS_LOCAL') == '1':
+        return CacheMemoria()
+    
+    caminho = os.getenv('CACHE_CONSULTAS_ARQUIVO')
+    try:
+        caminho = caminho or _arquivo_padrao()
+        return CacheSQLite(caminho)
+    except ERROS_ARMAZENAMENTO as e:
+        # Sem o arquivo compartilhado, um cache por processo serviria dados antigos
+        print(f"❌ Cache de consultas desativado; erro ao abrir {caminho or 'o arquivo do cache'}: {e}")
+        return None
+
+
+_armazenamento = criar_armazenamento() if ATIVO else None
+cache = CacheConsultas(_armazenamento or CacheMemoria())
+if _armazenamento is not None:
+    db.cache = cache
+
+metricas.registrar_coletor(lambda: [
+    (f'cache_consultas_{nome}_total', 'counter', f'Cache de consultas dos models: {nome}', valor)
+    for nome, valor in cache.contadores.items()
+])
+
+
+def estatisticas():
+    """Resumo do cache de consultas deste processo (ver CacheConsultas.estatisticas)"""
+    return cache.estatisticas()
+
+
+def limpar():
+    """Esvazia o cache de consultas"""
+    cache.armazenamento.limpar()
@@ -0,0 +1,229 @@
+"""
+Módulo do carrinho de compras
+O carrinho fica na sessão apenas como {id do produto: quantidade}; preços e
+estoque são lidos de uma vez (uma consulta WHERE id IN) a cada exibição e
+no fechamento do pedido, com valores em centavos
+"""
+
+from flask import session
+
+from models.order import Order, OrderItem
+from models.product import Product
+from utils.database import db
+from utils import mapa_identidade, rollups
+
+
+# Limites do carrinho
+MAX_LINHAS = 100
+MAX_QUANTIDADE = 99
+
+CHAVE_SESSAO = 'carrinho'
+
+
+class CarrinhoInvalido(ValueError):
+    """Carrinho vazio, acima dos limites ou com itens indisponíveis"""
+    pass
+
+
+def _itens():
+    """Itens da sessão: {'id do produto': quantidade} (chaves str, como no JSON)"""
+    return session.get(CHAVE_SESSAO, {})
+
+
+def _salvar(itens):
+    """Grava os itens na sessão (remove a chave quando vazio)"""
+    if itens:
+        session[CHAVE_SESSAO] = itens
+    else:
+        session.pop(CHAVE_SESSAO, None)
+
+
+def _quantidade_valida(quantidade, minimo):
+    """
+    Converte e valida uma quantidade
+    
+    Args:
+        quantidade: Valor recebido do formulário
+        minimo (int): Menor quantidade aceita (0 onde zero remove o produto)
+    
+    Raises:
+        CarrinhoInvalido: Se não for um inteiro entre minimo e MAX_QUANTIDADE
+    """
+    try:
+        quantidade = int(quantidade)
+    except (TypeError, ValueError):
+        raise CarrinhoInvalido('Quantidade inválida')
+    if not minimo <= quantidade <= MAX_QUANTIDADE:
+        raise CarrinhoInvalido(f'Quantidade deve estar entre {minimo} e {MAX_QUANTIDADE}')
+    return quantidade
+
+
+def adicionar(product_id, quantidade=1):
+    """
+    Soma uma quantidade de um produto ao carrinho
+    
+    Args:
+        product_id (int): ID do produto
+        quantidade (int): Quantidade a somar
+    
+    Raises:
+        CarrinhoInvalido: Se a quantidade ou o número de linhas passar do limite
+    """
+    quantidade = _quantidade_valida(quantidade, minimo=1)
+    itens = dict(_itens())
+    chave = str(int(product_id))
+    
+    if chave not in itens and len(itens) >= MAX_LINHAS:
+        raise CarrinhoInvalido(f'O carrinho aceita no máximo {MAX_LINHAS} produtos diferentes')
+    
+    itens[chave] = _quantidade_valida(itens.get(chave, 0) + quantidade, minimo=1)
+    _salvar(itens)
+
+
+def alterar(quantidades):
+    """
+    Define as quantidades de vários produtos (0 remove)
+    
+    Args:
+        quantidades (dict): {product_id: quantidade}
+    
+    Raises:
+        CarrinhoInvalido: Se alguma quantidade for inválida
+    """
+    itens = dict(_itens())
+    for product_id, quantidade in quantidades.items():
+        chave = str(int(product_id))
+        if chave in itens:
+            itens[chave] = _quantidade_valida(quantidade, minimo=0)
+    _salvar({chave: valor for chave, valor in itens.items() if valor})
+
+
+def remover(product_id):
+    """
+    Remove um produto do carrinho
+    
+    Args:
+        product_id (int): ID do produto
+    """
+    itens = dict(_itens())
+    itens.pop(str(int(product_id)), None)
+    _salvar(itens)
+
+
+def limpar():
+    """Esvazia o carrinho"""
+    _salvar({})
+
+
+def quantidade_itens():
+    """
+    Total de unidades no carrinho, sem consultar o banco (contador da navbar)
+    
+    Returns:
+        int: Soma das quantidades
+    """
+    return sum(_itens().values())
+
+
+def resumo():
+    """
+    Monta o carrinho com preços e estoque atuais
+    
+    Uma única consulta para todos os produtos. Produtos que deixaram de
+    existir saem do carrinho; inativos ou sem estoque suficiente ficam
+    marcados e impedem o fechamento.
+    
+    Returns:
+        dict: linhas (produto, quantidade, preco_unitario, subtotal, problema),
+              total e quantidade em centavos/unidades, e se pode ser fechado
+    """
+    itens = _itens()
+    produtos = Product.buscar_por_ids([int(chave) for chave in itens]) if itens else {}
+    
+    linhas = []
+    for chave, quantidade in itens.items():
+        produto = produtos.get(int(chave))
+        if produto is None:
+            continue
+        
+        # Estrutura de decisão: o que impede a compra desta linha
+        if not produto.ativo:
+            problema = 'Produto indisponível'
+        elif produto.estoque < quantidade:
+            problema = f'Apenas {produto.estoque} em estoque'
+        else:
+            problema = None
+        
+        linhas.append({
+            'produto': produto,
+            'quantidade': quantidade,
+            'preco_unitario': produto.preco,
+            'subtotal': produto.preco * quantidade,
+            'problema': problema
+        })
+    
+    # Remove da sessão os produtos que não existem mais
+    if len(linhas) != len(itens):
+        _salvar({str(linha['produto'].id): linha['quantidade'] for linha in linhas})
+    
+    return {
+        'linhas': linhas,
+        'total': sum(linha['subtotal'] for linha in linhas),
+        'quantidade': sum(linha['quantidade'] for linha in linhas),
+        'pode_finalizar': bool(linhas) and not any(linha['problema'] for linha in linhas)
+    }
+
+
+def finalizar(user_id, endereco_entrega, observacoes=None):
+    """
+    Transforma o carrinho em pedido
+    
+    Em uma única transação: relê preços, baixa o estoque com UPDATEs
+    condicionais (falham se outro pedido levou as unidades), grava pedido,
+    itens e rollups. Qualquer falha desfaz tudo e mantém o carrinho.
+    
+    Args:
+        user_id (int): ID do cliente
+        endereco_entrega (str): Endereço de entrega
+        observacoes (str): Observações do pedido
+    
+    Returns:
+        Order: Pedido criado
+    
+    Raises:
+        CarrinhoInvalido: Se o carrinho estiver vazio ou algum item indisponível
+    """
+    if not endereco_entrega or not endereco_entrega.strip():
+        raise CarrinhoInvalido('Endereço de entrega é obrigatório')
+    
+    with db.transaction():
+        atual = resumo()
+        if not atual['linhas']:
+            raise CarrinhoInvalido('Carrinho vazio')
+        if not atual['pode_finalizar']:
+            raise CarrinhoInvalido('Alguns itens do carrinho estão indisponíveis')
+        
+        linhas = atual['linhas']
+        baixados = db.execute_many(
+            "UPDATE products SET estoque = estoque - %s WHERE id = %s AND ativo = TRUE AND estoque >= %s",
+            [(linha['quantidade'], linha['produto'].id, linha['quantidade']) for linha in linhas]
+        )
+        if baixados != len(linhas):
+            raise CarrinhoInvalido('O estoque de algum item acabou de mudar. Confira o carrinho')
+        mapa_identidade.descartar('products', [linha['produto'].id for linha in linhas])
+        
+        pedido = Order(user_id=user_id, valor_total=atual['total'],
+                       endereco_entrega=endereco_entrega.strip(), observacoes=observacoes or None)
+        pedido.salvar()
+        
+        pedido.items = [
+            OrderItem(order_id=pedido.id, product_id=linha['produto'].id, quantidade=linha['quantidade'],
+                      preco_unitario=linha['preco_unitario'], subtotal=linha['subtotal'])
+            for linha in linhas
+        ]
+        OrderItem.salvar_varios(pedido.items)
+        rollups.registrar_itens([(linha['produto'].categoria, linha['quantidade'], linha['subtotal'])
+                                 for linha in linhas])
+    
+    limpar()
+    return pedido
@@ -0,0 +1,170 @@
+"""
+Módulo de compressão das respostas dinâmicas (HTML e JSON)
+Negocia Accept-Encoding, ignora corpos pequenos e comprime respostas em
+streaming bloco a bloco, sem acumular o corpo inteiro em memória
+"""
+
+import os
+import zlib
+
+from flask import current_app, request
+
+from utils import metricas
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Configurações (podem ser ajustadas no .env)
+NIVEL_PADRAO = int(os.getenv('COMPRESSAO_NIVEL', '6'))
+TAMANHO_MINIMO = int(os.getenv('COMPRESSAO_MINIMO', '1024'))
+
+TIPOS_COMPRIMIVEIS = {
+    'text/html', 'text/plain', 'text/css', 'text/javascript', 'text/csv',
+    'application/json', 'application/javascript', 'image/svg+xml',
+}
+
+# Nível gzip (1-9) -> qualidade brotli (0-11) aproximada
+QUALIDADE_BROTLI = {1: 1, 2: 2, 3: 3, 4: 4, 5: 5, 6: 5, 7: 6, 8: 7, 9: 9}
+
+
+def nivel(valor):
+    """
+    Decorator que define o nível de compressão de uma rota
+    
+    Args:
+        valor (int): 1 (mais rápido) a 9 (menor resposta); 0 desativa a compressão
+    """
+    def decorator(f):
+        f.nivel_compressao = valor
+        return f
+    return decorator
+
+
+def _nivel_da_rota():
+    """Nível configurado na view da requisição atual (ou o padrão)"""
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(view, 'nivel_compressao', NIVEL_PADRAO)
+
+
+def _escolher_codificacao():
+    """
+    Returns:
+        str: 'br', 'gzip' ou None conforme o Accept-Encoding do cliente
+    """
+    aceitas = request.accept_encodings
+    if brotli is not None and aceitas['br']:
+        return 'br'
+    if aceitas['gzip']:
+        return 'gzip'
+    return None
+
+
+class Compressor:
+    """Compressor incremental com a mesma interface para gzip e brotli"""
+    
+    def __init__(self, codificacao, nivel_compressao):
+        """
+        Args:
+            codificacao (str): 'gzip' ou 'br'
+            nivel_compressao (int): Nível de 1 a 9
+        """
+        self.brotli = codificacao == 'br'
+        if self.brotli:
+            self.objeto = brotli.Compressor(quality=QUALIDADE_BROTLI.get(nivel_compressao, 5))
+        else:
+            self.objeto = zlib.compressobj(nivel_compressao, zlib.DEFLATED, 31)  # 31 = cabeçalho gzip
+    
+    def bloco(self, dados):
+        """Comprime um bloco e descarrega a saída (o cliente recebe sem esperar o fim)"""
+        if self.brotli:
+            return self.objeto.process(dados) + self.objeto.flush()
+        return self.objeto.compress(dados) + self.objeto.flush(zlib.Z_SYNC_FLUSH)
+    
+    def tudo(self, dados):
+        """Comprime um corpo completo"""
+        if self.brotli:
+            return self.objeto.process(dados) + self.objeto.finish()
+        return self.objeto.compress(dados) + self.objeto.flush()
+    
+    def finalizar(self):
+        """Encerra o fluxo comprimido"""
+        return self.objeto.finish() if self.brotli else self.objeto.flush()
+
+
+def _comprimir_fluxo(iteravel, compressor):
+    """
+    Gera o corpo comprimido bloco a bloco
+    
+    Args:
+        iteravel: Corpo original (gerador ou iterável de bytes/str)
+        compressor (Compressor): Compressor da resposta
+    """
+    try:
+        for bloco in iteravel:
+            if isinstance(bloco, str):
+                bloco = bloco.encode('utf-8')
+            if not bloco:
+                continue
+            saida = compressor.bloco(bloco)
+            metricas.compressao_bytes_total.inc('original', valor=len(bloco))
+            metricas.compressao_bytes_total.inc('comprimido', valor=len(saida))
+            yield saida
+        saida = compressor.finalizar()
+        metricas.compressao_bytes_total.inc('comprimido', valor=len(saida))
+        yield saida
+    finally:
+        if hasattr(iteravel, 'close'):
+            iteravel.close()
+
+
+def comprimir_resposta(response):
+    """
+    Comprime a resposta quando o tipo, o tamanho e o cliente permitem (after_request)
+    
+    Respostas já codificadas, arquivos (send_file), event-stream, corpos menores
+    que COMPRESSAO_MINIMO e rotas com nível 0 passam sem alteração.
+    
+    Args:
+        response (Response): Resposta da view
+    
+    Returns:
+        Response: A mesma resposta, comprimida ou não
+    """
+    if (response.mimetype not in TIPOS_COMPRIMIVEIS or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'no-transform' in response.headers.get('Cache-Control', '')):
+        return response
+    
+    # O corpo depende do Accept-Encoding mesmo quando não é comprimido
+    response.vary.add('Accept-Encoding')
+    
+    nivel_compressao = _nivel_da_rota()
+    codificacao = _escolher_codificacao()
+    if not nivel_compressao or codificacao is None or request.method == 'HEAD':
+        return response
+    
+    compressor = Compressor(codificacao, nivel_compressao)
+    
+    if response.is_streamed:
+        response.response = _comprimir_fluxo(response.response, compressor)
+        response.headers.pop('Content-Length', None)
+    else:
+        dados = response.get_data()
+        if len(dados) < TAMANHO_MINIMO:
+            return response
+        comprimido = compressor.tudo(dados)
+        response.set_data(comprimido)
+        metricas.compressao_bytes_total.inc('original', valor=len(dados))
+        metricas.compressao_bytes_total.inc('comprimido', valor=len(comprimido))
+    
+    response.headers['Content-Encoding'] = codificacao
+    
+    # O ETag forte identifica bytes exatos; a versão comprimida é outra representação
+    etag, fraco = response.get_etag()
+    if etag and not fraco:
+        response.set_etag(etag, weak=True)
+    return response
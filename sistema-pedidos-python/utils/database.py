@@ -1,67 +1,528 @@
 """
-Módulo de conexão com banco de dados MySQL
+Módulo de conexão com banco de dados (MySQL ou SQLite, conforme DB_DRIVER)
 """
 
-import mysql.connector
-from mysql.connector import Error
 import os
+import random
+import threading
+import time
+import weakref
+from contextlib import ContextDecorator
+
+from utils import metricas
+from utils.drivers import criar_driver
+
+
+# Configurações de resiliência (podem ser ajustadas no .env)
+INTERVALO_PING = float(os.getenv('DB_INTERVALO_PING', '30'))
+TENTATIVAS_LEITURA = int(os.getenv('DB_TENTATIVAS_LEITURA', '3'))
+BACKOFF_BASE = float(os.getenv('DB_BACKOFF_BASE', '0.5'))
+BACKOFF_MAXIMO = float(os.getenv('DB_BACKOFF_MAXIMO', '30'))
+TEMPO_CONEXAO = int(os.getenv('DB_TEMPO_CONEXAO', '5'))
+
+
+class DatabaseError(Exception):
+    """Falha ao acessar o banco (diferente de "registro não encontrado")"""
+    
+    def __init__(self, mensagem, errno=None):
+        """
+        Args:
+            mensagem (str): Descrição do erro
+            errno (int): Código de erro do MySQL (ou equivalente no SQLite), se houver
+        """
+        super().__init__(mensagem)
+        self.errno = errno
+
+
+class EstadoTransacao:
+    """Transação em andamento na thread: conexão, nível de aninhamento e ganchos"""
+    
+    def __init__(self, conexao):
+        """
+        Args:
+            conexao: Conexão que executa a transação
+        """
+        self.conexao = conexao
+        self.nivel = 1
+        self.savepoints = []  # Níveis que abriram SAVEPOINT
+        self.ganchos = []  # Tuplas (nivel, funcao) executadas após o commit
+        self.perdida = False
+        self.somente_desfazer = False
+
+
+class Transacao(ContextDecorator):
+    """Unidade de trabalho: agrupa as escritas em um único commit
+    
+    Dentro de uma transação os métodos do Database não fazem commit; uma
+    transação aninhada vira SAVEPOINT e uma exceção no bloco desfaz apenas esse
+    nível. Com savepoint=False o bloco aninhado apenas se junta à transação
+    externa (sem custo extra); uma exceção nele marca a transação externa para
+    ser desfeita. Pode ser usada como decorator.
+    """
+    
+    def __init__(self, database, savepoint=True):
+        """
+        Args:
+            database (Database): Gerenciador de conexão
+            savepoint (bool): Se aninhada, cria SAVEPOINT (True) ou junta-se à externa
+        """
+        self.db = database
+        self.savepoint = savepoint
+    
+    def __enter__(self):
+        estado = self.db.transacao_atual()
+        
+        if estado is None:
+            conexao = self.db.obter_conexao()
+            try:
+                conexao.start_transaction()
+            except self.db.driver.Erro as e:
+                self.db._descartar()
+                raise DatabaseError(f"Erro ao iniciar transação: {e}", self.db.driver.codigo(e)) from e
+            self.db.local.transacao = EstadoTransacao(conexao)
+        else:
+            if self.savepoint:
+                self.db._comando(estado, f"SAVEPOINT sp{estado.nivel + 1}")
+                estado.savepoints.append(estado.nivel + 1)
+            estado.nivel += 1
+        return self.db
+    
+    def __exit__(self, tipo, valor, tb):
+        estado = self.db.transacao_atual()
+        nivel = estado.nivel
+        
+        # Transação aninhada sem savepoint: erro invalida a transação externa
+        if nivel > 1 and estado.savepoints[-1:] != [nivel]:
+            estado.nivel -= 1
+            if tipo is not None:
+                estado.somente_desfazer = True
+            return False
+        
+        # Transação aninhada: libera ou desfaz o savepoint
+        if nivel > 1:
+            estado.nivel -= 1
+            estado.savepoints.pop()
+            if tipo is None:
+                self.db._comando(estado, f"RELEASE SAVEPOINT sp{nivel}")
+                estado.ganchos = [(min(n, nivel - 1), funcao) for n, funcao in estado.ganchos]
+            else:
+                estado.ganchos = [(n, funcao) for n, funcao in estado.ganchos if n < nivel]
+                if not estado.perdida:
+                    try:
+                        self.db._comando(estado, f"ROLLBACK TO SAVEPOINT sp{nivel}")
+                    except DatabaseError:
+                        pass
+            return False
+        
+        self.db.local.transacao = None
+        
+        if tipo is None and not estado.perdida and not estado.somente_desfazer:
+            try:
+                estado.conexao.commit()
+            except self.db.driver.Erro as e:
+                metricas.transacoes_total.inc('erro')
+                self.db._descartar()
+                raise DatabaseError(f"Erro ao confirmar transação: {e}", self.db.driver.codigo(e)) from e
+            
+            metricas.transacoes_total.inc('confirmada')
+            for _, funcao in estado.ganchos:
+                try:
+                    funcao()
+                except Exception as e:
+                    print(f"❌ Erro em ação pós-commit: {e}")
+            return False
+        
+        metricas.transacoes_total.inc('desfeita')
+        if not estado.perdida:
+            try:
+                estado.conexao.rollback()
+            except self.db.driver.Erro:
+                self.db._descartar()
+        
+        # Erro ignorado dentro do bloco: nada foi gravado e o chamador precisa saber
+        if tipo is None and estado.perdida:
+            raise DatabaseError("Conexão perdida durante a transação; nenhuma alteração foi gravada")
+        if tipo is None:
+            raise DatabaseError("Transação desfeita: uma operação interna falhou; nenhuma alteração foi gravada")
+        return False
+
+
+class _DonoConexao:
+    """Marcador guardado no threading.local junto com a conexão: é destruído quando a thread termina"""
 
 
 class Database:
-    """Classe para gerenciar conexão com banco de dados MySQL"""
+    """Classe para gerenciar conexão com banco de dados
     
-    def __init__(self):
-        """Inicializa conexão com banco de dados"""
-        self.connection = None
-        self.connect()
+    Cada thread de cada processo usa a sua própria conexão, aberta no primeiro uso
+    e fechada quando a thread termina (servidor de desenvolvimento: uma thread por
+    requisição).
+    Conexões perdidas são reabertas com backoff exponencial e leituras são
+    repetidas automaticamente. O driver (MySQL ou SQLite) vem de DB_DRIVER.
+    """
+    
+    def __init__(self, driver=None):
+        """
+        Inicializa o gerenciador; a conexão só é aberta no primeiro uso
+        
+        Args:
+            driver: DriverMySQL ou DriverSQLite (padrão: conforme DB_DRIVER)
+        """
+        self.driver = driver or criar_driver(TEMPO_CONEXAO)
+        self.local = threading.local()
+        self.abertas = []
+        self.lock = threading.RLock()
+        self.falhas_conexao = 0
+        self.proxima_tentativa = 0
+        self.consultas_capturadas = None
+        self.cache = None
+    
+    @property
+    def connection(self):
+        """Conexão da thread atual (None se ainda não conectada)"""
+        return getattr(self.local, 'connection', None)
+    
+    @connection.setter
+    def connection(self, conexao):
+        self.local.connection = conexao
+    
+    @property
+    def pid(self):
+        """Processo que abriu a conexão da thread atual"""
+        return getattr(self.local, 'pid', None)
+    
+    @pid.setter
+    def pid(self, pid):
+        self.local.pid = pid
+    
+    def iniciar_captura(self):
+        """Passa a registrar as queries executadas (usado pelo index advisor)"""
+        self.consultas_capturadas = []
+    
+    def parar_captura(self):
+        """
+        Para de registrar queries
+        
+        Returns:
+            list: Tuplas (query, params) capturadas
+        """
+        capturadas, self.consultas_capturadas = self.consultas_capturadas or [], None
+        return capturadas
+    
+    def _registrar(self, query, params):
+        """Registra a query se a captura estiver ativa"""
+        if self.consultas_capturadas is not None:
+            self.consultas_capturadas.append((query, params or ()))
+    
+    def _invalidar(self, query, lista_params):
+        """
+        Invalida o cache de consultas após uma escrita
+        
+        Dentro de uma transação invalida de novo após o commit: outra thread
+        pode ter lido (e guardado) os dados antigos enquanto ela estava aberta.
+        Falhas do cache não chegam aqui: ele se desativa e a escrita segue.
+        """
+        cache = self.cache
+        if cache is None:
+            return
+        cache.invalidar(query, lista_params)
+        if self.transacao_atual() is not None:
+            self.ao_confirmar(lambda: cache.invalidar(query, lista_params))
     
     def connect(self):
-        """Estabelece conexão com o banco de dados"""
+        """
+        Estabelece conexão com o banco de dados para a thread atual
+        
+        Após uma falha, novas tentativas só acontecem depois de um intervalo
+        que dobra a cada falha (até DB_BACKOFF_MAXIMO); antes disso a chamada
+        falha imediatamente, sem esperar o timeout de conexão.
+        
+        Returns:
+            Conexão aberta (em autocommit)
+        
+        Raises:
+            DatabaseError: Se não for possível conectar
+        """
+        if time.monotonic() < self.proxima_tentativa:
+            raise DatabaseError("Banco de dados indisponível; aguardando nova tentativa de conexão")
+        
+        nome = self.driver.nome
         try:
-            self.connection = mysql.connector.connect(
-                host=os.getenv('DB_HOST', 'localhost'),
-                user=os.getenv('DB_USER', 'root'),
-                password=os.getenv('DB_PASSWORD', ''),
-                database=os.getenv('DB_NAME', 'sistema_pedidos')
-            )
-            
-            if self.connection.is_connected():
-                print("✅ Conexão com MySQL estabelecida com sucesso")
+            conexao = self.driver.conectar()
+        
+        except self.driver.Erro as e:
+            with self.lock:
+                self.falhas_conexao += 1
+                atraso = min(BACKOFF_BASE * 2 ** (self.falhas_conexao - 1), BACKOFF_MAXIMO)
+                self.proxima_tentativa = time.monotonic() + random.uniform(atraso / 2, atraso)
+            metricas.consultas_erros.inc('conexao')
+            print(f"❌ Erro ao conectar ao {nome}: {e}")
+            raise DatabaseError(f"Erro ao conectar ao {nome}: {e}", self.driver.codigo(e)) from e
+        
+        with self.lock:
+            self.falhas_conexao = 0
+            self.proxima_tentativa = 0
+            self.abertas.append(conexao)
+        
+        self.connection = conexao
+        self.pid = os.getpid()
+        self.local.ultimo_uso = time.monotonic()
+        
+        # Fecha a conexão quando a thread terminar (o threading.local é liberado com ela)
+        self.local.dono = _DonoConexao()
+        finalizador = weakref.finalize(self.local.dono, self._fechar_abandonada, conexao, os.getpid())
+        finalizador.atexit = False
+        metricas.conexoes_abertas_total.inc()
+        print(f"✅ Conexão com {nome} estabelecida com sucesso")
+        return conexao
+    
+    def obter_conexao(self):
+        """
+        Retorna a conexão da thread atual, conectando sob demanda
+        
+        Um processo filho (fork) nunca reutiliza o socket herdado do pai. Uma
+        conexão ociosa há mais de DB_INTERVALO_PING segundos é testada com ping
+        antes do uso (no máximo um ping por intervalo).
+        
+        Returns:
+            Conexão aberta
+        
+        Raises:
+            DatabaseError: Se não for possível conectar
+        """
+        conexao = self.connection
+        if conexao is None or self.pid != os.getpid():
+            return self.connect()
+        
+        agora = time.monotonic()
+        if agora - self.local.ultimo_uso > INTERVALO_PING:
+            try:
+                conexao.ping(reconnect=False)
+            except self.driver.Erro:
+                metricas.consultas_erros.inc('reconexao')
+                self._descartar()
+                return self.connect()
         
-        except Error as e:
-            print(f"❌ Erro ao conectar ao MySQL: {e}")
-            self.connection = None
+        self.local.ultimo_uso = agora
+        return conexao
+    
+    def _fechar_abandonada(self, conexao, pid):
+        """
+        Fecha a conexão de uma thread que terminou (chamado pelo finalizador)
+        
+        Conexões já fechadas, herdadas de outro processo ou já esquecidas
+        (close, fechar_todas) são ignoradas.
+        """
+        if pid != os.getpid():
+            return
+        with self.lock:
+            if conexao not in self.abertas:
+                return
+            self.abertas.remove(conexao)
+        
+        try:
+            conexao.close()
+        except self.driver.Erro:
+            pass
+        metricas.conexoes_fechadas_total.inc()
+    
+    def _descartar(self):
+        """Fecha (sem propagar erros) e esquece a conexão da thread atual"""
+        conexao = self.connection
+        self.connection = None
+        self.pid = None
+        
+        with self.lock:
+            if conexao in self.abertas:
+                self.abertas.remove(conexao)
+        
+        try:
+            if conexao:
+                conexao.close()
+        except self.driver.Erro:
+            pass
+    
+    def transaction(self, savepoint=True):
+        """
+        Abre uma unidade de trabalho (context manager ou decorator)
+        
+        Exemplo:
+            with db.transaction():
+                pedido.salvar()
+                item.salvar()
+        
+        Args:
+            savepoint (bool): Se aninhada, cria SAVEPOINT (True) ou junta-se à externa
+        
+        Returns:
+            Transacao: Contexto da transação
+        """
+        return Transacao(self, savepoint)
+    
+    def transacao_atual(self):
+        """
+        Returns:
+            EstadoTransacao: Transação em andamento na thread, ou None
+        """
+        return getattr(self.local, 'transacao', None)
+    
+    def ao_confirmar(self, funcao):
+        """
+        Agenda uma ação para depois do commit da transação atual
+        
+        Fora de transação a ação é executada imediatamente; se a transação (ou
+        o savepoint em que foi agendada) for desfeita, a ação é descartada.
+        
+        Args:
+            funcao (callable): Ação sem argumentos
+        """
+        estado = self.transacao_atual()
+        if estado is None:
+            funcao()
+        else:
+            estado.ganchos.append((estado.nivel, funcao))
+    
+    def _comando(self, estado, comando):
+        """Executa um comando de controle (SAVEPOINT...) na conexão da transação"""
+        try:
+            cursor = estado.conexao.cursor()
+            cursor.execute(comando)
+            cursor.close()
+        except self.driver.Erro as e:
+            if self.driver.conexao_perdida(e):
+                estado.perdida = True
+                self._descartar()
+            raise DatabaseError(f"Erro ao executar {comando}: {e}", self.driver.codigo(e)) from e
+    
+    def descartar_apos_fork(self):
+        """Esquece as conexões herdadas no processo filho sem fechá-las (os sockets são do pai)"""
+        self.local = threading.local()
+        self.abertas = []
+        self.lock = threading.RLock()
+    
+    def _executar(self, operacao, query, mensagem, idempotente=False, dicionario=False):
+        """
+        Executa uma operação com cursor, tratando erros e reconexão
+        
+        Leituras (idempotentes) são repetidas até DB_TENTATIVAS_LEITURA vezes
+        quando a conexão cai; escritas nunca são repetidas, pois não é possível
+        saber se o servidor chegou a aplicá-las. Dentro de uma transação nada é
+        repetido: reconectar perderia o que já foi executado nela.
+        
+        Args:
+            operacao (callable): Recebe (conexao, cursor) e retorna o resultado
+            query (str): Query principal (para métricas; None não mede)
+            mensagem (str): Prefixo da mensagem de erro
+            idempotente (bool): Pode ser repetida com segurança
+            dicionario (bool): Cursor que retorna dicionários
+        
+        Returns:
+            Resultado de operacao
+        
+        Raises:
+            DatabaseError: Se a operação falhar
+        """
+        transacao = self.transacao_atual()
+        if transacao is not None and transacao.perdida:
+            raise DatabaseError("Conexão perdida durante a transação")
+        
+        tentativas = TENTATIVAS_LEITURA if idempotente and transacao is None else 1
+        inicio = time.perf_counter()
+        
+        try:
+            for tentativa in range(1, tentativas + 1):
+                cursor = None
+                try:
+                    conexao = transacao.conexao if transacao else self.obter_conexao()
+                    cursor = conexao.cursor(dictionary=dicionario)
+                    return operacao(conexao, cursor)
+                
+                except self.driver.Erro as e:
+                    # Estrutura de decisão: conexão perdida é descartada (e invalida a transação)
+                    perdida = self.driver.conexao_perdida(e)
+                    if perdida:
+                        cursor = None
+                        if transacao is not None:
+                            transacao.perdida = True
+                        self._descartar()
+                    
+                    if perdida and tentativa < tentativas:
+                        metricas.consultas_erros.inc('reconexao')
+                        continue
+                    
+                    metricas.consultas_erros.inc('consulta')
+                    print(f"❌ {mensagem}: {e}")
+                    raise DatabaseError(f"{mensagem}: {e}", self.driver.codigo(e)) from e
+                
+                finally:
+                    if cursor:
+                        try:
+                            cursor.close()
+                        except self.driver.Erro:
+                            pass
+        
+        finally:
+            if query:
+                metricas.observar_consulta(query, inicio)
     
     def execute_query(self, query, params=None):
         """
         Executa query de modificação (INSERT, UPDATE, DELETE)
         
+        Fora de uma transação o comando é confirmado imediatamente (autocommit);
+        dentro de db.transaction() só no commit da transação.
+        
         Args:
             query (str): Query SQL
             params (tuple): Parâmetros da query
         
         Returns:
             int: ID do último registro inserido ou número de linhas afetadas
+        
+        Raises:
+            DatabaseError: Se a query falhar
         """
-        cursor = None
-        try:
-            cursor = self.connection.cursor()
+        self._registrar(query, params)
+        
+        def operacao(conexao, cursor):
             cursor.execute(query, params or ())
-            self.connection.commit()
             
             # Retorna ID do último insert ou número de linhas afetadas
             if cursor.lastrowid:
                 return cursor.lastrowid
             return cursor.rowcount
         
-        except Error as e:
-            print(f"❌ Erro ao executar query: {e}")
-            self.connection.rollback()
-            raise e
+        resultado = self._executar(operacao, query, "Erro ao executar query")
+        self._invalidar(query, [params])
+        return resultado
+    
+    def execute_many(self, query, params_list):
+        """
+        Executa a mesma query de modificação para vários conjuntos de parâmetros
         
-        finally:
-            if cursor:
-                cursor.close()
+        Args:
+            query (str): Query SQL
+            params_list (list): Lista de tuplas de parâmetros
+        
+        Returns:
+            int: Número de linhas afetadas
+        
+        Raises:
+            DatabaseError: Se a query falhar
+        """
+        def operacao(conexao, cursor):
+            cursor.executemany(query, params_list)
+            return cursor.rowcount
+        
+        # Tudo ou nada quando o driver executa um comando por conjunto
+        # (INSERTs já viram um único comando multi-linha)
+        if self.transacao_atual() is not None:
+            resultado = self._executar(operacao, query, "Erro ao executar query em lote")
+        else:
+            with self.transaction():
+                resultado = self._executar(operacao, query, "Erro ao executar query em lote")
+        self._invalidar(query, params_list)
+        return resultado
     
     def fetch_one(self, query, params=None):
         """
@@ -72,22 +533,23 @@ class Database:
             params (tuple): Parâmetros da query
         
         Returns:
-            dict: Registro encontrado ou None
+            dict: Registro encontrado ou None (não encontrado)
+        
+        Raises:
+            DatabaseError: Se a consulta falhar
         """
-        cursor = None
-        try:
-            cursor = self.connection.cursor(dictionary=True)
+        self._registrar(query, params)
+        
+        def operacao(conexao, cursor):
             cursor.execute(query, params or ())
-            result = cursor.fetchone()
-            return result
+            return cursor.fetchone()
         
-        except Error as e:
-            print(f"❌ Erro ao buscar registro: {e}")
-            return None
+        def executar():
+            return self._executar(operacao, query, "Erro ao buscar registro", idempotente=True, dicionario=True)
         
-        finally:
-            if cursor:
-                cursor.close()
+        if self.cache is not None:
+            return self.cache.ler('um', query, params, executar)
+        return executar()
     
     def fetch_all(self, query, params=None):
         """
@@ -98,29 +560,60 @@ class Database:
             params (tuple): Parâmetros da query
         
         Returns:
-            list: Lista de registros encontrados
+            list: Lista de registros encontrados (vazia se nenhum)
+        
+        Raises:
+            DatabaseError: Se a consulta falhar
         """
-        cursor = None
-        try:
-            cursor = self.connection.cursor(dictionary=True)
+        self._registrar(query, params)
+        
+        def operacao(conexao, cursor):
             cursor.execute(query, params or ())
-            results = cursor.fetchall()
-            return results
+            return cursor.fetchall()
         
-        except Error as e:
-            print(f"❌ Erro ao buscar registros: {e}")
-            return []
+        def executar():
+            return self._executar(operacao, query, "Erro ao buscar registros", idempotente=True, dicionario=True)
         
-        finally:
-            if cursor:
-                cursor.close()
+        if self.cache is not None:
+            return self.cache.ler('todos', query, params, executar)
+        return executar()
     
     def close(self):
-        """Fecha conexão com o banco de dados"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-            print("✅ Conexão com MySQL fechada")
+        """Fecha a conexão da thread atual com o banco de dados"""
+        conexao = self.connection
+        if conexao and self.pid == os.getpid() and conexao.is_connected():
+            conexao.close()
+            print(f"✅ Conexão com {self.driver.nome} fechada")
+        with self.lock:
+            if conexao in self.abertas:
+                self.abertas.remove(conexao)
+        self.connection = None
+        self.pid = None
+    
+    def fechar_todas(self):
+        """Fecha as conexões abertas por todas as threads deste processo (encerramento)"""
+        with self.lock:
+            abertas, self.abertas = self.abertas, []
+        
+        for conexao in abertas:
+            try:
+                conexao.close()
+            except self.driver.Erro:
+                pass
+        self.local = threading.local()
 
 
-# Instância global do banco de dados
+# Instância global do banco de dados (conecta no primeiro uso, em cada thread e processo)
 db = Database()
+
+metricas.registrar_coletor(lambda: [
+    ('db_conexoes_ativas', 'gauge', 'Conexões com o banco abertas neste processo', len(db.abertas))
+])
+
+# Processos filhos criados por fork abrem a própria conexão
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=db.descartar_apos_fork)
+
+# Todo processo que escreve no banco invalida o cache de consultas compartilhado,
+# inclusive os que não usam os models (arquivar.py, gerar_dados.py)
+from utils import cache_consultas  # noqa: E402,F401 - define db.cache
@@ -0,0 +1,263 @@
+"""
+Módulo de verificação de disponibilidade de email e CPF no cadastro
+Filtros de Bloom em memória com os emails e CPFs já cadastrados: uma resposta
+"não cadastrado" do filtro é definitiva e dispensa o banco; só os possíveis
+duplicados (cadastrados ou falsos positivos) são confirmados com uma consulta
+"""
+
+import hashlib
+import math
+import os
+import threading
+import time
+
+from utils import metricas
+from utils.database import db, DatabaseError
+from utils.validations import formatar_cpf
+
+
+# Configurações (podem ser ajustadas no .env)
+CAPACIDADE = int(os.getenv('DISPONIBILIDADE_CAPACIDADE', '100000'))
+TAXA_FALSO_POSITIVO = float(os.getenv('DISPONIBILIDADE_TAXA_ERRO', '0.01'))
+INTERVALO_ATUALIZACAO = float(os.getenv('DISPONIBILIDADE_ATUALIZACAO', '5'))
+TAMANHO_LOTE = 10000
+
+
+class FiltroBloom:
+    """Conjunto probabilístico: sem falsos negativos, com falsos positivos limitados"""
+    
+    def __init__(self, capacidade, taxa_erro):
+        """
+        Dimensiona o filtro
+        
+        Args:
+            capacidade (int): Quantidade de itens esperada
+            taxa_erro (float): Taxa de falsos positivos com o filtro cheio
+        """
+        self.capacidade = max(capacidade, 1)
+        self.bits = max(int(-self.capacidade * math.log(taxa_erro) / math.log(2) ** 2), 8)
+        self.funcoes = max(round(self.bits / self.capacidade * math.log(2)), 1)
+        self.vetor = bytearray((self.bits + 7) // 8)
+        self.itens = 0
+        self.lock = threading.Lock()
+    
+    def _posicoes(self, item):
+        """Posições dos bits do item (hash duplo sobre um único blake2b)"""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.funcoes)]
+    
+    def adicionar(self, item):
+        """
+        Adiciona um item
+        
+        Args:
+            item (str): Valor normalizado
+        """
+        posicoes = self._posicoes(item)
+        with self.lock:
+            for posicao in posicoes:
+                self.vetor[posicao >> 3] |= 1 << (posicao & 7)
+            self.itens += 1
+    
+    def __contains__(self, item):
+        return all(self.vetor[posicao >> 3] & (1 << (posicao & 7)) for posicao in self._posicoes(item))
+    
+    def cheio(self):
+        """
+        Returns:
+            bool: True se já recebeu mais itens do que a capacidade dimensionada
+        """
+        return self.itens > self.capacidade
+
+
+def normalizar_email(email):
+    """Email como o banco o compara (collation sem distinção de maiúsculas)"""
+    return (email or '').strip().lower()
+
+
+def normalizar_cpf(cpf):
+    """CPF no formato gravado (000.000.000-00)"""
+    return formatar_cpf((cpf or '').strip())
+
+
+class IndiceDisponibilidade:
+    """Filtros de email e CPF do processo, carregados do banco e mantidos em dia
+    
+    A carga completa roda em segundo plano no primeiro uso de cada processo
+    (até terminar, as verificações vão ao banco). Depois disso, no máximo uma
+    vez a cada DISPONIBILIDADE_ATUALIZACAO segundos, os usuários com id maior
+    que o último visto são acrescentados (cadastros feitos por outros processos).
+    """
+    
+    def __init__(self):
+        """Inicializa o índice vazio (nada é lido até o primeiro uso)"""
+        self.lock = threading.Lock()
+        self._reiniciar()
+    
+    def _reiniciar(self):
+        """Descarta os filtros (novo processo ou recarga)"""
+        self.pid = os.getpid()
+        self.emails = None
+        self.cpfs = None
+        self.ultimo_id = 0
+        self.atualizado_em = 0
+        self.carregando = False
+    
+    def _carregar(self):
+        """Lê todos os emails e CPFs em lotes por id e publica os novos filtros"""
+        try:
+            total = db.fetch_one("SELECT COUNT(*) AS total FROM users")['total']
+            capacidade = max(CAPACIDADE, total * 2)
+            emails = FiltroBloom(capacidade, TAXA_FALSO_POSITIVO)
+            cpfs = FiltroBloom(capacidade, TAXA_FALSO_POSITIVO)
+            
+            ultimo_id = self._acrescentar(emails, cpfs, 0)
+            inicio = time.monotonic()
+            with self.lock:
+                self.emails, self.cpfs = emails, cpfs
+                self.ultimo_id = ultimo_id
+                self.atualizado_em = inicio
+            print(f"✅ Filtro de disponibilidade carregado ({emails.itens} usuários)")
+        
+        except Exception as e:
+            print(f"❌ Erro ao carregar filtro de disponibilidade: {e}")
+        
+        finally:
+            self.carregando = False
+    
+    def _acrescentar(self, emails, cpfs, ultimo_id):
+        """
+        Adiciona aos filtros os usuários com id maior que ultimo_id
+        
+        Returns:
+            int: Maior id lido
+        """
+        while True:
+            linhas = db.fetch_all(
+                "SELECT id, email, cpf FROM users WHERE id > %s ORDER BY id LIMIT %s",
+                (ultimo_id, TAMANHO_LOTE)
+            )
+            for linha in linhas:
+                emails.adicionar(normalizar_email(linha['email']))
+                cpfs.adicionar(normalizar_cpf(linha['cpf']))
+            if linhas:
+                ultimo_id = linhas[-1]['id']
+            if len(linhas) < TAMANHO_LOTE:
+                return ultimo_id
+    
+    def _iniciar_carga(self):
+        """Dispara a carga completa em segundo plano (uma por vez)"""
+        with self.lock:
+            if self.carregando:
+                return
+            self.carregando = True
+        threading.Thread(target=self._carregar, daemon=True, name='disponibilidade').start()
+    
+    def filtros(self):
+        """
+        Filtros prontos para consulta, atualizados com os cadastros recentes
+        
+        Returns:
+            tuple: (emails, cpfs) ou None enquanto a carga não terminou
+        """
+        if self.pid != os.getpid():
+            self._reiniciar()
+        
+        if self.emails is None:
+            self._iniciar_carga()
+            return None
+        
+        # Filtro com mais itens que o dimensionado: recarrega maior em segundo plano
+        if self.emails.cheio() or self.cpfs.cheio():
+            self._iniciar_carga()
+        
+        agora = time.monotonic()
+        if agora - self.atualizado_em > INTERVALO_ATUALIZACAO and self.lock.acquire(blocking=False):
+            try:
+                self.ultimo_id = self._acrescentar(self.emails, self.cpfs, self.ultimo_id)
+                self.atualizado_em = agora
+            except DatabaseError:
+                return None
+            finally:
+                self.lock.release()
+        
+        return self.emails, self.cpfs
+    
+    def registrar(self, email, cpf):
+        """
+        Adiciona um cadastro confirmado neste processo
+        
+        Args:
+            email (str): Email cadastrado
+            cpf (str): CPF cadastrado
+        """
+        if self.emails is not None and self.pid == os.getpid():
+            self.emails.adicionar(normalizar_email(email))
+            self.cpfs.adicionar(normalizar_cpf(cpf))
+
+
+_indice = IndiceDisponibilidade()
+
+
+def campos_em_uso(email=None, cpf=None):
+    """
+    Verifica quais dos valores informados já estão cadastrados
+    
+    O banco só é consultado para os valores que o filtro não descarta, em uma
+    única consulta para email e CPF.
+    
+    Args:
+        email (str): Email a verificar (None para ignorar)
+        cpf (str): CPF a verificar (None para ignorar)
+    
+    Returns:
+        set: Campos já cadastrados ('email', 'cpf')
+    
+    Raises:
+        DatabaseError: Se a confirmação no banco falhar
+    """
+    valores = {}
+    if email:
+        valores['email'] = normalizar_email(email)
+    if cpf:
+        valores['cpf'] = normalizar_cpf(cpf)
+    
+    # Estrutura de decisão: descarta pelo filtro o que certamente está livre
+    filtros = _indice.filtros()
+    if filtros is not None:
+        emails, cpfs = filtros
+        if 'email' in valores and valores['email'] not in emails:
+            del valores['email']
+            metricas.disponibilidade_total.inc('filtro')
+        if 'cpf' in valores and valores['cpf'] not in cpfs:
+            del valores['cpf']
+            metricas.disponibilidade_total.inc('filtro')
+    
+    if not valores:
+        return set()
+    
+    metricas.disponibilidade_total.inc('banco', valor=len(valores))
+    condicoes = ' OR '.join(f'{campo} = %s' for campo in valores)
+    linhas = db.fetch_all(f"SELECT email, cpf FROM users WHERE {condicoes} LIMIT 2",
+                          tuple(valores.values()))
+    
+    em_uso = set()
+    for linha in linhas:
+        if 'email' in valores and normalizar_email(linha['email']) == valores['email']:
+            em_uso.add('email')
+        if 'cpf' in valores and linha['cpf'] == valores['cpf']:
+            em_uso.add('cpf')
+    return em_uso
+
+
+def registrar(email, cpf):
+    """
+    Inclui um cadastro recém-confirmado nos filtros deste processo
+    
+    Args:
+        email (str): Email cadastrado
+        cpf (str): CPF cadastrado
+    """
+    _indice.registrar(email, cpf)
@@ -0,0 +1,346 @@
+"""
+Módulo de drivers de banco de dados
+MySQL (mysql.connector) e SQLite embutido em modo WAL, com a mesma interface de
+conexão e cursor usada pelo Database. O driver SQLite traduz placeholders e o
+dialeto MySQL usado pelos models, migrações e schema.sql
+"""
+
+import datetime
+import os
+import re
+import sqlite3
+from functools import lru_cache
+
+try:
+    import mysql.connector
+    from mysql.connector import Error as ErroMySQL, InterfaceError
+except ImportError:
+    mysql = None
+
+
+# Códigos MySQL de conexão perdida (servidor reiniciado, timeout de inatividade...)
+ERROS_CONEXAO_PERDIDA = {1053, 2006, 2013, 2055, 4031}
+
+# Códigos MySQL equivalentes usados para os erros do SQLite
+ERRO_DUPLICADO = 1062
+ERRO_LOCK_ESPERA = 1205
+
+
+class DriverMySQL:
+    """Servidor MySQL (padrão)"""
+    
+    nome = 'MySQL'
+    
+    def __init__(self, tempo_conexao):
+        """
+        Args:
+            tempo_conexao (int): Timeout de conexão em segundos
+        
+        Raises:
+            RuntimeError: Se o mysql-connector-python não estiver instalado
+        """
+        if mysql is None:
+            raise RuntimeError("DB_DRIVER=mysql requer o pacote mysql-connector-python")
+        self.Erro = ErroMySQL
+        self.tempo_conexao = tempo_conexao
+    
+    def conectar(self):
+        """
+        Returns:
+            MySQLConnection: Conexão em autocommit
+        """
+        return mysql.connector.connect(
+            host=os.getenv('DB_HOST', 'localhost'),
+            user=os.getenv('DB_USER', 'root'),
+            password=os.getenv('DB_PASSWORD', ''),
+            database=os.getenv('DB_NAME', 'sistema_pedidos'),
+            connection_timeout=self.tempo_conexao,
+            autocommit=True,
+            allow_local_infile=os.getenv('DB_LOCAL_INFILE') == '1'  # carga em massa (gerar_dados.py)
+        )
+    
+    def conexao_perdida(self, erro):
+        """
+        Verifica se o erro indica que a conexão caiu
+        
+        Args:
+            erro (Error): Erro do mysql.connector
+        
+        Returns:
+            bool: True se a conexão deve ser descartada e reaberta
+        """
+        return erro.errno in ERROS_CONEXAO_PERDIDA or (isinstance(erro, InterfaceError) and not erro.errno)
+    
+    def codigo(self, erro):
+        """
+        Returns:
+            int: Código de erro do MySQL
+        """
+        return erro.errno
+
+
+class DriverSQLite:
+    """Arquivo SQLite local em modo WAL (implantações de um nó e testes de desempenho)"""
+    
+    nome = 'SQLite'
+    Erro = sqlite3.Error
+    
+    def __init__(self, caminho, tempo_espera):
+        """
+        Args:
+            caminho (str): Arquivo do banco
+            tempo_espera (int): Segundos de espera por um lock de escrita
+        """
+        self.caminho = caminho
+        self.tempo_espera = tempo_espera
+    
+    def conectar(self):
+        """
+        Returns:
+            ConexaoSQLite: Conexão em autocommit
+        """
+        conexao = sqlite3.connect(self.caminho, timeout=self.tempo_espera, isolation_level=None,
+                                  detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA synchronous=NORMAL")
+        conexao.execute("PRAGMA foreign_keys=ON")
+        
+        # Locks nomeados (migrações): o lock de escrita do SQLite já serializa os processos
+        conexao.create_function('GET_LOCK', 2, lambda nome, espera: 1)
+        conexao.create_function('RELEASE_LOCK', 1, lambda nome: 1)
+        return ConexaoSQLite(conexao)
+    
+    def conexao_perdida(self, erro):
+        """Arquivo local: não há conexão para perder"""
+        return False
+    
+    def codigo(self, erro):
+        """
+        Converte o erro para o código MySQL equivalente (chave duplicada, lock)
+        
+        Returns:
+            int: Código equivalente ou None
+        """
+        mensagem = str(erro)
+        if isinstance(erro, sqlite3.IntegrityError) and 'UNIQUE constraint failed' in mensagem:
+            return ERRO_DUPLICADO
+        if 'database is locked' in mensagem:
+            return ERRO_LOCK_ESPERA
+        return None
+
+
+class ConexaoSQLite:
+    """Conexão sqlite3 com a interface de conexão do mysql.connector usada pelo Database"""
+    
+    def __init__(self, conexao):
+        """
+        Args:
+            conexao (sqlite3.Connection): Conexão em autocommit (isolation_level=None)
+        """
+        self.conexao = conexao
+        self.aberta = True
+    
+    def cursor(self, dictionary=False):
+        return CursorSQLite(self.conexao.cursor(), dictionary)
+    
+    def start_transaction(self):
+        # IMMEDIATE: reserva o lock de escrita no início e evita falhar no meio da transação
+        self.conexao.execute("BEGIN IMMEDIATE")
+    
+    def commit(self):
+        self.conexao.commit()
+    
+    def rollback(self):
+        self.conexao.rollback()
+    
+    def ping(self, reconnect=False):
+        pass
+    
+    def is_connected(self):
+        return self.aberta
+    
+    def close(self):
+        self.aberta = False
+        self.conexao.close()
+
+
+class CursorSQLite:
+    """Cursor que traduz as queries e devolve dicionários quando solicitado"""
+    
+    def __init__(self, cursor, dicionario):
+        """
+        Args:
+            cursor (sqlite3.Cursor): Cursor original
+            dicionario (bool): Retornar registros como dicionários
+        """
+        self.cursor = cursor
+        self.insercao = False
+        if dicionario:
+            cursor.row_factory = _registro_dicionario
+    
+    @property
+    def lastrowid(self):
+        # O sqlite3 mantém o último id inserido na conexão mesmo após UPDATE/DELETE;
+        # o mysql.connector retorna 0 nesses casos
+        return self.cursor.lastrowid if self.insercao else 0
+    
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+    
+    def execute(self, query, params=()):
+        for comando in traduzir(query):
+            self.cursor.execute(comando, params)
+            self.insercao = _INSERCAO.match(comando) is not None
+    
+    def executemany(self, query, params_list):
+        comando, = traduzir(query)
+        self.cursor.executemany(comando, params_list)
+    
+    def fetchone(self):
+        return self.cursor.fetchone()
+    
+    def fetchall(self):
+        return self.cursor.fetchall()
+    
+    def close(self):
+        self.cursor.close()
+
+
+def _registro_dicionario(cursor, linha):
+    """row_factory equivalente ao cursor dictionary=True do mysql.connector"""
+    return {coluna[0]: valor for coluna, valor in zip(cursor.description, linha)}
+
+
+# ==================== TRADUÇÃO DO DIALETO MYSQL ====================
+
+# Mesmo relógio do MySQL (horário local do servidor)
+AGORA = "datetime('now', 'localtime')"
+AGORA_MS = "strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')"
+
+_TRADUCOES = [
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\bINSERT\s+IGNORE\b', re.I), 'INSERT OR IGNORE'),
+    (re.compile(r'\bNOW\(\)\s*([+-])\s*INTERVAL\s+(\?|\d+)\s+(SECOND|MINUTE|HOUR|DAY)\b', re.I),
+     r"datetime('now', 'localtime', '\1' || \2 || ' \3')"),
+    (re.compile(r'\bNOW\(\)', re.I), AGORA),
+    (re.compile(r'\bCURDATE\(\)', re.I), "date('now', 'localtime')"),
+    (re.compile(r'\bCURRENT_TIMESTAMP\(3\)', re.I), f'({AGORA_MS})'),
+    (re.compile(r'\bCURRENT_TIMESTAMP\b(?!\()', re.I), f'({AGORA})'),
+    (re.compile(r'\bTIMESTAMPDIFF\(\s*MICROSECOND\s*,\s*([\w.]+)\s*,\s*([\w.]+)\s*\)', re.I),
+     r'((julianday(\2) - julianday(\1)) * 86400000000)'),
+]
+
+# UPDATE ... ORDER BY ... LIMIT (sem suporte no SQLite padrão) vira subconsulta por id
+_UPDATE_LIMITADO = re.compile(
+    r'^\s*UPDATE\s+(\w+)\s+SET\s+(.*?)\s+WHERE\s+(.*?)\s+(ORDER\s+BY\s+.*?\s+LIMIT\s+\S+)\s*$', re.I | re.S
+)
+_INSERCAO = re.compile(r'\s*(INSERT|REPLACE)\b', re.I)
+_DUPLICADO = re.compile(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', re.I)
+_VALORES_COLUNA = re.compile(r'\bVALUES\((\w+)\)', re.I)
+
+
+@lru_cache(maxsize=1024)
+def traduzir(query):
+    """
+    Traduz uma query MySQL para o SQLite
+    
+    Args:
+        query (str): Query com placeholders %s
+    
+    Returns:
+        tuple: Comandos SQLite (CREATE TABLE pode gerar também triggers)
+    """
+    if re.match(r'\s*(CREATE\s+DATABASE|USE)\b', query, re.I):
+        return ()
+    if re.match(r'\s*CREATE\s+TABLE\b', query, re.I):
+        return traduzir_tabela(query)
+    
+    for padrao, substituto in _TRADUCOES:
+        query = padrao.sub(substituto, query)
+    
+    # Upsert: ON DUPLICATE KEY UPDATE col = VALUES(col) -> ON CONFLICT DO UPDATE SET col = excluded.col
+    duplicado = _DUPLICADO.search(query)
+    if duplicado:
+        atualizacao = _VALORES_COLUNA.sub(r'excluded.\1', query[duplicado.end():])
+        query = query[:duplicado.start()] + 'ON CONFLICT DO UPDATE SET' + atualizacao
+    
+    limitado = _UPDATE_LIMITADO.match(query)
+    if limitado:
+        tabela, atribuicoes, condicao, ordem = limitado.groups()
+        query = (f"UPDATE {tabela} SET {atribuicoes} WHERE id IN "
+                 f"(SELECT id FROM {tabela} WHERE {condicao} {ordem})")
+    
+    return (query,)
+
+
+def traduzir_tabela(query):
+    """
+    Traduz um CREATE TABLE do schema.sql/migrações
+    
+    ENUM vira TEXT com CHECK, AUTO_INCREMENT vira INTEGER PRIMARY KEY AUTOINCREMENT,
+    COMMENT é removido e ON UPDATE CURRENT_TIMESTAMP vira um trigger.
+    
+    Args:
+        query (str): Comando CREATE TABLE do MySQL
+    
+    Returns:
+        tuple: CREATE TABLE e os triggers necessários
+    """
+    tabela = re.search(r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', query, re.I).group(1)
+    
+    atualizadas = re.findall(r'(\w+)\s+TIMESTAMP\b[^,\n]*\bON\s+UPDATE\s+CURRENT_TIMESTAMP', query, re.I)
+    query = re.sub(r'\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b', '', query, flags=re.I)
+    query = re.sub(r'\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b', 'INTEGER PRIMARY KEY AUTOINCREMENT', query, flags=re.I)
+    query = re.sub(r'(\w+)\s+ENUM\(([^)]*)\)', r'\1 TEXT CHECK (\1 IN (\2))', query, flags=re.I)
+    query = re.sub(r"\s+COMMENT\s+'[^']*'", '', query, flags=re.I)
+    query = re.sub(r'\bCURRENT_TIMESTAMP\(3\)', f'({AGORA_MS})', query, flags=re.I)
+    query = re.sub(r'\bCURRENT_TIMESTAMP\b', f'({AGORA})', query, flags=re.I)
+    query = re.sub(r'\bTIMESTAMP\(3\)', 'TIMESTAMP', query, flags=re.I)
+    
+    comandos = [query]
+    for coluna in atualizadas:
+        comandos.append(f"""
+            CREATE TRIGGER IF NOT EXISTS {tabela}_{coluna}_ao_atualizar AFTER UPDATE ON {tabela}
+            FOR EACH ROW WHEN NEW.{coluna} IS OLD.{coluna}
+            BEGIN
+                UPDATE {tabela} SET {coluna} = {AGORA} WHERE id = NEW.id;
+            END
+        """)
+    return tuple(comandos)
+
+
+# Conversões de datas iguais às do mysql.connector (datetime/date)
+def _converter_timestamp(valor):
+    return datetime.datetime.fromisoformat(valor.decode())
+
+
+def _converter_data(valor):
+    return datetime.date.fromisoformat(valor.decode()[:10])
+
+
+sqlite3.register_converter('TIMESTAMP', _converter_timestamp)
+sqlite3.register_converter('DATE', _converter_data)
+sqlite3.register_adapter(datetime.datetime, lambda valor: valor.isoformat(' '))
+sqlite3.register_adapter(datetime.date, lambda valor: valor.isoformat())
+
+
+def criar_driver(tempo_conexao):
+    """
+    Escolhe o driver conforme DB_DRIVER
+    
+    Args:
+        tempo_conexao (int): Timeout de conexão/espera em segundos
+    
+    Returns:
+        DriverMySQL ou DriverSQLite
+    
+    Raises:
+        ValueError: Se DB_DRIVER for desconhecido
+    """
+    nome = os.getenv('DB_DRIVER', 'mysql').lower()
+    if nome == 'mysql':
+        return DriverMySQL(tempo_conexao)
+    if nome == 'sqlite':
+        return DriverSQLite(os.getenv('DB_ARQUIVO', 'sistema_pedidos.db'), tempo_conexao)
+    raise ValueError(f"DB_DRIVER desconhecido: {nome} (use mysql ou sqlite)")
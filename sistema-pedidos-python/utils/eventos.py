@@ -0,0 +1,333 @@
+"""
+Módulo de eventos ao vivo do painel administrativo (Server-Sent Events)
+Os models gravam cada evento na tabela eventos, na mesma transação da
+alteração. Em cada processo, uma thread lê os eventos novos (de qualquer
+processo) e os distribui para as filas dos navegadores conectados em
+/admin/eventos
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+from utils.database import db, DatabaseError
+from utils import metricas
+
+
+# Configurações (podem ser ajustadas no .env)
+MAX_ASSINANTES = int(os.getenv('EVENTOS_MAX_ASSINANTES', '50'))
+INTERVALO_HEARTBEAT = float(os.getenv('EVENTOS_HEARTBEAT', '15'))
+INTERVALO_CONSULTA = float(os.getenv('EVENTOS_INTERVALO', '1'))
+RETENCAO = int(os.getenv('EVENTOS_RETENCAO', '3600'))
+TAMANHO_FILA = 256  # eventos pendentes por assinante antes de desconectá-lo
+TAMANHO_LOTE = 500  # eventos lidos por consulta
+
+# Um ID que falta entre eventos já lidos é de uma transação ainda não
+# confirmada (ou desfeita); após esse tempo (s) a lacuna é ignorada
+ESPERA_LACUNA = 5
+
+# Intervalo (s) entre as remoções de eventos mais antigos que RETENCAO
+INTERVALO_LIMPEZA = 60
+
+# Tempo de espera do navegador antes de reconectar (ms)
+RETRY_MS = 3000
+
+# Sentinela que encerra o stream de um assinante (lento ou processo encerrando)
+_DESCONECTAR = object()
+
+
+class LimiteAssinantes(Exception):
+    """Número máximo de conexões de eventos atingido"""
+    pass
+
+
+class Publicador:
+    """Lê os eventos da tabela e os distribui para todos os assinantes do processo"""
+    
+    def __init__(self):
+        """Inicializa o publicador sem assinantes (a leitura começa com o primeiro)"""
+        self.lock = threading.Lock()
+        self.assinantes = set()
+        self.limite = MAX_ASSINANTES
+        self.thread = None
+        self.cursor = 0
+        self.entregues = set()
+        self.lacunas = {}
+        self.ultima_limpeza = 0
+        self.encerrando = threading.Event()
+    
+    def assinar(self):
+        """
+        Registra um novo assinante e inicia a leitura da tabela, se parada
+        
+        Returns:
+            queue.Queue: Fila de eventos do assinante
+        
+        Raises:
+            LimiteAssinantes: Se o limite de conexões do processo foi atingido
+        """
+        fila = queue.Queue(maxsize=TAMANHO_FILA)
+        with self.lock:
+            # Processo encerrando: o stream termina logo e o navegador reconecta
+            if self.encerrando.is_set():
+                fila.put_nowait(_DESCONECTAR)
+                return fila
+            if len(self.assinantes) >= self.limite:
+                raise LimiteAssinantes()
+            self.assinantes.add(fila)
+            
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._acompanhar, name='eventos', daemon=True)
+                self.thread.start()
+        return fila
+    
+    def encerrar(self):
+        """
+        Encerra os streams abertos e os que forem abertos depois
+        
+        Usado quando o processo vai terminar: os navegadores reconectam (a
+        outro worker) após RETRY_MS e recebem pela tabela o que perderam.
+        """
+        self.encerrando.set()
+        with self.lock:
+            for fila in self.assinantes:
+                with fila.mutex:
+                    fila.queue.clear()
+                fila.put_nowait(_DESCONECTAR)
+            self.assinantes.clear()
+    
+    def cancelar(self, fila):
+        """
+        Remove um assinante
+        
+        Args:
+            fila (queue.Queue): Fila retornada por assinar
+        """
+        with self.lock:
+            self.assinantes.discard(fila)
+    
+    def distribuir(self, evento):
+        """
+        Envia um evento a todos os assinantes sem bloquear
+        
+        Assinantes com a fila cheia (conexão lenta ou parada) são desconectados
+        e recuperam os eventos pela tabela ao reconectar.
+        
+        Args:
+            evento (tuple): (id, tipo, dados em JSON)
+        """
+        with self.lock:
+            lentos = []
+            for fila in self.assinantes:
+                try:
+                    fila.put_nowait(evento)
+                except queue.Full:
+                    lentos.append(fila)
+            
+            for fila in lentos:
+                self.assinantes.discard(fila)
+                with fila.mutex:
+                    fila.queue.clear()
+                fila.put_nowait(_DESCONECTAR)
+    
+    def _acompanhar(self):
+        """Laço da thread de leitura: termina quando não há mais assinantes"""
+        iniciado = False
+        while True:
+            with self.lock:
+                if not self.assinantes:
+                    self.thread = None
+                    return
+            
+            try:
+                if not iniciado:
+                    # Só os eventos gravados a partir de agora (reconexões leem a tabela)
+                    linha = db.fetch_one("SELECT MAX(id) AS ultimo FROM eventos")
+                    self.cursor = (linha or {}).get('ultimo') or 0
+                    self.entregues.clear()
+                    self.lacunas.clear()
+                    iniciado = True
+                self._ler_novos()
+                self._limpar_antigos()
+                espera = INTERVALO_CONSULTA
+            except DatabaseError as e:
+                print(f"❌ Erro ao ler eventos: {e}")
+                espera = max(INTERVALO_CONSULTA, ESPERA_LACUNA)
+            time.sleep(espera)
+    
+    def _ler_novos(self):
+        """Distribui os eventos ainda não entregues e avança o cursor"""
+        linhas = db.fetch_all(
+            "SELECT id, tipo, dados FROM eventos WHERE id > %s ORDER BY id LIMIT %s",
+            (self.cursor, TAMANHO_LOTE)
+        )
+        for linha in linhas:
+            if linha['id'] not in self.entregues:
+                self.entregues.add(linha['id'])
+                self.distribuir((linha['id'], linha['tipo'], linha['dados']))
+        
+        # IDs são gerados no INSERT, mas as transações confirmam fora de ordem:
+        # o cursor para na primeira lacuna até ela ser preenchida ou expirar
+        agora = time.monotonic()
+        maior = max(self.entregues, default=self.cursor)
+        while self.cursor < maior:
+            proximo = self.cursor + 1
+            if proximo in self.entregues:
+                self.entregues.discard(proximo)
+            elif agora - self.lacunas.setdefault(proximo, agora) < ESPERA_LACUNA:
+                break
+            self.lacunas.pop(proximo, None)
+            self.cursor = proximo
+    
+    def _limpar_antigos(self):
+        """
+        Remove periodicamente os eventos mais antigos que EVENTOS_RETENCAO
+        
+        Chamado pela thread de leitura e após cada publicação, para que a
+        tabela não cresça quando nenhum painel está aberto.
+        """
+        agora = time.monotonic()
+        if agora - self.ultima_limpeza < INTERVALO_LIMPEZA:
+            return
+        self.ultima_limpeza = agora
+        db.execute_query("DELETE FROM eventos WHERE created_at < NOW() - INTERVAL %s SECOND", (RETENCAO,))
+    
+    def total_assinantes(self):
+        """
+        Returns:
+            int: Conexões abertas neste processo
+        """
+        return len(self.assinantes)
+
+
+_publicador = Publicador()
+
+
+def publicar(tipo, dados):
+    """
+    Grava um evento para os painéis conectados (a qualquer processo)
+    
+    Deve ser chamada dentro da transação da alteração: o evento só fica
+    visível após o commit e some se ela for desfeita. Após o commit, remove
+    de tempos em tempos os eventos vencidos. Falhas ao gravar não
+    interrompem o fluxo do usuário.
+    
+    Args:
+        tipo (str): Nome do evento (campo event: do SSE)
+        dados (dict): Conteúdo serializável em JSON
+    """
+    try:
+        db.execute_query("INSERT INTO eventos (tipo, dados) VALUES (%s, %s)",
+                         (tipo, json.dumps(dados, default=str)))
+        db.ao_confirmar(lambda: metricas.eventos_publicados_total.inc(tipo))
+        db.ao_confirmar(_publicador._limpar_antigos)
+    except Exception as e:
+        print(f"❌ Erro ao publicar evento '{tipo}': {e}")
+
+
+def limitar_assinantes(threads):
+    """
+    Ajusta o limite de conexões ao pool de threads do worker
+    
+    Cada conexão ocupa uma thread enquanto está aberta; metade das threads
+    fica sempre livre para as demais requisições.
+    
+    Args:
+        threads (int): Tamanho do pool de threads do worker
+    """
+    _publicador.limite = min(MAX_ASSINANTES, threads // 2)
+
+
+def encerrar_streams():
+    """Encerra os streams deste processo (worker parando de aceitar conexões)"""
+    _publicador.encerrar()
+
+
+def formatar(evento):
+    """
+    Formata um evento no protocolo text/event-stream
+    
+    Args:
+        evento (tuple): (id, tipo, dados em JSON)
+    
+    Returns:
+        str: Bloco SSE terminado por linha em branco
+    """
+    id_evento, tipo, dados = evento
+    return f"id: {id_evento}\nevent: {tipo}\ndata: {dados}\n\n"
+
+
+def _perdidos(ultimo_id):
+    """Eventos gravados depois de ultimo_id (reconexão), ainda na tabela"""
+    try:
+        linhas = db.fetch_all(
+            "SELECT id, tipo, dados FROM eventos WHERE id > %s ORDER BY id LIMIT %s",
+            (ultimo_id, TAMANHO_FILA)
+        )
+    except DatabaseError as e:
+        print(f"❌ Erro ao ler eventos perdidos: {e}")
+        return []
+    return [(linha['id'], linha['tipo'], linha['dados']) for linha in linhas]
+
+
+def stream(ultimo_id=None):
+    """
+    Gerador do corpo da resposta SSE de um assinante
+    
+    Envia os eventos à medida que são lidos e um comentário a cada
+    EVENTOS_HEARTBEAT segundos (mantém a conexão aberta em proxies e detecta
+    navegadores que saíram). Encerra ao desconectar ou quando o processo está
+    encerrando; nesse caso o navegador reconecta após RETRY_MS.
+    
+    Args:
+        ultimo_id (int): Valor do cabeçalho Last-Event-ID, se houver
+    
+    Returns:
+        generator: Blocos de texto do stream
+    
+    Raises:
+        LimiteAssinantes: Se o limite de conexões do processo foi atingido
+    """
+    fila = _publicador.assinar()
+    
+    def gerar():
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            
+            # Reenvia o que foi gravado enquanto o navegador estava desconectado;
+            # a fila já está registrada, então esses eventos podem chegar de novo
+            reenviados = set()
+            if ultimo_id is not None:
+                for evento in _perdidos(ultimo_id):
+                    reenviados.add(evento[0])
+                    yield formatar(evento)
+            
+            while not _publicador.encerrando.is_set():
+                try:
+                    evento = fila.get(timeout=INTERVALO_HEARTBEAT)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                if evento is _DESCONECTAR:
+                    return
+                if evento[0] not in reenviados:
+                    yield formatar(evento)
+        finally:
+            _publicador.cancelar(fila)
+    
+    return gerar()
+
+
+def total_assinantes():
+    """
+    Returns:
+        int: Painéis conectados a este processo
+    """
+    return _publicador.total_assinantes()
+
+
+metricas.registrar_coletor(lambda: [
+    ('admin_eventos_assinantes', 'gauge', 'Painéis conectados ao stream de eventos', total_assinantes())
+])
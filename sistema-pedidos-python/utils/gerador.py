@@ -0,0 +1,374 @@
+"""
+Módulo gerador de dados sintéticos para testes de carga
+Gera usuários (CPFs e telefones válidos), produtos por categoria e pedidos
+com itens e status realistas, de forma determinística a partir de uma semente,
+e grava em lotes com executemany ou LOAD DATA LOCAL INFILE
+"""
+
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from utils.database import db
+from utils.validations import formatar_cpf, formatar_telefone
+
+
+# Senha de todos os usuários gerados (um único hash para milhões de linhas)
+SENHA_PADRAO = 'senha123'
+
+# Faixa de CPFs gerados: bases 900.000.000 a 998.999.999, uma por id (sem repetir)
+BASE_CPF = 900000000
+FAIXA_CPF = 99000000
+MULTIPLICADOR_CPF = 62748517  # 13^7: primo com a faixa, logo id -> base é bijetiva
+
+NOMES = ('Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Heitor',
+         'Isabela', 'João', 'Larissa', 'Lucas', 'Mariana', 'Mateus', 'Natália', 'Otávio',
+         'Paula', 'Rafael', 'Sofia', 'Thiago', 'Valentina', 'Vinícius')
+SOBRENOMES = ('Almeida', 'Barbosa', 'Cardoso', 'Costa', 'Ferreira', 'Gomes', 'Lima',
+              'Martins', 'Oliveira', 'Pereira', 'Ribeiro', 'Rocha', 'Santos', 'Silva', 'Souza')
+RUAS = ('Rua das Flores', 'Avenida Brasil', 'Rua XV de Novembro', 'Rua São João',
+        'Avenida Paulista', 'Rua da Praia', 'Rua Sete de Setembro', 'Avenida Central')
+CIDADES = (('São Paulo', 'SP', '11'), ('Rio de Janeiro', 'RJ', '21'), ('Belo Horizonte', 'MG', '31'),
+           ('Curitiba', 'PR', '41'), ('Porto Alegre', 'RS', '51'), ('Salvador', 'BA', '71'),
+           ('Recife', 'PE', '81'), ('Fortaleza', 'CE', '85'), ('Brasília', 'DF', '61'),
+           ('Goiânia', 'GO', '62'))
+
+# Categoria -> (faixa de preço em centavos, modelos)
+CATEGORIAS = {
+    'Eletrônicos': ((50000, 800000), ('Notebook', 'Tablet', 'Smartphone', 'Smartwatch')),
+    'Periféricos': ((5000, 90000), ('Mouse', 'Teclado', 'Webcam', 'Mesa digitalizadora')),
+    'Monitores': ((70000, 450000), ('Monitor 24"', 'Monitor 27"', 'Monitor ultrawide')),
+    'Áudio': ((8000, 250000), ('Headset', 'Fone Bluetooth', 'Caixa de som', 'Microfone')),
+    'Armazenamento': ((15000, 200000), ('SSD', 'HD externo', 'Pendrive', 'Cartão microSD')),
+    'Móveis': ((40000, 300000), ('Cadeira', 'Mesa', 'Apoio de pés', 'Estante')),
+    'Acessórios': ((2000, 30000), ('Mousepad', 'Hub USB-C', 'Cabo HDMI', 'Suporte de notebook')),
+}
+MARCAS = ('Atlas', 'Boreal', 'Cosmo', 'Delta', 'Eixo', 'Fluxo', 'Gama', 'Horizonte')
+
+# Itens por pedido (1 a 5) e quantidade por item (1 a 3): pesos relativos
+PESOS_ITENS = (50, 25, 13, 8, 4)
+PESOS_QUANTIDADE = (80, 15, 5)
+
+# Status -> (mínimo, máximo) de dias entre a criação do pedido e a última atualização
+ATRASO_STATUS = {
+    'pendente': (0, 0),
+    'processando': (0, 1),
+    'enviado': (1, 5),
+    'entregue': (3, 15),
+    'cancelado': (0, 3),
+}
+
+# Cadastros alterados depois da criação: (probabilidade, máximo de dias depois)
+ALTERACAO_USUARIO = (0.2, 90)
+ALTERACAO_PRODUTO = (0.5, 60)
+
+COLUNAS = {
+    'users': ('id', 'nome', 'email', 'senha', 'cpf', 'telefone', 'idade', 'endereco', 'role',
+              'created_at', 'updated_at'),
+    'products': ('id', 'nome', 'descricao', 'preco', 'estoque', 'ativo', 'categoria', 'created_at', 'updated_at'),
+    'orders': ('id', 'user_id', 'status', 'valor_total', 'observacoes', 'endereco_entrega',
+               'created_at', 'updated_at'),
+    'order_items': ('id', 'order_id', 'product_id', 'quantidade', 'preco_unitario', 'subtotal', 'created_at'),
+}
+
+
+# ==================== VALORES ====================
+
+def gerar_cpf(indice):
+    """
+    CPF válido e único para cada índice (até FAIXA_CPF índices)
+    
+    Args:
+        indice (int): Número sequencial (ex.: id do usuário)
+    
+    Returns:
+        str: CPF formatado (000.000.000-00)
+    """
+    digitos = [int(c) for c in str(BASE_CPF + (indice * MULTIPLICADOR_CPF) % FAIXA_CPF)]
+    for tamanho in (9, 10):
+        soma = sum(digito * (tamanho + 1 - i) for i, digito in enumerate(digitos[:tamanho]))
+        resto = (soma * 10) % 11
+        digitos.append(0 if resto == 10 else resto)
+    return formatar_cpf(''.join(map(str, digitos)))
+
+
+def gerar_telefone(rng, ddd):
+    """
+    Celular válido (nove dígitos começando por 9)
+    
+    Args:
+        rng (random.Random): Gerador da semente
+        ddd (str): DDD da cidade
+    
+    Returns:
+        str: Telefone formatado ((00) 00000-0000)
+    """
+    return formatar_telefone(f'{ddd}9{rng.randrange(10000000, 100000000)}')
+
+
+def _data(rng, agora, dias):
+    """Data aleatória nos últimos `dias` dias, mais concentrada nos recentes"""
+    return agora - timedelta(seconds=int(dias * 86400 * rng.random() ** 1.5))
+
+
+def _atualizado_em(rng, criado_em, agora, minimo, maximo):
+    """Última atualização entre `minimo` e `maximo` dias após a criação, sem passar de agora"""
+    return min(criado_em + timedelta(seconds=int(rng.uniform(minimo, maximo) * 86400)), agora)
+
+
+def _cadastro_atualizado_em(rng, criado_em, agora, alteracao):
+    """Última atualização de um cadastro: a criação ou uma alteração posterior"""
+    probabilidade, maximo = alteracao
+    if rng.random() < probabilidade:
+        return _atualizado_em(rng, criado_em, agora, 0, maximo)
+    return criado_em
+
+
+def _status(rng, idade_dias):
+    """Status compatível com a idade do pedido (antigos já foram entregues ou cancelados)"""
+    sorteio = rng.random()
+    if idade_dias > 15:
+        return 'cancelado' if sorteio < 0.07 else 'entregue'
+    if idade_dias > 5:
+        for status, limite in (('cancelado', 0.06), ('processando', 0.1), ('enviado', 0.45)):
+            if sorteio < limite:
+                return status
+        return 'entregue'
+    for status, limite in (('cancelado', 0.04), ('pendente', 0.45), ('processando', 0.75)):
+        if sorteio < limite:
+            return status
+    return 'enviado'
+
+
+# ==================== LINHAS ====================
+
+def gerar_usuarios(primeiro_id, quantidade, semente, agora, dias):
+    """
+    Gera as linhas de usuários
+    
+    Args:
+        primeiro_id (int): Id do primeiro usuário gerado
+        quantidade (int): Quantidade de usuários
+        semente (int): Semente do gerador
+        agora (datetime): Referência das datas
+        dias (int): Janela das datas de cadastro
+    
+    Yields:
+        tuple: Valores na ordem de COLUNAS['users']
+    """
+    rng = random.Random(f'{semente}:usuarios')
+    rng_atualizacao = random.Random(f'{semente}:usuarios:atualizacao')
+    senha = generate_password_hash(SENHA_PADRAO)
+    for user_id in range(primeiro_id, primeiro_id + quantidade):
+        nome = f'{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}'
+        cidade, uf, ddd = rng.choice(CIDADES)
+        endereco = f'{rng.choice(RUAS)}, {rng.randrange(1, 3000)} - {cidade} - {uf}'
+        telefone, idade, criado_em = gerar_telefone(rng, ddd), rng.randrange(18, 81), _data(rng, agora, dias)
+        yield (user_id, nome, f'usuario{user_id}@exemplo.com.br', senha, gerar_cpf(user_id), telefone, idade,
+               endereco, 'user', criado_em,
+               _cadastro_atualizado_em(rng_atualizacao, criado_em, agora, ALTERACAO_USUARIO))
+
+
+def gerar_produtos(primeiro_id, quantidade, semente, agora, dias):
+    """
+    Gera as linhas de produtos, distribuídos entre as categorias
+    
+    Args:
+        primeiro_id (int): Id do primeiro produto gerado
+        quantidade (int): Quantidade de produtos
+        semente (int): Semente do gerador
+        agora (datetime): Referência das datas
+        dias (int): Janela das datas de cadastro
+    
+    Returns:
+        list: Tuplas na ordem de COLUNAS['products']
+    """
+    rng = random.Random(f'{semente}:produtos')
+    rng_atualizacao = random.Random(f'{semente}:produtos:atualizacao')
+    categorias = list(CATEGORIAS)
+    linhas = []
+    for product_id in range(primeiro_id, primeiro_id + quantidade):
+        categoria = categorias[product_id % len(categorias)]
+        (minimo, maximo), modelos = CATEGORIAS[categoria]
+        nome = f'{rng.choice(modelos)} {rng.choice(MARCAS)} {product_id}'
+        preco = rng.randrange(minimo // 100, maximo // 100) * 100 - 10  # preços terminados em 90
+        estoque, ativo, criado_em = rng.randrange(0, 500), rng.random() < 0.95, _data(rng, agora, dias)
+        linhas.append((product_id, nome, f'{nome} - {categoria.lower()}', preco, estoque, ativo, categoria,
+                       criado_em, _cadastro_atualizado_em(rng_atualizacao, criado_em, agora, ALTERACAO_PRODUTO)))
+    return linhas
+
+
+def gerar_pedidos(primeiro_id, primeiro_item_id, quantidade, usuarios, produtos, semente, agora, dias):
+    """
+    Gera pedidos e itens
+    
+    Clientes e produtos seguem distribuições concentradas (poucos clientes
+    frequentes, poucos produtos campeões de venda), o status depende da
+    idade do pedido e a última atualização, do status (ATRASO_STATUS).
+    
+    Args:
+        primeiro_id (int): Id do primeiro pedido
+        primeiro_item_id (int): Id do primeiro item
+        quantidade (int): Quantidade de pedidos
+        usuarios (range): Ids dos usuários que compram
+        produtos (list): Tuplas (id, preço) dos produtos à venda
+        semente (int): Semente do gerador
+        agora (datetime): Referência das datas
+        dias (int): Janela das datas dos pedidos
+    
+    Yields:
+        tuple: (linha do pedido, lista de linhas dos itens)
+    """
+    rng = random.Random(f'{semente}:pedidos')
+    rng_atualizacao = random.Random(f'{semente}:pedidos:atualizacao')
+    item_id = primeiro_item_id
+    for order_id in range(primeiro_id, primeiro_id + quantidade):
+        user_id = usuarios[int(len(usuarios) * rng.random() ** 2)]
+        criado_em = _data(rng, agora, dias)
+        cidade, uf, _ = rng.choice(CIDADES)
+        endereco = f'{rng.choice(RUAS)}, {rng.randrange(1, 3000)} - {cidade} - {uf}'
+        
+        itens = []
+        escolhidos = set()
+        for _ in range(rng.choices(range(1, 6), PESOS_ITENS)[0]):
+            product_id, preco = produtos[int(len(produtos) * rng.random() ** 3)]
+            if product_id in escolhidos:
+                continue
+            escolhidos.add(product_id)
+            quantidade_item = rng.choices(range(1, 4), PESOS_QUANTIDADE)[0]
+            itens.append((item_id, order_id, product_id, quantidade_item, preco, quantidade_item * preco, criado_em))
+            item_id += 1
+        
+        status = _status(rng, (agora - criado_em).days)
+        observacoes = 'Entregar em horário comercial' if rng.random() < 0.1 else None
+        atualizado_em = _atualizado_em(rng_atualizacao, criado_em, agora, *ATRASO_STATUS[status])
+        pedido = (order_id, user_id, status, sum(item[5] for item in itens), observacoes, endereco,
+                  criado_em, atualizado_em)
+        yield pedido, itens
+
+
+# ==================== CARGA ====================
+
+def proximo_id(tabela, arquivo=None):
+    """
+    Primeiro id livre de uma tabela (considerando a tabela de arquivo, se houver)
+    
+    Args:
+        tabela (str): Tabela principal
+        arquivo (str): Tabela de arquivo com os mesmos ids
+    
+    Returns:
+        int: Maior id existente + 1
+    """
+    maior = db.fetch_one(f"SELECT COALESCE(MAX(id), 0) AS maior FROM {tabela}")['maior']
+    if arquivo:
+        maior = max(maior, db.fetch_one(f"SELECT COALESCE(MAX(id), 0) AS maior FROM {arquivo}")['maior'])
+    return maior + 1
+
+
+def _campo_tsv(valor):
+    """Valor no formato de LOAD DATA (tabulação, \\N para NULL)"""
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, bool):
+        return '1' if valor else '0'
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    texto = str(valor)
+    return texto.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+class Carregador:
+    """Grava linhas em lotes (um commit por lote) e mede a vazão por tabela"""
+    
+    def __init__(self, metodo='executemany', tamanho_lote=5000):
+        """
+        Args:
+            metodo (str): 'executemany' ou 'load-data' (LOAD DATA LOCAL INFILE, só MySQL)
+            tamanho_lote (int): Linhas por lote
+        """
+        self.metodo = metodo
+        self.tamanho_lote = tamanho_lote
+        self.pendentes = {tabela: [] for tabela in COLUNAS}
+        self.totais = {tabela: 0 for tabela in COLUNAS}
+        self.inicio = time.perf_counter()
+    
+    def adicionar(self, tabela, linhas):
+        """
+        Acumula linhas e grava sempre que um lote fica completo
+        
+        Args:
+            tabela (str): Tabela de destino
+            linhas (iterable): Tuplas na ordem de COLUNAS[tabela]
+        """
+        pendentes = self.pendentes[tabela]
+        for linha in linhas:
+            pendentes.append(linha)
+            if len(pendentes) >= self.tamanho_lote:
+                self.gravar(tabela)
+                pendentes = self.pendentes[tabela]
+    
+    def adicionar_pedido(self, pedido, itens):
+        """
+        Acumula um pedido e seus itens; os itens só são gravados junto com os
+        pedidos a que pertencem (chave estrangeira)
+        
+        Args:
+            pedido (tuple): Linha na ordem de COLUNAS['orders']
+            itens (list): Linhas na ordem de COLUNAS['order_items']
+        """
+        self.pendentes['orders'].append(pedido)
+        self.pendentes['order_items'].extend(itens)
+        if len(self.pendentes['orders']) >= self.tamanho_lote:
+            self.gravar('orders')
+            self.gravar('order_items')
+    
+    def gravar(self, tabela):
+        """
+        Grava as linhas pendentes de uma tabela
+        
+        Args:
+            tabela (str): Tabela de destino
+        
+        Raises:
+            DatabaseError: Se a gravação falhar
+        """
+        linhas = self.pendentes[tabela]
+        if not linhas:
+            return
+        
+        colunas = COLUNAS[tabela]
+        if self.metodo == 'load-data':
+            with tempfile.NamedTemporaryFile('w', suffix='.tsv', encoding='utf-8', delete=False) as arquivo:
+                for linha in linhas:
+                    arquivo.write('\t'.join(_campo_tsv(valor) for valor in linha) + '\n')
+            try:
+                db.execute_query(
+                    f"LOAD DATA LOCAL INFILE %s INTO TABLE {tabela} CHARACTER SET utf8mb4 "
+                    f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(colunas)})",
+                    (arquivo.name,)
+                )
+            finally:
+                os.unlink(arquivo.name)
+        else:
+            marcadores = ', '.join(['%s'] * len(colunas))
+            db.execute_many(f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({marcadores})", linhas)
+        
+        self.totais[tabela] += len(linhas)
+        self.pendentes[tabela] = []
+    
+    def finalizar(self):
+        """Grava o que restou (pais antes dos filhos por causa das chaves estrangeiras)"""
+        for tabela in COLUNAS:
+            self.gravar(tabela)
+    
+    def vazao(self):
+        """
+        Returns:
+            float: Linhas gravadas por segundo desde o início
+        """
+        return sum(self.totais.values()) / max(time.perf_counter() - self.inicio, 1e-9)
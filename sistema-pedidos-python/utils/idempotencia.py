@@ -0,0 +1,392 @@
+"""
+Módulo de chaves de idempotência para requisições de escrita
+O cliente envia uma chave (cabeçalho Idempotency-Key ou campo
+idempotency_key do formulário); a primeira resposta fica guardada em memória
+(LRU com validade) e na tabela idempotencia, e é devolvida sem executar a
+rota de novo quando a mesma chave chega outra vez (duplo clique, retry após
+timeout). Só são guardadas as respostas de escritas que a rota marcou como
+concluídas (marcar_concluida); falhas tratadas liberam a chave. Duplicatas simultâneas são serializadas por uma reserva com prazo
+na tabela, sem manter locks do banco durante a execução da rota.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import Response, flash, g, jsonify, make_response, request, session
+
+from utils.database import db, DatabaseError
+from utils.drivers import ERRO_DUPLICADO
+from utils import metricas
+
+
+# Configurações (segundos)
+VALIDADE = int(os.getenv('IDEMPOTENCIA_TTL', 24 * 3600))
+RESERVA = int(os.getenv('IDEMPOTENCIA_RESERVA', 60))
+ESPERA = float(os.getenv('IDEMPOTENCIA_ESPERA', 5))
+INTERVALO_LIMPEZA = int(os.getenv('IDEMPOTENCIA_LIMPEZA', 600))
+MAX_MEMORIA = int(os.getenv('IDEMPOTENCIA_MAX_MEMORIA', 1000))
+
+# Respostas maiores não são guardadas (a chave é liberada)
+TAMANHO_MAXIMO = 64 * 1024
+TAMANHO_CHAVE = 255
+
+CABECALHO = 'Idempotency-Key'
+CAMPO = 'idempotency_key'
+CABECALHOS_GUARDADOS = ('Content-Type', 'Location')
+
+
+class CacheRespostas:
+    """LRU em memória do processo: chave -> (impressao, resposta, expira_em)"""
+    
+    def __init__(self, max_itens=MAX_MEMORIA):
+        """
+        Inicializa cache
+        
+        Args:
+            max_itens (int): Quantidade de respostas antes de descartar as menos usadas
+        """
+        self.max_itens = max_itens
+        self.itens = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def obter(self, chave):
+        """
+        Retorna a resposta guardada, se ainda válida
+        
+        Args:
+            chave (str): Chave interna
+        
+        Returns:
+            tuple: (impressao, resposta) ou None
+        """
+        with self.lock:
+            item = self.itens.get(chave)
+            if item is None:
+                return None
+            if item[2] <= datetime.now():
+                del self.itens[chave]
+                return None
+            self.itens.move_to_end(chave)
+            return item[0], item[1]
+    
+    def guardar(self, chave, impressao, resposta, expira_em):
+        """
+        Guarda uma resposta, descartando a menos usada se cheio
+        
+        Args:
+            chave (str): Chave interna
+            impressao (str): Impressão da requisição original
+            resposta (dict): status, cabecalhos e corpo
+            expira_em (datetime): Fim da validade
+        """
+        with self.lock:
+            self.itens[chave] = (impressao, resposta, expira_em)
+            self.itens.move_to_end(chave)
+            while len(self.itens) > self.max_itens:
+                self.itens.popitem(last=False)
+    
+    def limpar(self):
+        """Esvazia o cache"""
+        with self.lock:
+            self.itens.clear()
+
+
+_cache = CacheRespostas()
+
+# Lock por chave: duplicatas no mesmo processo esperam (até ESPERA) sem consultar o banco
+_locks = {}
+_locks_lock = threading.Lock()
+_ultima_limpeza = [0.0]
+
+
+class _TravaChave:
+    """Context manager do lock de uma chave (removido quando ninguém mais o usa)
+    
+    Retorna False no with se o lock não foi obtido dentro da espera.
+    """
+    
+    def __init__(self, chave, espera):
+        self.chave = chave
+        self.espera = espera
+        self.obtida = False
+    
+    def __enter__(self):
+        with _locks_lock:
+            registro = _locks.setdefault(self.chave, [threading.Lock(), 0])
+            registro[1] += 1
+        self.obtida = registro[0].acquire(timeout=max(self.espera, 0))
+        return self.obtida
+    
+    def __exit__(self, *erro):
+        with _locks_lock:
+            registro = _locks[self.chave]
+            if self.obtida:
+                registro[0].release()
+            registro[1] -= 1
+            if not registro[1]:
+                del _locks[self.chave]
+
+
+def _agora():
+    """Horário atual sem microssegundos (mesma precisão do TIMESTAMP)"""
+    return datetime.now().replace(microsecond=0)
+
+
+def _hash(*partes):
+    """SHA-256 hexadecimal das partes"""
+    return hashlib.sha256('\x1f'.join(str(parte) for parte in partes).encode('utf-8')).hexdigest()
+
+
+def impressao_requisicao():
+    """
+    Impressão digital da requisição atual (método, caminho e corpo)
+    
+    A mesma chave com outro conteúdo é um erro do cliente, não uma repetição.
+    
+    Returns:
+        str: SHA-256 hexadecimal
+    """
+    if request.is_json:
+        corpo = request.get_data(as_text=True)
+    else:
+        corpo = json.dumps(sorted((nome, valor) for nome, valor in request.form.items(multi=True)
+                                  if nome != CAMPO))
+    return _hash(request.method, request.path, corpo)
+
+
+def _erro(mensagem, status, retry_after=None):
+    """Resposta de erro em JSON (API) ou texto (formulários)"""
+    if request.is_json or request.accept_mimetypes.best == 'application/json':
+        resposta = jsonify({'erro': mensagem})
+        resposta.status_code = status
+    else:
+        resposta = Response(mensagem + '\n', status=status, mimetype='text/plain')
+    if retry_after:
+        resposta.headers['Retry-After'] = str(retry_after)
+    return resposta
+
+
+def _reproduzir(resposta):
+    """
+    Recria a resposta guardada
+    
+    Args:
+        resposta (dict): status, cabecalhos e corpo
+    
+    Returns:
+        Response: Resposta marcada com Idempotent-Replayed
+    """
+    metricas.idempotencia_total.inc('repetida')
+    reproduzida = Response(resposta['corpo'], status=resposta['status'], headers=resposta['cabecalhos'])
+    reproduzida.headers['Idempotent-Replayed'] = 'true'
+    
+    # Formulários: a mensagem original pode ter sido perdida com a primeira resposta
+    if 'Location' in reproduzida.headers:
+        flash('Esta solicitação já havia sido processada', 'info')
+    return reproduzida
+
+
+def _ler(chave):
+    """Registro da chave no banco (ou None)"""
+    return db.fetch_one(
+        "SELECT impressao, status_http, cabecalhos, corpo, expira_em FROM idempotencia WHERE chave = %s",
+        (chave,)
+    )
+
+
+def _reservar(chave, impressao):
+    """
+    Tenta reservar a chave para esta requisição
+    
+    A reserva é a própria linha com status_http NULL e prazo curto: se o
+    processo cair no meio, outro assume a chave depois de RESERVA segundos.
+    
+    Args:
+        chave (str): Chave interna
+        impressao (str): Impressão da requisição
+    
+    Returns:
+        dict: None se reservada; senão o registro existente
+              (status_http NULL = outra requisição em andamento)
+    """
+    registro = _ler(chave)
+    agora = _agora()
+    prazo = agora + timedelta(seconds=RESERVA)
+    
+    if registro is None:
+        try:
+            db.execute_query(
+                "INSERT INTO idempotencia (chave, impressao, expira_em) VALUES (%s, %s, %s)",
+                (chave, impressao, prazo)
+            )
+            return None
+        except DatabaseError as e:
+            if e.errno != ERRO_DUPLICADO:
+                raise
+    elif registro['expira_em'] < agora:
+        # Resposta expirada ou reserva abandonada: só um processo consegue assumir
+        assumida = db.execute_query(
+            "UPDATE idempotencia SET impressao = %s, status_http = NULL, cabecalhos = NULL, corpo = NULL, "
+            "expira_em = %s WHERE chave = %s AND expira_em < %s",
+            (impressao, prazo, chave, agora)
+        )
+        if assumida:
+            return None
+    else:
+        return registro
+    
+    # Perdeu a corrida para outro processo
+    return _ler(chave) or {'status_http': None}
+
+
+def _concluir(chave, impressao, resposta):
+    """Guarda a resposta no banco e na memória"""
+    expira_em = _agora() + timedelta(seconds=VALIDADE)
+    db.execute_query(
+        "UPDATE idempotencia SET status_http = %s, cabecalhos = %s, corpo = %s, expira_em = %s WHERE chave = %s",
+        (resposta['status'], json.dumps(resposta['cabecalhos']), resposta['corpo'], expira_em, chave)
+    )
+    _cache.guardar(chave, impressao, resposta, expira_em)
+
+
+def _liberar(chave):
+    """Desfaz a reserva (a rota falhou ou a resposta não pode ser guardada)"""
+    try:
+        db.execute_query("DELETE FROM idempotencia WHERE chave = %s AND status_http IS NULL", (chave,))
+    except DatabaseError as e:
+        print(f"❌ Erro ao liberar chave de idempotência: {e}")
+
+
+def _registro_para_resposta(registro):
+    """Converte a linha da tabela no dicionário de resposta"""
+    return {
+        'status': registro['status_http'],
+        'cabecalhos': json.loads(registro['cabecalhos'] or '{}'),
+        'corpo': bytes(registro['corpo'] or b'')
+    }
+
+
+def limpar_expirados():
+    """
+    Remove do banco as respostas e reservas vencidas
+    
+    Returns:
+        int: Linhas removidas
+    """
+    return db.execute_query("DELETE FROM idempotencia WHERE expira_em < %s", (_agora(),))
+
+
+def _limpar_periodicamente():
+    """Limpeza oportunista, no máximo uma vez a cada INTERVALO_LIMPEZA por processo"""
+    agora = time.monotonic()
+    if agora - _ultima_limpeza[0] < INTERVALO_LIMPEZA:
+        return
+    _ultima_limpeza[0] = agora
+    try:
+        limpar_expirados()
+    except DatabaseError as e:
+        print(f"❌ Erro ao limpar chaves de idempotência: {e}")
+
+
+def marcar_concluida():
+    """
+    Informa que a escrita da requisição foi confirmada
+    
+    As rotas tratam as próprias falhas (flash e redirect); sem esta marcação
+    a resposta não é guardada e a mesma chave pode ser usada de novo (retry
+    após erro ou reenvio do formulário corrigido).
+    """
+    g.idempotencia_concluida = True
+
+
+def _executar(f, chave, impressao, args, kwargs):
+    """Executa a rota com a chave reservada e guarda a resposta"""
+    metricas.idempotencia_total.inc('nova')
+    g.idempotencia_concluida = False
+    try:
+        resposta = make_response(f(*args, **kwargs))
+    except BaseException:
+        _liberar(chave)
+        raise
+    
+    # Estrutura de decisão: só respostas definitivas e pequenas de escritas concluídas são guardadas
+    if not g.pop('idempotencia_concluida', False):
+        metricas.idempotencia_total.inc('liberada')
+        _liberar(chave)
+        return resposta
+    if resposta.status_code >= 500 or resposta.is_streamed:
+        _liberar(chave)
+        return resposta
+    corpo = resposta.get_data()
+    if len(corpo) > TAMANHO_MAXIMO:
+        _liberar(chave)
+        return resposta
+    
+    cabecalhos = {nome: resposta.headers[nome] for nome in CABECALHOS_GUARDADOS if nome in resposta.headers}
+    try:
+        _concluir(chave, impressao, {'status': resposta.status_code, 'cabecalhos': cabecalhos, 'corpo': corpo})
+    except DatabaseError as e:
+        # A escrita já aconteceu: responde mesmo sem conseguir guardar
+        print(f"❌ Erro ao guardar resposta idempotente: {e}")
+        _liberar(chave)
+    
+    _limpar_periodicamente()
+    return resposta
+
+
+def idempotente(f):
+    """
+    Decorator para rotas de escrita que aceitam chave de idempotência
+    
+    Sem chave a rota executa normalmente. A chave vale por usuário e rota;
+    reutilizá-la com outro conteúdo retorna 422 e, enquanto a primeira
+    requisição ainda executa, repetições esperam até ESPERA segundos e
+    então recebem 409 com Retry-After.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        chave_cliente = request.headers.get(CABECALHO) or request.form.get(CAMPO)
+        if not chave_cliente:
+            return f(*args, **kwargs)
+        if len(chave_cliente) > TAMANHO_CHAVE:
+            return _erro(f'{CABECALHO} deve ter no máximo {TAMANHO_CHAVE} caracteres', 400)
+        
+        chave = _hash(session.get('user_id'), request.endpoint, chave_cliente)
+        impressao = impressao_requisicao()
+        
+        limite = time.monotonic() + ESPERA
+        with _TravaChave(chave, ESPERA) as obtida:
+            # A mesma chave ainda executa neste processo
+            if not obtida:
+                metricas.idempotencia_total.inc('em_andamento')
+                return _erro('Requisição com esta chave ainda em processamento', 409, retry_after=1)
+            
+            while True:
+                guardada = _cache.obter(chave)
+                if guardada is None:
+                    registro = _reservar(chave, impressao)
+                    if registro is None:
+                        return _executar(f, chave, impressao, args, kwargs)
+                    if registro['status_http'] is not None:
+                        guardada = (registro['impressao'], _registro_para_resposta(registro))
+                        _cache.guardar(chave, guardada[0], guardada[1], registro['expira_em'])
+                
+                if guardada is not None:
+                    if guardada[0] != impressao:
+                        metricas.idempotencia_total.inc('conflito')
+                        return _erro(f'{CABECALHO} já usada em outra requisição', 422)
+                    return _reproduzir(guardada[1])
+                
+                # Outro processo está executando a mesma chave
+                if time.monotonic() >= limite:
+                    metricas.idempotencia_total.inc('em_andamento')
+                    return _erro('Requisição com esta chave ainda em processamento', 409, retry_after=1)
+                time.sleep(0.1)
+    
+    return decorated_function
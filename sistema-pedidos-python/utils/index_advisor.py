@@ -0,0 +1,192 @@
+"""
+Módulo de análise de índices (index advisor)
+Captura as queries emitidas pelos models, executa EXPLAIN e sugere índices
+"""
+
+import re
+
+from utils.database import db
+
+
+def normalizar(query):
+    """
+    Remove espaços redundantes da query para comparação
+    
+    Args:
+        query (str): Query SQL
+    
+    Returns:
+        str: Query em uma linha
+    """
+    return re.sub(r'\s+', ' ', query).strip()
+
+
+def capturar_consultas_modelos():
+    """
+    Executa os finders dos models com dados de exemplo e captura as queries
+    
+    Apenas métodos de leitura são chamados; nenhum dado é alterado.
+    
+    Returns:
+        list: Tuplas (query, params) sem duplicados
+    """
+    from models.user import User
+    from models.product import Product
+    from models.order import Order, OrderItem
+    
+    # Dados de exemplo lidos antes de iniciar a captura
+    usuario = db.fetch_one("SELECT id, email FROM users ORDER BY id DESC LIMIT 1") or {'id': 0, 'email': ''}
+    produto = db.fetch_one("SELECT id FROM products ORDER BY id DESC LIMIT 1") or {'id': 0}
+    pedido = db.fetch_one("SELECT id, user_id FROM orders ORDER BY id DESC LIMIT 1") or {'id': 0, 'user_id': 0}
+    
+    db.iniciar_captura()
+    try:
+        User.buscar_por_id(usuario['id'])
+        User.buscar_por_email(usuario['email'])
+        User.listar_todos()
+        Product.buscar_por_id(produto['id'])
+        Product.listar_ativos()
+        Product.listar_todos()
+        Order.buscar_por_id(pedido['id'])
+        Order.buscar_por_usuario(pedido['user_id'])
+        pedidos, cursor = Order.buscar_por_usuario_paginado(pedido['user_id'], limite=1)
+        if cursor:
+            Order.buscar_por_usuario_paginado(pedido['user_id'], limite=1, cursor=cursor)
+        Order.resumo_por_usuario(pedido['user_id'])
+        Order.listar_todos()
+        OrderItem.buscar_por_pedido(pedido['id'])
+    finally:
+        capturadas = db.parar_captura()
+    
+    unicas = {}
+    for query, params in capturadas:
+        unicas.setdefault(normalizar(query), (query, params))
+    return list(unicas.values())
+
+
+def indices_existentes(tabela):
+    """
+    Lista as colunas de cada índice da tabela
+    
+    Args:
+        tabela (str): Nome da tabela
+    
+    Returns:
+        list: Listas de colunas na ordem do índice
+    """
+    indices = {}
+    for row in db.fetch_all(f"SHOW INDEX FROM {tabela}"):
+        indices.setdefault(row['Key_name'], []).append((row['Seq_in_index'], row['Column_name']))
+    return [[coluna for _, coluna in sorted(colunas)] for colunas in indices.values()]
+
+
+def sugerir_indice(query):
+    """
+    Sugere um índice composto para uma query de tabela única
+    
+    Ordem das colunas: igualdades do WHERE, depois GROUP BY/ORDER BY e por
+    fim a primeira coluna de intervalo.
+    
+    Args:
+        query (str): Query SQL
+    
+    Returns:
+        tuple: (tabela, lista de colunas) ou None
+    """
+    sql = normalizar(query)
+    tabela = re.search(r'\bFROM (\w+)', sql, re.IGNORECASE)
+    if not tabela or re.search(r'\bJOIN\b', sql, re.IGNORECASE):
+        return None
+    
+    where = re.search(r'\bWHERE (.*?)(?:\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|$)', sql, re.IGNORECASE)
+    ordenacao = re.search(r'\b(?:GROUP|ORDER) BY (.*?)(?:\bLIMIT\b|$)', sql, re.IGNORECASE)
+    
+    colunas = []
+    intervalo = []
+    if where:
+        condicao = where.group(1)
+        for coluna in re.findall(r'(\w+)\s*(?:=\s*(?:%s|TRUE|FALSE|\'[^\']*\'|\d+)|IN\s*\()', condicao, re.IGNORECASE):
+            if coluna not in colunas:
+                colunas.append(coluna)
+        intervalo = [c for c in re.findall(r'(\w+)\s*[<>]=?', condicao) if c not in colunas]
+    
+    if ordenacao:
+        for coluna in re.findall(r'(\w+)(?:\s+(?:ASC|DESC))?\s*(?:,|$)', ordenacao.group(1).strip(), re.IGNORECASE):
+            if coluna not in colunas:
+                colunas.append(coluna)
+    elif intervalo:
+        colunas.append(intervalo[0])
+    
+    # O InnoDB já inclui a chave primária no fim de todo índice secundário
+    if len(colunas) > 1 and colunas[-1] == 'id':
+        colunas.pop()
+    
+    if not colunas or colunas == ['id']:
+        return None
+    return tabela.group(1), colunas
+
+
+def analisar(consultas):
+    """
+    Executa EXPLAIN nas consultas e aponta varreduras completas e filesorts
+    
+    Args:
+        consultas (list): Tuplas (query, params)
+    
+    Returns:
+        list: Dicionários com query, problemas encontrados e sugestão de índice
+    """
+    relatorio = []
+    cache_indices = {}
+    
+    for query, params in consultas:
+        if not normalizar(query).upper().startswith('SELECT'):
+            continue
+        
+        problemas = []
+        for linha in db.fetch_all(f"EXPLAIN {query}", params):
+            extra = linha.get('Extra') or ''
+            if linha.get('type') == 'ALL':
+                problemas.append(f"varredura completa em {linha.get('table')} (~{linha.get('rows')} linhas)")
+            if 'Using filesort' in extra:
+                problemas.append(f"filesort em {linha.get('table')}")
+            if 'Using temporary' in extra:
+                problemas.append(f"tabela temporária em {linha.get('table')}")
+        
+        if not problemas:
+            continue
+        
+        sugestao = None
+        indice = sugerir_indice(query)
+        if indice:
+            tabela, colunas = indice
+            if tabela not in cache_indices:
+                cache_indices[tabela] = indices_existentes(tabela)
+            
+            # Estrutura de decisão: só sugere se nenhum índice já cobre o prefixo
+            if not any(existente[:len(colunas)] == colunas for existente in cache_indices[tabela]):
+                nome = f"idx_{tabela}_{'_'.join(colunas)}"
+                sugestao = f"CREATE INDEX {nome} ON {tabela}({', '.join(colunas)});"
+        
+        relatorio.append({'query': normalizar(query), 'problemas': problemas, 'sugestao': sugestao})
+    
+    return relatorio
+
+
+def imprimir_relatorio(relatorio):
+    """
+    Exibe o relatório do index advisor no terminal
+    
+    Args:
+        relatorio (list): Resultado de analisar()
+    """
+    if not relatorio:
+        print("✅ Nenhuma varredura completa ou filesort encontrada")
+        return
+    
+    for item in relatorio:
+        print(f"\n🔎 {item['query']}")
+        for problema in item['problemas']:
+            print(f"   ⚠️  {problema}")
+        if item['sugestao']:
+            print(f"   💡 {item['sugestao']}")
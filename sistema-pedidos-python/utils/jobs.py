@@ -0,0 +1,337 @@
+"""
+Módulo de fila de tarefas em segundo plano
+Persiste tarefas na tabela jobs e as executa fora do ciclo da requisição
+"""
+
+import json
+import os
+import random
+import time
+import uuid
+
+from utils.database import db
+
+
+# Configurações da fila (podem ser ajustadas no .env)
+MAX_TENTATIVAS = int(os.getenv('JOBS_MAX_TENTATIVAS', '5'))
+BACKOFF_BASE = float(os.getenv('JOBS_BACKOFF_BASE', '2'))
+BACKOFF_MAXIMO = float(os.getenv('JOBS_BACKOFF_MAXIMO', '600'))
+TEMPO_LIMITE_EXECUCAO = int(os.getenv('JOBS_TEMPO_LIMITE', '300'))
+
+# Registro de tarefas: nome -> função que recebe o payload
+_tarefas = {}
+
+
+def tarefa(nome):
+    """
+    Decorator que registra uma função como tarefa da fila
+    
+    Args:
+        nome (str): Nome da tarefa usado ao enfileirar
+    
+    Returns:
+        function: Decorator
+    """
+    def decorator(funcao):
+        _tarefas[nome] = funcao
+        return funcao
+    return decorator
+
+
+def enfileirar(nome, payload=None, atraso=0):
+    """
+    Enfileira uma tarefa para execução em segundo plano
+    
+    Deve ser chamada depois que a escrita que originou a tarefa foi
+    confirmada (commit). Falhas ao enfileirar não interrompem o fluxo
+    do usuário.
+    
+    Args:
+        nome (str): Nome da tarefa
+        payload (dict): Dados da tarefa (serializáveis em JSON)
+        atraso (int): Segundos de espera antes da primeira execução
+    
+    Returns:
+        int: ID do job criado ou None em caso de erro
+    """
+    return enfileirar_varios(nome, [payload or {}], atraso)[0]
+
+
+def enfileirar_varios(nome, payloads, atraso=0):
+    """
+    Enfileira várias tarefas do mesmo tipo em um único INSERT
+    
+    Args:
+        nome (str): Nome da tarefa
+        payloads (list): Lista de payloads
+        atraso (int): Segundos de espera antes da primeira execução
+    
+    Returns:
+        list: IDs dos jobs criados (None quando não disponível)
+    """
+    if not payloads:
+        return []
+    
+    try:
+        query = """
+            INSERT INTO jobs (tarefa, payload, max_tentativas, executar_em)
+            VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)
+        """
+        params = [(nome, json.dumps(payload or {}), MAX_TENTATIVAS, int(atraso))
+                  for payload in payloads]
+        
+        # Estrutura de decisão: um único job usa o lastrowid
+        if len(params) == 1:
+            return [db.execute_query(query, params[0])]
+        
+        db.execute_many(query, params)
+        return [None] * len(params)
+    
+    except Exception as e:
+        print(f"❌ Erro ao enfileirar tarefa '{nome}': {e}")
+        return [None] * len(payloads)
+
+
+def calcular_backoff(tentativas):
+    """
+    Calcula espera exponencial com jitter para nova tentativa
+    
+    Args:
+        tentativas (int): Número de tentativas já realizadas
+    
+    Returns:
+        int: Segundos até a próxima tentativa
+    """
+    espera = min(BACKOFF_BASE * (2 ** max(tentativas - 1, 0)), BACKOFF_MAXIMO)
+    return int(espera * random.uniform(0.5, 1.0)) + 1
+
+
+def reservar(limite=10):
+    """
+    Reserva atomicamente jobs pendentes para este worker
+    
+    Args:
+        limite (int): Quantidade máxima de jobs
+    
+    Returns:
+        list: Registros dos jobs reservados
+    """
+    token = uuid.uuid4().hex
+    
+    # UPDATE único reserva os jobs sem manter locks entre comandos
+    query = """
+        UPDATE jobs
+        SET status = 'executando', reservado_por = %s,
+            iniciado_em = CURRENT_TIMESTAMP(3), tentativas = tentativas + 1
+        WHERE status = 'pendente' AND executar_em <= NOW()
+        ORDER BY executar_em, id
+        LIMIT %s
+    """
+    if not db.execute_query(query, (token, limite)):
+        return []
+    
+    query = "SELECT * FROM jobs WHERE reservado_por = %s AND status = 'executando' ORDER BY id"
+    return db.fetch_all(query, (token,))
+
+
+def executar(job):
+    """
+    Executa um job reservado e registra o resultado
+    
+    Args:
+        job (dict): Registro do job
+    
+    Returns:
+        bool: True se a tarefa foi concluída
+    """
+    funcao = _tarefas.get(job['tarefa'])
+    
+    try:
+        # Estrutura de decisão: tarefa desconhecida é tratada como falha
+        if funcao is None:
+            raise LookupError(f"Tarefa não registrada: {job['tarefa']}")
+        
+        funcao(json.loads(job['payload']))
+        
+        query = """
+            UPDATE jobs SET status = 'concluido', concluido_em = CURRENT_TIMESTAMP(3), ultimo_erro = NULL
+            WHERE id = %s
+        """
+        db.execute_query(query, (job['id'],))
+        return True
+    
+    except Exception as e:
+        print(f"❌ Erro ao executar job {job['id']} ({job['tarefa']}): {e}")
+        
+        # Estrutura de decisão: esgotou tentativas vai para dead-letter
+        if job['tentativas'] >= job['max_tentativas']:
+            query = """
+                UPDATE jobs SET status = 'morto', concluido_em = CURRENT_TIMESTAMP(3), ultimo_erro = %s
+                WHERE id = %s
+            """
+            db.execute_query(query, (str(e), job['id']))
+        else:
+            query = """
+                UPDATE jobs SET status = 'pendente', reservado_por = NULL, ultimo_erro = %s,
+                    executar_em = NOW() + INTERVAL %s SECOND
+                WHERE id = %s
+            """
+            db.execute_query(query, (str(e), calcular_backoff(job['tentativas']), job['id']))
+        return False
+
+
+def processar_lote(limite=10):
+    """
+    Reserva e executa um lote de jobs
+    
+    Args:
+        limite (int): Quantidade máxima de jobs
+    
+    Returns:
+        int: Número de jobs processados
+    """
+    jobs = reservar(limite)
+    for job in jobs:
+        executar(job)
+    return len(jobs)
+
+
+def recuperar_travados():
+    """
+    Devolve à fila jobs cujo worker morreu durante a execução
+    
+    A tentativa interrompida conta como falha: jobs que já esgotaram as
+    tentativas (ex.: a tarefa derruba o worker) vão para a dead-letter em vez
+    de voltar à fila para sempre.
+    
+    Returns:
+        int: Número de jobs recuperados (devolvidos à fila ou mortos)
+    """
+    erro = 'Execução interrompida (worker encerrado ou tempo limite excedido)'
+    
+    query = """
+        UPDATE jobs SET status = 'morto', reservado_por = NULL, concluido_em = CURRENT_TIMESTAMP(3), ultimo_erro = %s
+        WHERE status = 'executando' AND iniciado_em < NOW() - INTERVAL %s SECOND
+            AND tentativas >= max_tentativas
+    """
+    mortos = db.execute_query(query, (erro, TEMPO_LIMITE_EXECUCAO))
+    
+    query = """
+        UPDATE jobs SET status = 'pendente', reservado_por = NULL, ultimo_erro = %s,
+            executar_em = NOW() + INTERVAL %s SECOND
+        WHERE status = 'executando' AND iniciado_em < NOW() - INTERVAL %s SECOND
+    """
+    devolvidos = db.execute_query(query, (erro, int(BACKOFF_BASE), TEMPO_LIMITE_EXECUCAO))
+    return mortos + devolvidos
+
+
+def limpar_concluidos(dias=7):
+    """
+    Remove jobs concluídos antigos para manter a tabela pequena
+    
+    Args:
+        dias (int): Idade mínima em dias
+    
+    Returns:
+        int: Número de jobs removidos
+    """
+    query = "DELETE FROM jobs WHERE status = 'concluido' AND concluido_em < NOW() - INTERVAL %s DAY"
+    return db.execute_query(query, (dias,))
+
+
+def listar_mortos(limite=100):
+    """
+    Lista jobs da dead-letter (tentativas esgotadas)
+    
+    Args:
+        limite (int): Quantidade máxima de registros
+    
+    Returns:
+        list: Registros dos jobs mortos
+    """
+    query = "SELECT * FROM jobs WHERE status = 'morto' ORDER BY concluido_em DESC LIMIT %s"
+    return db.fetch_all(query, (limite,))
+
+
+def reprocessar_mortos(job_ids):
+    """
+    Devolve jobs da dead-letter para a fila com tentativas zeradas
+    
+    Args:
+        job_ids (list): IDs dos jobs
+    
+    Returns:
+        int: Número de jobs reenfileirados
+    """
+    if not job_ids:
+        return 0
+    
+    marcadores = ', '.join(['%s'] * len(job_ids))
+    query = f"""
+        UPDATE jobs SET status = 'pendente', tentativas = 0, reservado_por = NULL, executar_em = NOW()
+        WHERE status = 'morto' AND id IN ({marcadores})
+    """
+    return db.execute_query(query, tuple(job_ids))
+
+
+def metricas():
+    """
+    Retorna profundidade da fila e latência dos jobs
+    
+    Returns:
+        dict: Contagem por status e latências (ms) da última hora
+    """
+    profundidade = {'pendente': 0, 'executando': 0, 'concluido': 0, 'morto': 0}
+    query = "SELECT status, COUNT(*) AS total FROM jobs GROUP BY status"
+    for row in db.fetch_all(query):
+        profundidade[row['status']] = row['total']
+    
+    query = """
+        SELECT COUNT(*) AS concluidos,
+               AVG(TIMESTAMPDIFF(MICROSECOND, created_at, iniciado_em)) / 1000 AS espera_media_ms,
+               MAX(TIMESTAMPDIFF(MICROSECOND, created_at, iniciado_em)) / 1000 AS espera_maxima_ms,
+               AVG(TIMESTAMPDIFF(MICROSECOND, iniciado_em, concluido_em)) / 1000 AS execucao_media_ms,
+               MAX(TIMESTAMPDIFF(MICROSECOND, iniciado_em, concluido_em)) / 1000 AS execucao_maxima_ms
+        FROM jobs
+        WHERE status = 'concluido' AND concluido_em >= NOW() - INTERVAL 1 HOUR
+    """
+    latencia = db.fetch_one(query) or {}
+    
+    return {
+        'profundidade': profundidade,
+        'ultima_hora': {chave: float(valor) if valor is not None else None
+                        for chave, valor in latencia.items()}
+    }
+
+
+def executar_worker(nome, parar, intervalo=1.0, limite=10):
+    """
+    Laço principal de um processo worker
+    
+    Args:
+        nome (str): Identificação do worker (para logs)
+        parar (multiprocessing.Event): Sinal de encerramento
+        intervalo (float): Espera em segundos quando a fila está vazia
+        limite (int): Jobs reservados por vez
+    """
+    # A conexão é aberta sob demanda pelo db, própria deste processo
+    print(f"👷 Worker {nome} iniciado (pid {os.getpid()})")
+    
+    ultima_manutencao = 0
+    while not parar.is_set():
+        try:
+            # Manutenção periódica: jobs travados e limpeza de concluídos
+            if time.monotonic() - ultima_manutencao > 60:
+                recuperar_travados()
+                limpar_concluidos()
+                ultima_manutencao = time.monotonic()
+            
+            if not processar_lote(limite):
+                parar.wait(intervalo)
+        
+        except Exception as e:
+            print(f"❌ Erro no worker {nome}: {e}")
+            parar.wait(intervalo)
+    
+    db.close()
+    print(f"👷 Worker {nome} encerrado")
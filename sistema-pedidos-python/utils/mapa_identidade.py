@@ -0,0 +1,166 @@
+"""
+Módulo do mapa de identidade por requisição
+Cada (tabela, id) é carregado do banco no máximo uma vez por requisição: as
+buscas por ID seguintes (decorator, rota, template) recebem o mesmo objeto.
+Fora de uma requisição (worker, scripts) as buscas vão sempre ao banco.
+"""
+
+from functools import wraps
+
+from flask import g, has_request_context
+
+from utils.database import db
+from utils import metricas
+
+
+class _Mapa:
+    """Objetos carregados na requisição: (tabela, id) -> objeto ou None"""
+    
+    def __init__(self):
+        self.objetos = {}
+        self.acertos = 0
+        self.cargas = 0
+
+
+def _mapa():
+    """Mapa da requisição atual (None fora de uma requisição)"""
+    if not has_request_context():
+        return None
+    mapa = g.get('mapa_identidade')
+    if mapa is None:
+        mapa = g.mapa_identidade = _Mapa()
+    return mapa
+
+
+def _chave(valor):
+    """ID normalizado (int) ou None se não for um ID válido"""
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def mapeado(tabela):
+    """
+    Decorator para buscas por ID: consulta o mapa antes do banco
+    
+    Resultados lidos dentro de uma transação não entram no mapa (podem ser
+    desfeitos); "não encontrado" também fica guardado.
+    
+    Args:
+        tabela (str): Tabela do model (parte da chave do mapa)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(registro_id):
+            mapa = _mapa()
+            chave = _chave(registro_id)
+            if mapa is None or chave is None:
+                return f(registro_id)
+            
+            if (tabela, chave) in mapa.objetos:
+                mapa.acertos += 1
+                metricas.mapa_identidade_total.inc('acerto')
+                return mapa.objetos[(tabela, chave)]
+            
+            objeto = f(chave)
+            mapa.cargas += 1
+            metricas.mapa_identidade_total.inc('carga')
+            if db.transacao_atual() is None:
+                mapa.objetos[(tabela, chave)] = objeto
+            return objeto
+        return decorated_function
+    return decorator
+
+
+def buscar_varios(tabela, ids, carregar):
+    """
+    Busca vários objetos por ID, indo ao banco só pelos que faltam no mapa
+    
+    Args:
+        tabela (str): Tabela do model
+        ids (list): IDs (int, sem repetição)
+        carregar (callable): Recebe os IDs que faltam e retorna {id: objeto}
+    
+    Returns:
+        dict: {id: objeto} apenas com os encontrados
+    """
+    mapa = _mapa()
+    if mapa is None:
+        return carregar(ids)
+    
+    encontrados = {}
+    faltantes = []
+    for registro_id in ids:
+        if (tabela, registro_id) in mapa.objetos:
+            mapa.acertos += 1
+            metricas.mapa_identidade_total.inc('acerto')
+            if mapa.objetos[(tabela, registro_id)] is not None:
+                encontrados[registro_id] = mapa.objetos[(tabela, registro_id)]
+        else:
+            faltantes.append(registro_id)
+    
+    if faltantes:
+        carregados = carregar(faltantes)
+        mapa.cargas += len(faltantes)
+        metricas.mapa_identidade_total.inc('carga', valor=len(faltantes))
+        if db.transacao_atual() is None:
+            for registro_id in faltantes:
+                mapa.objetos[(tabela, registro_id)] = carregados.get(registro_id)
+        encontrados.update(carregados)
+    
+    # Mantém a ordem dos IDs pedidos
+    return {registro_id: encontrados[registro_id] for registro_id in ids if registro_id in encontrados}
+
+
+def gravado(tabela, objeto):
+    """
+    Atualiza o mapa após salvar/atualizar um objeto
+    
+    A entrada antiga sai na hora; o objeto gravado entra após o commit (se a
+    transação for desfeita, a próxima busca relê o banco).
+    
+    Args:
+        tabela (str): Tabela do model
+        objeto: Objeto gravado (com id)
+    """
+    mapa = _mapa()
+    chave = _chave(objeto.id)
+    if mapa is None or chave is None:
+        return
+    mapa.objetos.pop((tabela, chave), None)
+    db.ao_confirmar(lambda: mapa.objetos.__setitem__((tabela, chave), objeto))
+
+
+def descartar(tabela, ids):
+    """
+    Remove do mapa objetos alterados diretamente por SQL (a próxima busca relê)
+    
+    Args:
+        tabela (str): Tabela do model
+        ids (list): IDs alterados
+    """
+    mapa = _mapa()
+    if mapa is None:
+        return
+    for registro_id in ids:
+        mapa.objetos.pop((tabela, _chave(registro_id)), None)
+
+
+def acertos():
+    """
+    Buscas atendidas pelo mapa na requisição atual
+    
+    Returns:
+        int: Quantidade de consultas economizadas
+    """
+    mapa = g.get('mapa_identidade') if has_request_context() else None
+    return mapa.acertos if mapa else 0
+
+
+def anotar_resposta(response):
+    """Informa no cabeçalho X-Mapa-Identidade os acertos e cargas da requisição"""
+    mapa = g.get('mapa_identidade')
+    if mapa is not None:
+        response.headers['X-Mapa-Identidade'] = f'acertos={mapa.acertos}; cargas={mapa.cargas}'
+    return response
@@ -0,0 +1,342 @@
+"""
+Módulo de métricas no formato de exposição do Prometheus
+Contadores, medidores e histogramas com fragmentos por thread: a observação
+não usa lock, e a soma dos fragmentos só acontece na leitura (/metrics). O
+fragmento de uma thread que termina é somado a um acumulado e descartado
+"""
+
+import re
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from functools import lru_cache
+
+
+# Limites padrão dos histogramas de duração (segundos)
+LIMITES_DURACAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_registro = []
+_coletores = []
+
+
+class _DonoFragmento:
+    """Marcador guardado no threading.local junto com o fragmento: é destruído quando a thread termina"""
+
+
+class Metrica(ABC):
+    """Base das métricas: cada thread escreve no próprio fragmento"""
+    
+    tipo = None
+    
+    def __init__(self, nome, ajuda, rotulos=()):
+        """
+        Inicializa e registra a métrica
+        
+        Args:
+            nome (str): Nome da métrica
+            ajuda (str): Descrição (linha HELP)
+            rotulos (tuple): Nomes dos rótulos
+        """
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.local = threading.local()
+        self.fragmentos = []
+        self.aposentado = {}
+        self.lock = threading.RLock()
+        _registro.append(self)
+    
+    def _fragmento(self):
+        """Fragmento da thread atual (o lock só é usado na primeira observação da thread)"""
+        fragmento = getattr(self.local, 'fragmento', None)
+        if fragmento is None:
+            fragmento = self.local.fragmento = {}
+            with self.lock:
+                self.fragmentos.append(fragmento)
+            
+            # Servidor com uma thread por requisição: sem isso a lista cresce a cada requisição
+            self.local.dono = _DonoFragmento()
+            finalizador = weakref.finalize(self.local.dono, self._aposentar, fragmento)
+            finalizador.atexit = False
+        return fragmento
+    
+    def _aposentar(self, fragmento):
+        """Soma o fragmento de uma thread que terminou ao acumulado e o descarta"""
+        with self.lock:
+            self.fragmentos = [outro for outro in self.fragmentos if outro is not fragmento]
+            for chave, valores in list(fragmento.items()):
+                self.aposentado[chave] = self._somar(self.aposentado.get(chave), valores)
+    
+    @abstractmethod
+    def _somar(self, novo, valores):
+        """Combina os valores de dois fragmentos (na leitura)"""
+    
+    def _agregado(self):
+        """Soma os fragmentos de todas as threads (inclusive as que já terminaram)"""
+        with self.lock:
+            fragmentos = list(self.fragmentos)
+            total = {chave: self._somar(None, valores) for chave, valores in self.aposentado.items()}
+        
+        for fragmento in fragmentos:
+            for chave, valores in list(fragmento.items()):
+                total[chave] = self._somar(total.get(chave), valores)
+        return total
+    
+    def _formatar_rotulos(self, valores, extra=None):
+        """Monta o trecho {a="1",b="2"} da linha de exposição"""
+        pares = list(zip(self.rotulos, valores))
+        if extra:
+            pares.append(extra)
+        if not pares:
+            return ''
+        texto = ','.join(f'{nome}="{_escapar(str(valor))}"' for nome, valor in pares)
+        return '{' + texto + '}'
+    
+    def exportar(self):
+        """
+        Gera as linhas de exposição da métrica
+        
+        Returns:
+            list: Linhas de texto
+        """
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} {self.tipo}']
+        agregado = self._agregado()
+        if not agregado and not self.rotulos:
+            agregado = {(): 0}
+        for chave, valor in sorted(agregado.items()):
+            linhas.append(f'{self.nome}{self._formatar_rotulos(chave)} {_numero(valor)}')
+        return linhas
+
+
+class Contador(Metrica):
+    """Contador monotônico"""
+    
+    tipo = 'counter'
+    
+    def inc(self, *valores_rotulos, valor=1):
+        """
+        Incrementa o contador
+        
+        Args:
+            *valores_rotulos: Valores dos rótulos, na ordem declarada
+            valor (float): Incremento
+        """
+        fragmento = self._fragmento()
+        fragmento[valores_rotulos] = fragmento.get(valores_rotulos, 0) + valor
+    
+    def _somar(self, novo, valores):
+        return (novo or 0) + valores
+
+
+class Medidor(Contador):
+    """Valor que sobe e desce (ex.: requisições em andamento)"""
+    
+    tipo = 'gauge'
+    
+    def dec(self, *valores_rotulos):
+        """
+        Decrementa o medidor
+        
+        Args:
+            *valores_rotulos: Valores dos rótulos, na ordem declarada
+        """
+        self.inc(*valores_rotulos, valor=-1)
+
+
+class Histograma(Metrica):
+    """Histograma de durações com limites fixos"""
+    
+    tipo = 'histogram'
+    
+    def __init__(self, nome, ajuda, rotulos=(), limites=LIMITES_DURACAO):
+        """
+        Inicializa e registra o histograma
+        
+        Args:
+            nome (str): Nome da métrica
+            ajuda (str): Descrição (linha HELP)
+            rotulos (tuple): Nomes dos rótulos
+            limites (tuple): Limites superiores dos buckets, em ordem crescente
+        """
+        super().__init__(nome, ajuda, rotulos)
+        self.limites = tuple(limites)
+    
+    def observar(self, valor, *valores_rotulos):
+        """
+        Registra uma observação
+        
+        Args:
+            valor (float): Valor observado (ex.: segundos)
+            *valores_rotulos: Valores dos rótulos, na ordem declarada
+        """
+        fragmento = self._fragmento()
+        registro = fragmento.get(valores_rotulos)
+        if registro is None:
+            # [contagem por bucket..., +Inf, soma]
+            registro = fragmento[valores_rotulos] = [0] * (len(self.limites) + 2)
+        registro[bisect_left(self.limites, valor)] += 1
+        registro[-1] += valor
+    
+    def _somar(self, novo, valores):
+        if novo is None:
+            return list(valores)
+        return [a + b for a, b in zip(novo, valores)]
+    
+    def exportar(self):
+        """
+        Gera as linhas de exposição (buckets cumulativos, _sum e _count)
+        
+        Returns:
+            list: Linhas de texto
+        """
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} {self.tipo}']
+        for chave, registro in sorted(self._agregado().items()):
+            acumulado = 0
+            for limite, quantidade in zip(self.limites + ('+Inf',), registro[:-1]):
+                acumulado += quantidade
+                rotulos = self._formatar_rotulos(chave, ('le', _numero(limite)))
+                linhas.append(f'{self.nome}_bucket{rotulos} {acumulado}')
+            rotulos = self._formatar_rotulos(chave)
+            linhas.append(f'{self.nome}_sum{rotulos} {_numero(registro[-1])}')
+            linhas.append(f'{self.nome}_count{rotulos} {acumulado}')
+        return linhas
+
+
+def _escapar(texto):
+    """Escapa valores de rótulo conforme o formato de exposição"""
+    return texto.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _numero(valor):
+    """Formata número sem notação desnecessária (1.0 -> 1)"""
+    if isinstance(valor, str):
+        return valor
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+def registrar_coletor(funcao):
+    """
+    Registra uma função chamada a cada leitura de /metrics
+    
+    Args:
+        funcao (callable): Retorna lista de tuplas (nome, tipo, ajuda, valor)
+    """
+    _coletores.append(funcao)
+
+
+def exportar():
+    """
+    Gera o texto completo de exposição de todas as métricas
+    
+    Returns:
+        str: Texto no formato de exposição do Prometheus
+    """
+    linhas = []
+    for metrica in _registro:
+        linhas.extend(metrica.exportar())
+    
+    for coletor in _coletores:
+        try:
+            for nome, tipo, ajuda, valor in coletor():
+                linhas += [f'# HELP {nome} {ajuda}', f'# TYPE {nome} {tipo}', f'{nome} {_numero(valor)}']
+        except Exception as e:
+            print(f"❌ Erro no coletor de métricas: {e}")
+    
+    return '\n'.join(linhas) + '\n'
+
+
+# ==================== MÉTRICAS DA APLICAÇÃO ====================
+
+requisicoes_duracao = Histograma('http_requisicao_duracao_segundos',
+                                 'Duração das requisições HTTP por rota', ('rota', 'metodo'))
+requisicoes_total = Contador('http_requisicoes_total',
+                             'Requisições HTTP por rota e status', ('rota', 'metodo', 'status'))
+requisicoes_em_andamento = Medidor('http_requisicoes_em_andamento',
+                                   'Requisições HTTP sendo atendidas')
+
+consultas_duracao = Histograma('db_consulta_duracao_segundos',
+                               'Duração dos comandos SQL por operação e tabela', ('operacao', 'tabela'))
+consultas_erros = Contador('db_erros_total', 'Erros do banco por tipo', ('tipo',))
+conexoes_abertas_total = Contador('db_conexoes_abertas_total', 'Conexões com o banco abertas')
+conexoes_fechadas_total = Contador('db_conexoes_fechadas_total', 'Conexões fechadas porque a thread que as abriu terminou')
+transacoes_total = Contador('db_transacoes_total', 'Unidades de trabalho por resultado', ('resultado',))
+
+sessao_duracao = Histograma('sessao_duracao_segundos',
+                            'Duração das operações no armazenamento de sessões', ('operacao',))
+disponibilidade_total = Contador('cadastro_disponibilidade_total',
+                                'Verificações de email/CPF por origem da resposta', ('origem',))
+compressao_bytes_total = Contador('http_compressao_bytes_total',
+                                 'Bytes das respostas comprimidas, antes e depois', ('tipo',))
+eventos_publicados_total = Contador('admin_eventos_publicados_total',
+                                   'Eventos enviados ao painel administrativo por tipo', ('tipo',))
+mapa_identidade_total = Contador('mapa_identidade_total',
+                                 'Buscas por ID atendidas pelo mapa da requisição ou carregadas do banco',
+                                 ('resultado',))
+carregamentos_tardios_total = Contador('model_carregamentos_tardios_total',
+                                       'Objetos parciais que precisaram buscar colunas fora da projeção',
+                                       ('tabela',))
+idempotencia_total = Contador('http_idempotencia_total',
+                              'Requisições com chave de idempotência por resultado', ('resultado',))
+senha_duracao = Histograma('senha_hash_duracao_segundos',
+                           'Duração do cálculo de hash de senha', ('operacao',),
+                           limites=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5))
+
+
+@lru_cache(maxsize=1024)
+def classificar_comando(query):
+    """
+    Identifica operação e tabela principal de um comando SQL
+    
+    Args:
+        query (str): Comando SQL
+    
+    Returns:
+        tuple: (operacao, tabela), ex.: ('SELECT', 'orders')
+    """
+    palavras = query.split(None, 1)
+    operacao = palavras[0].upper() if palavras else 'DESCONHECIDA'
+    encontrada = re.search(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+`?(\w+)', query, re.IGNORECASE)
+    return operacao, encontrada.group(1) if encontrada else ''
+
+
+def observar_consulta(query, inicio):
+    """
+    Registra a duração de um comando SQL
+    
+    Args:
+        query (str): Comando SQL
+        inicio (float): Valor de time.perf_counter() antes da execução
+    """
+    consultas_duracao.observar(time.perf_counter() - inicio, *classificar_comando(query))
+
+
+class SessaoMedida:
+    """Envolve a interface de sessão do Flask medindo abertura e gravação"""
+    
+    def __init__(self, interface):
+        """
+        Args:
+            interface: SessionInterface original
+        """
+        self.interface = interface
+    
+    def __getattr__(self, nome):
+        return getattr(self.interface, nome)
+    
+    def open_session(self, app, request):
+        inicio = time.perf_counter()
+        try:
+            return self.interface.open_session(app, request)
+        finally:
+            sessao_duracao.observar(time.perf_counter() - inicio, 'abrir')
+    
+    def save_session(self, app, session, response):
+        inicio = time.perf_counter()
+        try:
+            return self.interface.save_session(app, session, response)
+        finally:
+            sessao_duracao.observar(time.perf_counter() - inicio, 'salvar')
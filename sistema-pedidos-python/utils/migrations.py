@@ -0,0 +1,183 @@
+"""
+Módulo de migrações versionadas do schema
+Aplica em ordem os arquivos migrations/NNNN_nome.sql ainda não registrados
+"""
+
+import os
+import re
+
+from utils.database import db
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_MIGRACOES = os.path.join(RAIZ, 'migrations')
+ARQUIVO_SCHEMA = os.path.join(RAIZ, 'schema.sql')
+
+# Formato do nome dos arquivos: 0001_descricao.sql
+PADRAO_ARQUIVO = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+
+def listar_migracoes(diretorio=DIRETORIO_MIGRACOES):
+    """
+    Lista as migrações disponíveis em ordem de versão
+    
+    Args:
+        diretorio (str): Diretório dos arquivos .sql
+    
+    Returns:
+        list: Tuplas (versao, nome, caminho)
+    
+    Raises:
+        ValueError: Se duas migrações tiverem a mesma versão
+    """
+    migracoes = {}
+    for arquivo in os.listdir(diretorio):
+        encontrado = PADRAO_ARQUIVO.match(arquivo)
+        if not encontrado:
+            continue
+        
+        versao = int(encontrado.group(1))
+        if versao in migracoes:
+            raise ValueError(f"Versão de migração duplicada: {versao}")
+        migracoes[versao] = (versao, encontrado.group(2), os.path.join(diretorio, arquivo))
+    
+    return [migracoes[versao] for versao in sorted(migracoes)]
+
+
+def dividir_comandos(sql):
+    """
+    Divide o conteúdo de um arquivo .sql em comandos individuais
+    
+    Args:
+        sql (str): Conteúdo do arquivo
+    
+    Returns:
+        list: Comandos SQL sem comentários de linha
+    """
+    linhas = [linha for linha in sql.splitlines() if not linha.strip().startswith('--')]
+    return [comando.strip() for comando in '\n'.join(linhas).split(';') if comando.strip()]
+
+
+def criar_schema(caminho=ARQUIVO_SCHEMA):
+    """
+    Cria o schema completo a partir do schema.sql (banco novo)
+    
+    Usado principalmente com DB_DRIVER=sqlite, em que o arquivo é traduzido
+    comando a comando pelo driver; no MySQL equivale a importar o schema.sql.
+    
+    Args:
+        caminho (str): Arquivo do schema
+    
+    Returns:
+        int: Quantidade de comandos executados
+    """
+    with open(caminho, encoding='utf-8') as arquivo:
+        comandos = dividir_comandos(arquivo.read())
+    
+    with db.transaction():
+        for comando in comandos:
+            db.execute_query(comando)
+    return len(comandos)
+
+
+def garantir_tabela_controle():
+    """Cria a tabela schema_migrations se ainda não existir"""
+    db.execute_query("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            versao INT PRIMARY KEY,
+            nome VARCHAR(255) NOT NULL,
+            aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def versoes_aplicadas():
+    """
+    Retorna as versões já registradas no banco
+    
+    Returns:
+        set: Versões aplicadas
+    """
+    garantir_tabela_controle()
+    return {row['versao'] for row in db.fetch_all("SELECT versao FROM schema_migrations")}
+
+
+def pendentes(diretorio=DIRETORIO_MIGRACOES):
+    """
+    Lista as migrações ainda não aplicadas
+    
+    Args:
+        diretorio (str): Diretório dos arquivos .sql
+    
+    Returns:
+        list: Tuplas (versao, nome, caminho)
+    """
+    aplicadas = versoes_aplicadas()
+    return [migracao for migracao in listar_migracoes(diretorio) if migracao[0] not in aplicadas]
+
+
+def aplicar(ate=None, diretorio=DIRETORIO_MIGRACOES):
+    """
+    Aplica as migrações pendentes em ordem
+    
+    Um lock nomeado impede que dois processos migrem ao mesmo tempo. Cada
+    versão só é registrada depois que todos os seus comandos executaram;
+    em caso de erro o processo para na versão que falhou.
+    
+    Args:
+        ate (int): Última versão a aplicar (None = todas)
+        diretorio (str): Diretório dos arquivos .sql
+    
+    Returns:
+        list: Versões aplicadas nesta execução
+    
+    Raises:
+        RuntimeError: Se outro processo estiver migrando
+    """
+    lock = db.fetch_one("SELECT GET_LOCK('schema_migrations', 10) AS obtido")
+    if not lock or not lock['obtido']:
+        raise RuntimeError("Outro processo está aplicando migrações")
+    
+    aplicadas = []
+    try:
+        for versao, nome, caminho in pendentes(diretorio):
+            if ate is not None and versao > ate:
+                break
+            
+            with open(caminho, encoding='utf-8') as arquivo:
+                comandos = dividir_comandos(arquivo.read())
+            
+            print(f"⏳ Aplicando migração {versao:04d} ({nome})...")
+            for comando in comandos:
+                db.execute_query(comando)
+            
+            db.execute_query("INSERT INTO schema_migrations (versao, nome) VALUES (%s, %s)", (versao, nome))
+            aplicadas.append(versao)
+            print(f"✅ Migração {versao:04d} aplicada")
+        
+        return aplicadas
+    
+    finally:
+        db.fetch_one("SELECT RELEASE_LOCK('schema_migrations') AS liberado")
+
+
+def marcar_aplicadas(ate=None, diretorio=DIRETORIO_MIGRACOES):
+    """
+    Registra migrações como aplicadas sem executá-las (baseline)
+    
+    Útil para bancos que já possuem as alterações feitas manualmente.
+    
+    Args:
+        ate (int): Última versão a marcar (None = todas)
+        diretorio (str): Diretório dos arquivos .sql
+    
+    Returns:
+        list: Versões marcadas
+    """
+    marcadas = []
+    for versao, nome, _ in pendentes(diretorio):
+        if ate is not None and versao > ate:
+            break
+        db.execute_query("INSERT INTO schema_migrations (versao, nome) VALUES (%s, %s)", (versao, nome))
+        marcadas.append(versao)
+    return marcadas
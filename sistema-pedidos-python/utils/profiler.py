@@ -0,0 +1,258 @@
+"""
+Módulo de profiling sob demanda das requisições
+Middleware WSGI instalado apenas quando configurado; perfila a requisição
+inteira (views, templates Jinja e chamadas ao banco) e grava pilhas colapsadas
+(prontas para flamegraph.pl/speedscope) e um resumo com as funções mais caras
+"""
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from werkzeug.wsgi import ClosingIterator
+
+
+# Configurações (podem ser ajustadas no .env)
+TOKEN = os.getenv('PROFILER_TOKEN', '')
+TAXA = float(os.getenv('PROFILER_TAXA', '0'))
+ROTAS = tuple(rota.strip() for rota in os.getenv('PROFILER_ROTAS', '').split(',') if rota.strip())
+MODO = os.getenv('PROFILER_MODO', 'amostragem')
+INTERVALO = float(os.getenv('PROFILER_INTERVALO_MS', '5')) / 1000
+DIRETORIO = os.getenv('PROFILER_DIRETORIO', 'profiles')
+TOP_N = int(os.getenv('PROFILER_TOP', '30'))
+
+MODOS = ('amostragem', 'cprofile')
+
+# cProfile não suporta dois perfis ativos ao mesmo tempo em algumas versões
+_lock_cprofile = threading.Lock()
+_rotulos = {}
+
+
+def _rotulo(frame):
+    """Nome da função no formato modulo:funcao (em cache por objeto de código)"""
+    codigo = frame.f_code
+    rotulo = _rotulos.get(codigo)
+    if rotulo is None:
+        modulo = frame.f_globals.get('__name__') or os.path.basename(codigo.co_filename)
+        rotulo = _rotulos[codigo] = f'{modulo}:{codigo.co_name}'.replace(';', ',').replace(' ', '_')
+    return rotulo
+
+
+class Amostrador(threading.Thread):
+    """Thread que coleta periodicamente a pilha da thread perfilada"""
+    
+    def __init__(self, thread_alvo, frame_raiz, intervalo):
+        """
+        Inicializa o amostrador
+        
+        Args:
+            thread_alvo (int): Identificador da thread perfilada
+            frame_raiz: Frame do middleware (as pilhas começam abaixo dele)
+            intervalo (float): Segundos entre amostras
+        """
+        super().__init__(daemon=True, name='profiler')
+        self.thread_alvo = thread_alvo
+        self.frame_raiz = frame_raiz
+        self.intervalo = intervalo
+        self.pilhas = Counter()
+        self.parar = threading.Event()
+    
+    def run(self):
+        while not self.parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.thread_alvo)
+            pilha = []
+            while frame is not None and frame is not self.frame_raiz:
+                # Descarta a amostra tirada enquanto o próprio profiler encerra
+                if frame.f_code is Sessao.finalizar.__code__:
+                    pilha = []
+                    break
+                pilha.append(_rotulo(frame))
+                frame = frame.f_back
+            if pilha:
+                self.pilhas[';'.join(reversed(pilha))] += 1
+    
+    def encerrar(self):
+        """Para a coleta e aguarda a thread"""
+        self.parar.set()
+        self.join()
+
+
+class Sessao:
+    """Perfil de uma requisição em andamento"""
+    
+    def __init__(self, modo, nome):
+        """
+        Args:
+            modo (str): 'amostragem' ou 'cprofile' (com _lock_cprofile já adquirida)
+            nome (str): Prefixo dos arquivos gerados
+        """
+        self.modo = modo
+        self.nome = nome
+        self.inicio = time.perf_counter()
+        self.perfil = None
+        self.amostrador = None
+        self.trava = modo == 'cprofile'
+    
+    def liberar_trava(self):
+        """Devolve a trava do cProfile (uma única vez)"""
+        if self.trava:
+            self.trava = False
+            _lock_cprofile.release()
+    
+    def iniciar(self, frame_raiz):
+        """Começa a coletar (na thread que atende a requisição)"""
+        if self.modo == 'cprofile':
+            self.perfil = cProfile.Profile()
+            self.perfil.enable()
+        else:
+            self.amostrador = Amostrador(threading.get_ident(), frame_raiz, INTERVALO)
+            self.amostrador.start()
+    
+    def finalizar(self):
+        """Para a coleta e grava os arquivos no diretório configurado"""
+        duracao = time.perf_counter() - self.inicio
+        try:
+            if self.perfil is not None:
+                self.perfil.disable()
+                self.liberar_trava()
+                self._gravar_cprofile(duracao)
+            else:
+                self.amostrador.encerrar()
+                self._gravar_amostras(duracao)
+        except Exception as e:
+            print(f"❌ Erro ao gravar profile {self.nome}: {e}")
+        finally:
+            self.liberar_trava()
+    
+    def _caminho(self, extensao):
+        return os.path.join(DIRETORIO, f'{self.nome}.{extensao}')
+    
+    def _gravar_amostras(self, duracao):
+        """Grava pilhas colapsadas e resumo por função (tempo próprio e total)"""
+        pilhas = self.amostrador.pilhas
+        os.makedirs(DIRETORIO, exist_ok=True)
+        
+        with open(self._caminho('collapsed'), 'w') as arquivo:
+            for pilha, amostras in pilhas.most_common():
+                arquivo.write(f'{pilha} {amostras}\n')
+        
+        proprio = Counter()
+        total = Counter()
+        for pilha, amostras in pilhas.items():
+            funcoes = pilha.split(';')
+            proprio[funcoes[-1]] += amostras
+            for funcao in set(funcoes):
+                total[funcao] += amostras
+        
+        ms = INTERVALO * 1000
+        linhas = [f'{self.nome}: {duracao * 1000:.1f} ms, {sum(pilhas.values())} amostras a cada {ms:g} ms', '',
+                  f"{'total (ms)':>11} {'próprio (ms)':>13}  função"]
+        for funcao, amostras in total.most_common(TOP_N):
+            linhas.append(f'{amostras * ms:>11.1f} {proprio[funcao] * ms:>13.1f}  {funcao}')
+        
+        with open(self._caminho('txt'), 'w') as arquivo:
+            arquivo.write('\n'.join(linhas) + '\n')
+    
+    def _gravar_cprofile(self, duracao):
+        """Grava o .prof (pstats/snakeviz) e o resumo ordenado por tempo acumulado"""
+        os.makedirs(DIRETORIO, exist_ok=True)
+        self.perfil.dump_stats(self._caminho('prof'))
+        
+        saida = io.StringIO()
+        saida.write(f'{self.nome}: {duracao * 1000:.1f} ms\n')
+        pstats.Stats(self.perfil, stream=saida).sort_stats('cumulative').print_stats(TOP_N)
+        
+        with open(self._caminho('txt'), 'w') as arquivo:
+            arquivo.write(saida.getvalue())
+
+
+class MiddlewareProfiler:
+    """Middleware WSGI que perfila requisições selecionadas por token ou amostragem"""
+    
+    def __init__(self, aplicacao):
+        """
+        Args:
+            aplicacao: Aplicação WSGI original
+        """
+        self.aplicacao = aplicacao
+    
+    def _selecionar(self, environ):
+        """
+        Decide se a requisição será perfilada e em qual modo
+        
+        Returns:
+            str: Modo do profile ou None
+        """
+        token = environ.get('HTTP_X_PROFILER_TOKEN')
+        if TOKEN and token and hmac.compare_digest(token, TOKEN):
+            modo = environ.get('HTTP_X_PROFILER_MODO', MODO)
+            return modo if modo in MODOS else MODO
+        
+        caminho = environ.get('PATH_INFO', '')
+        if TAXA and (not ROTAS or caminho.startswith(ROTAS)) and random.random() < TAXA:
+            return MODO
+        return None
+    
+    def __call__(self, environ, start_response):
+        modo = self._selecionar(environ)
+        if modo is None:
+            return self.aplicacao(environ, start_response)
+        
+        rota = re.sub(r'[^\w]+', '_', environ.get('PATH_INFO', '')).strip('_') or 'raiz'
+        nome = f"{time.strftime('%Y%m%d-%H%M%S')}-{rota}-{os.getpid()}-{os.urandom(3).hex()}"
+        
+        def start_response_profiler(status, headers, exc_info=None):
+            headers.append(('X-Profiler-Arquivo', nome))
+            return start_response(status, headers, exc_info)
+        
+        # Um cProfile por vez; as demais requisições usam amostragem. A partir
+        # daqui a trava é devolvida em qualquer saída (sessao.finalizar ou abaixo)
+        if modo == 'cprofile' and not _lock_cprofile.acquire(blocking=False):
+            modo = 'amostragem'
+        try:
+            sessao = Sessao(modo, nome)
+            sessao.iniciar(sys._getframe())
+        except BaseException as e:
+            if modo == 'cprofile':
+                _lock_cprofile.release()
+            if not isinstance(e, Exception):
+                raise
+            # Sem profile para esta requisição, mas a aplicação continua respondendo
+            print(f"❌ Erro ao iniciar profile {nome}: {e}")
+            return self.aplicacao(environ, start_response)
+        
+        try:
+            resposta = self.aplicacao(environ, start_response_profiler)
+        except BaseException:
+            sessao.finalizar()
+            raise
+        
+        # O profile termina quando o servidor fecha a resposta (após enviar o corpo)
+        return ClosingIterator(resposta, sessao.finalizar)
+
+
+def instalar(app):
+    """
+    Instala o middleware se o profiler estiver configurado
+    
+    Sem PROFILER_TOKEN e sem PROFILER_TAXA a aplicação não é alterada (custo zero).
+    
+    Args:
+        app (Flask): Aplicação
+    
+    Returns:
+        bool: True se o middleware foi instalado
+    """
+    if not TOKEN and not TAXA:
+        return False
+    
+    app.wsgi_app = MiddlewareProfiler(app.wsgi_app)
+    print(f"🔬 Profiler ativo (modo {MODO}, taxa {TAXA}, arquivos em {DIRETORIO}/)")
+    return True
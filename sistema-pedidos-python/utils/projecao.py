@@ -0,0 +1,102 @@
+"""
+Módulo de projeção de colunas dos models
+Finders de listagem podem ler só as colunas que a tela usa; os objetos
+retornados ficam parciais e buscam as demais colunas no primeiro acesso
+(uma consulta por objeto, com todas as colunas que faltam)
+"""
+
+from utils.database import db
+from utils import metricas
+
+
+class Projetavel:
+    """Mixin dos models que aceitam projeção de colunas
+    
+    A classe define TABELA, COLUNAS (colunas reais, na ordem da tabela) e,
+    opcionalmente, EXPRESSOES: colunas calculadas no banco ({nome: expressão
+    SQL}), que só existem nos objetos lidos com elas na projeção.
+    """
+    
+    TABELA = None
+    COLUNAS = ()
+    EXPRESSOES = {}
+    
+    @classmethod
+    def selecao(cls, colunas=None):
+        """
+        Lista de colunas do SELECT para uma projeção
+        
+        Args:
+            colunas (tuple): Colunas desejadas (None = todas); o id sempre vem
+        
+        Returns:
+            str: Lista para o SELECT
+        
+        Raises:
+            ValueError: Se alguma coluna não existir no model
+        """
+        if colunas is None:
+            return '*'
+        
+        desconhecidas = [coluna for coluna in colunas if coluna not in cls.COLUNAS and coluna not in cls.EXPRESSOES]
+        if desconhecidas:
+            raise ValueError(f"Colunas inválidas para {cls.TABELA}: {', '.join(desconhecidas)}")
+        
+        partes = ['id'] + [coluna for coluna in colunas if coluna in cls.COLUNAS]
+        partes += [f'{cls.EXPRESSOES[coluna]} AS {coluna}' for coluna in colunas if coluna in cls.EXPRESSOES]
+        return ', '.join(dict.fromkeys(partes))
+    
+    @classmethod
+    def de_linha(cls, linha, colunas=None):
+        """
+        Cria o objeto a partir de uma linha do banco
+        
+        Args:
+            linha (dict): Registro lido
+            colunas (tuple): Projeção usada na leitura (None = todas)
+        
+        Returns:
+            Objeto do model; parcial se houve projeção
+        """
+        objeto = cls(**{coluna: valor for coluna, valor in linha.items() if coluna in cls.COLUNAS})
+        for coluna in cls.EXPRESSOES:
+            if coluna in linha:
+                objeto.__dict__[coluna] = linha[coluna]
+        
+        if colunas is not None:
+            # Remove os valores padrão do construtor: o acesso cai em __getattr__
+            pendentes = {coluna for coluna in cls.COLUNAS if coluna not in linha}
+            for coluna in pendentes:
+                objeto.__dict__.pop(coluna, None)
+            objeto.__dict__['_pendentes'] = pendentes
+        return objeto
+    
+    def __getattr__(self, nome):
+        """Chamado só para atributos ausentes: carrega as colunas pendentes"""
+        pendentes = self.__dict__.get('_pendentes')
+        if not pendentes or nome not in pendentes:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{nome}'")
+        self.carregar_pendentes()
+        return self.__dict__[nome]
+    
+    @property
+    def parcial(self):
+        """True se ainda há colunas não carregadas"""
+        return bool(self.__dict__.get('_pendentes'))
+    
+    def carregar_pendentes(self):
+        """
+        Busca de uma vez as colunas que ficaram fora da projeção
+        
+        Colunas já atribuídas no objeto não são sobrescritas. Se o registro
+        não existir mais, as colunas ficam None.
+        """
+        pendentes = self.__dict__.pop('_pendentes', None)
+        faltantes = sorted(coluna for coluna in pendentes or () if coluna not in self.__dict__)
+        if not faltantes:
+            return
+        
+        metricas.carregamentos_tardios_total.inc(self.TABELA)
+        linha = db.fetch_one(f"SELECT {', '.join(faltantes)} FROM {self.TABELA} WHERE id = %s", (self.id,))
+        for coluna in faltantes:
+            self.__dict__[coluna] = linha[coluna] if linha else None
@@ -0,0 +1,179 @@
+"""
+Módulo de manutenção dos rollups diários de pedidos
+Atualiza incrementalmente as tabelas rollup_* a partir das escritas de pedidos
+"""
+
+from utils.database import db
+
+
+CATEGORIA_PADRAO = 'Sem categoria'
+
+
+def registrar_pedido(status, valor_total):
+    """
+    Soma um novo pedido ao rollup do dia atual
+    
+    Args:
+        status (str): Status inicial do pedido
+        valor_total (int): Valor em centavos
+    """
+    try:
+        query = """
+            INSERT INTO rollup_pedidos_diario (dia, status, pedidos, receita)
+            VALUES (CURDATE(), %s, 1, %s)
+            ON DUPLICATE KEY UPDATE pedidos = pedidos + 1, receita = receita + VALUES(receita)
+        """
+        db.execute_query(query, (status, valor_total))
+    
+    except Exception as e:
+        print(f"❌ Erro ao atualizar rollup de pedidos: {e}")
+
+
+def registrar_mudancas_status(mudancas):
+    """
+    Move pedidos entre status no rollup do dia em que foram criados
+    
+    Args:
+        mudancas (list): Tuplas (dia, status_antigo, status_novo, valor_total);
+                         dia None indica o dia atual
+    """
+    if not mudancas:
+        return
+    
+    # Agrega as variações por (dia, status) para um único executemany
+    variacoes = {}
+    for dia, status_antigo, status_novo, valor_total in mudancas:
+        for status, sinal in ((status_antigo, -1), (status_novo, 1)):
+            pedidos, receita = variacoes.get((dia, status), (0, 0))
+            variacoes[(dia, status)] = (pedidos + sinal, receita + sinal * valor_total)
+    
+    params = [(dia, status, pedidos, receita)
+              for (dia, status), (pedidos, receita) in variacoes.items() if pedidos or receita]
+    if not params:
+        return
+    
+    try:
+        query = """
+            INSERT INTO rollup_pedidos_diario (dia, status, pedidos, receita)
+            VALUES (COALESCE(%s, CURDATE()), %s, %s, %s)
+            ON DUPLICATE KEY UPDATE pedidos = pedidos + VALUES(pedidos), receita = receita + VALUES(receita)
+        """
+        db.execute_many(query, params)
+    
+    except Exception as e:
+        print(f"❌ Erro ao atualizar rollup de status: {e}")
+
+
+def registrar_item(product_id, quantidade, subtotal):
+    """
+    Soma um item vendido ao rollup da categoria do produto
+    
+    Args:
+        product_id (int): ID do produto
+        quantidade (int): Quantidade vendida
+        subtotal (int): Subtotal em centavos
+    """
+    try:
+        query = """
+            INSERT INTO rollup_itens_diario (dia, categoria, itens, receita)
+            SELECT CURDATE(), COALESCE(categoria, %s), %s, %s FROM products WHERE id = %s
+            ON DUPLICATE KEY UPDATE itens = itens + VALUES(itens), receita = receita + VALUES(receita)
+        """
+        db.execute_query(query, (CATEGORIA_PADRAO, quantidade, subtotal, product_id))
+    
+    except Exception as e:
+        print(f"❌ Erro ao atualizar rollup de itens: {e}")
+
+
+def registrar_itens(itens):
+    """
+    Soma vários itens vendidos aos rollups das categorias com um único executemany
+    
+    Args:
+        itens (list): Tuplas (categoria, quantidade, subtotal)
+    """
+    # Agrega por categoria: um carrinho com vários itens da mesma categoria vira uma linha
+    por_categoria = {}
+    for categoria, quantidade, subtotal in itens:
+        categoria = categoria or CATEGORIA_PADRAO
+        quantidade_total, receita = por_categoria.get(categoria, (0, 0))
+        por_categoria[categoria] = (quantidade_total + quantidade, receita + subtotal)
+    
+    if not por_categoria:
+        return
+    
+    try:
+        query = """
+            INSERT INTO rollup_itens_diario (dia, categoria, itens, receita)
+            VALUES (CURDATE(), %s, %s, %s)
+            ON DUPLICATE KEY UPDATE itens = itens + VALUES(itens), receita = receita + VALUES(receita)
+        """
+        db.execute_many(query, [(categoria, quantidade, receita)
+                                for categoria, (quantidade, receita) in por_categoria.items()])
+    
+    except Exception as e:
+        print(f"❌ Erro ao atualizar rollup de itens: {e}")
+
+
+def backfill(desde=None):
+    """
+    Recalcula os rollups a partir das tabelas de pedidos (inclusive as de arquivo)
+    
+    A remoção e o recálculo acontecem em uma única transação: o dashboard nunca
+    vê os rollups vazios, e pedidos gravados durante o backfill não são perdidos
+    nem contados duas vezes.
+    
+    Args:
+        desde (date): Primeiro dia a recalcular (None = todo o histórico)
+    
+    Returns:
+        dict: Quantidade de linhas geradas em cada rollup
+    """
+    filtro = "WHERE created_at >= %s" if desde else ""
+    params = (desde,) if desde else ()
+    
+    with db.transaction():
+        db.execute_query(f"DELETE FROM rollup_pedidos_diario {'WHERE dia >= %s' if desde else ''}", params)
+        db.execute_query(f"DELETE FROM rollup_itens_diario {'WHERE dia >= %s' if desde else ''}", params)
+        
+        pedidos = db.execute_query(f"""
+            INSERT INTO rollup_pedidos_diario (dia, status, pedidos, receita)
+            SELECT DATE(created_at), status, COUNT(*), SUM(valor_total)
+            FROM (
+                SELECT created_at, status, valor_total FROM orders
+                UNION ALL
+                SELECT created_at, status, valor_total FROM orders_arquivo
+            ) todos
+            {filtro}
+            GROUP BY DATE(created_at), status
+        """, params)
+        
+        itens = db.execute_query(f"""
+            INSERT INTO rollup_itens_diario (dia, categoria, itens, receita)
+            SELECT DATE(oi.created_at), COALESCE(p.categoria, '{CATEGORIA_PADRAO}'), SUM(oi.quantidade), SUM(oi.subtotal)
+            FROM (
+                SELECT created_at, product_id, quantidade, subtotal FROM order_items
+                UNION ALL
+                SELECT created_at, product_id, quantidade, subtotal FROM order_items_arquivo
+            ) oi
+            JOIN products p ON p.id = oi.product_id
+            {filtro.replace('created_at', 'oi.created_at')}
+            GROUP BY DATE(oi.created_at), COALESCE(p.categoria, '{CATEGORIA_PADRAO}')
+        """, params)
+    
+    return {'rollup_pedidos_diario': pedidos, 'rollup_itens_diario': itens}
+
+
+def totais():
+    """
+    Retorna totais gerais de pedidos e receita a partir do rollup
+    
+    Returns:
+        dict: {'pedidos': int, 'receita': int}
+    """
+    query = """
+        SELECT COALESCE(SUM(pedidos), 0) AS pedidos, COALESCE(SUM(receita), 0) AS receita
+        FROM rollup_pedidos_diario
+    """
+    result = db.fetch_one(query) or {}
+    return {'pedidos': int(result.get('pedidos') or 0), 'receita': int(result.get('receita') or 0)}
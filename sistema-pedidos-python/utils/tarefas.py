@@ -0,0 +1,42 @@
+"""
+Tarefas executadas em segundo plano pelos workers da fila
+Efeitos colaterais disparados após cadastros e pedidos
+
+Ainda não há envio de email: as tarefas apenas registram no log a
+notificação que seria enviada. O envio real entra no corpo de cada uma.
+"""
+
+from utils.jobs import tarefa
+
+
+@tarefa('usuario_cadastrado')
+def usuario_cadastrado(payload):
+    """
+    Registra no log a confirmação de cadastro (nenhum email é enviado)
+    
+    Args:
+        payload (dict): {'user_id': int}
+    """
+    print(f"📧 Email de confirmação de cadastro para usuário {payload['user_id']}")
+
+
+@tarefa('pedido_criado')
+def pedido_criado(payload):
+    """
+    Registra no log a confirmação do pedido (nenhum email é enviado)
+    
+    Args:
+        payload (dict): {'order_id': int, 'user_id': int}
+    """
+    print(f"📧 Confirmação do pedido #{payload['order_id']} para usuário {payload['user_id']}")
+
+
+@tarefa('pedido_status_alterado')
+def pedido_status_alterado(payload):
+    """
+    Registra no log a mudança de status do pedido (o cliente não é notificado)
+    
+    Args:
+        payload (dict): {'order_id': int, 'status': str}
+    """
+    print(f"📧 Pedido #{payload['order_id']} agora está '{payload['status']}'")
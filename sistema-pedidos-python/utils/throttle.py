@@ -0,0 +1,355 @@
+"""
+Módulo de limitação de tentativas de login (throttling)
+Contadores de janela deslizante por IP e por conta, verificados antes de
+qualquer acesso ao banco ou cálculo de hash de senha
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from utils import metricas
+
+
+# Intervalo (s) entre as remoções de contadores expirados no arquivo compartilhado
+INTERVALO_LIMPEZA = 60
+
+
+class ArmazenamentoMemoria:
+    """Contadores em memória do processo: chave -> [janela, atual, anterior, expira_em]"""
+    
+    def __init__(self, max_chaves=100000):
+        """
+        Inicializa armazenamento
+        
+        Args:
+            max_chaves (int): Quantidade de chaves antes de descartar as expiradas
+        """
+        self.max_chaves = max_chaves
+        self.contadores = {}
+        self.lock = threading.Lock()
+    
+    def _deslocar(self, registro, janela):
+        """Avança o registro para a janela atual"""
+        if registro[0] == janela - 1:
+            registro[:] = [janela, 0, registro[1]]
+        elif registro[0] < janela - 1:
+            registro[:] = [janela, 0, 0]
+    
+    def obter(self, chave, janela):
+        """
+        Retorna contagens da janela atual e da anterior
+        
+        Args:
+            chave (str): Chave do contador
+            janela (int): Número da janela atual
+        
+        Returns:
+            tuple: (atual, anterior)
+        """
+        with self.lock:
+            registro = self.contadores.get(chave)
+            if registro is None:
+                return 0, 0
+            self._deslocar(registro, janela)
+            return registro[1], registro[2]
+    
+    def incrementar(self, chave, janela, expira_em):
+        """
+        Incrementa o contador da janela atual
+        
+        Args:
+            chave (str): Chave do contador
+            janela (int): Número da janela atual
+            expira_em (float): Momento (time.time) em que o contador deixa de valer
+        
+        Returns:
+            tuple: (atual, anterior) após o incremento
+        """
+        with self.lock:
+            registro = self.contadores.get(chave)
+            if registro is None:
+                if len(self.contadores) >= self.max_chaves:
+                    self._descartar_expirados(time.time())
+                registro = self.contadores[chave] = [janela, 0, 0, expira_em]
+            self._deslocar(registro, janela)
+            registro[1] += 1
+            registro[3] = expira_em
+            return registro[1], registro[2]
+    
+    def limpar(self, chave):
+        """Remove o contador da chave"""
+        with self.lock:
+            self.contadores.pop(chave, None)
+    
+    def _descartar_expirados(self, agora):
+        """Remove contadores expirados (cada limitador tem a sua duração de janela)"""
+        expirados = [chave for chave, registro in self.contadores.items() if registro[3] <= agora]
+        for chave in expirados:
+            del self.contadores[chave]
+
+
+class ArmazenamentoSQLite:
+    """Contadores compartilhados entre processos em um arquivo SQLite local"""
+    
+    def __init__(self, caminho):
+        """
+        Inicializa armazenamento
+        
+        Args:
+            caminho (str): Caminho do arquivo SQLite
+        """
+        self.caminho = caminho
+        self.local = threading.local()
+        self.ultima_limpeza = 0
+        conexao = self._conexao()
+        
+        # Arquivos criados sem expira_em: os contadores são descartáveis
+        colunas = [linha[1] for linha in conexao.execute("PRAGMA table_info(contadores)")]
+        if colunas and 'expira_em' not in colunas:
+            conexao.execute("DROP TABLE contadores")
+        conexao.execute("""
+            CREATE TABLE IF NOT EXISTS contadores (
+                chave TEXT NOT NULL,
+                janela INTEGER NOT NULL,
+                total INTEGER NOT NULL,
+                expira_em REAL NOT NULL,
+                PRIMARY KEY (chave, janela)
+            ) WITHOUT ROWID
+        """)
+    
+    def _conexao(self):
+        """Conexão SQLite própria de cada thread (e de cada processo)"""
+        conexao = getattr(self.local, 'conexao', None)
+        if conexao is None or getattr(self.local, 'pid', None) != os.getpid():
+            conexao = sqlite3.connect(self.caminho, timeout=1, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=OFF")
+            self.local.conexao = conexao
+            self.local.pid = os.getpid()
+        return conexao
+    
+    def obter(self, chave, janela):
+        """
+        Retorna contagens da janela atual e da anterior
+        
+        Args:
+            chave (str): Chave do contador
+            janela (int): Número da janela atual
+        
+        Returns:
+            tuple: (atual, anterior)
+        """
+        linhas = dict(self._conexao().execute(
+            "SELECT janela, total FROM contadores WHERE chave = ? AND janela >= ?",
+            (chave, janela - 1)
+        ).fetchall())
+        return linhas.get(janela, 0), linhas.get(janela - 1, 0)
+    
+    def incrementar(self, chave, janela, expira_em):
+        """
+        Incrementa o contador da janela atual
+        
+        Args:
+            chave (str): Chave do contador
+            janela (int): Número da janela atual
+            expira_em (float): Momento (time.time) em que o contador deixa de valer
+        
+        Returns:
+            tuple: (atual, anterior) após o incremento
+        """
+        conexao = self._conexao()
+        conexao.execute("""
+            INSERT INTO contadores (chave, janela, total, expira_em) VALUES (?, ?, 1, ?)
+            ON CONFLICT (chave, janela) DO UPDATE SET total = total + 1
+        """, (chave, janela, expira_em))
+        
+        # Limpeza periódica em cada processo; a expiração de cada linha vem do
+        # seu limitador (os números de janela de limitadores diferentes não se comparam)
+        agora = time.time()
+        if agora - self.ultima_limpeza >= INTERVALO_LIMPEZA:
+            self.ultima_limpeza = agora
+            conexao.execute("DELETE FROM contadores WHERE expira_em <= ?", (agora,))
+        return self.obter(chave, janela)
+    
+    def limpar(self, chave):
+        """Remove o contador da chave"""
+        self._conexao().execute("DELETE FROM contadores WHERE chave = ?", (chave,))
+
+
+class JanelaDeslizante:
+    """Limite de eventos por janela deslizante (aproximação por duas janelas fixas)"""
+    
+    def __init__(self, nome, limite, segundos, armazenamento):
+        """
+        Inicializa limitador
+        
+        Args:
+            nome (str): Prefixo das chaves
+            limite (int): Eventos permitidos na janela
+            segundos (int): Duração da janela
+            armazenamento: ArmazenamentoMemoria ou ArmazenamentoSQLite
+        """
+        self.nome = nome
+        self.limite = limite
+        self.segundos = segundos
+        self.armazenamento = armazenamento
+    
+    def _estimar(self, atual, anterior, agora):
+        """Estimativa de eventos nos últimos `segundos`"""
+        decorrido = (agora % self.segundos) / self.segundos
+        return atual + anterior * (1 - decorrido)
+    
+    def excedido(self, chave):
+        """
+        Verifica se a chave já atingiu o limite (sem contar novo evento)
+        
+        Args:
+            chave (str): Identificador (IP ou email)
+        
+        Returns:
+            bool: True se o limite foi atingido
+        """
+        agora = time.time()
+        atual, anterior = self.armazenamento.obter(f'{self.nome}:{chave}', int(agora // self.segundos))
+        return self._estimar(atual, anterior, agora) >= self.limite
+    
+    def registrar(self, chave):
+        """
+        Conta um evento e informa se ainda está dentro do limite
+        
+        Args:
+            chave (str): Identificador (IP ou email)
+        
+        Returns:
+            bool: True se o evento está dentro do limite
+        """
+        agora = time.time()
+        janela = int(agora // self.segundos)
+        
+        # A contagem ainda pesa na estimativa durante a janela seguinte
+        expira_em = (janela + 2) * self.segundos
+        atual, anterior = self.armazenamento.incrementar(f'{self.nome}:{chave}', janela, expira_em)
+        return self._estimar(atual, anterior, agora) <= self.limite
+    
+    def limpar(self, chave):
+        """
+        Zera o contador da chave
+        
+        Args:
+            chave (str): Identificador (IP ou email)
+        """
+        self.armazenamento.limpar(f'{self.nome}:{chave}')
+
+
+def criar_armazenamento():
+    """
+    Escolhe o armazenamento conforme THROTTLE_ARQUIVO
+    
+    Returns:
+        ArmazenamentoSQLite se o arquivo estiver configurado, senão ArmazenamentoMemoria
+    """
+    caminho = os.getenv('THROTTLE_ARQUIVO')
+    if caminho:
+        return ArmazenamentoSQLite(caminho)
+    return ArmazenamentoMemoria()
+
+
+_armazenamento = criar_armazenamento()
+
+# Tentativas de login por IP (todas) e por conta (apenas falhas)
+limite_ip = JanelaDeslizante('ip', int(os.getenv('LOGIN_LIMITE_IP', '20')),
+                             int(os.getenv('LOGIN_JANELA_IP', '60')), _armazenamento)
+limite_conta = JanelaDeslizante('conta', int(os.getenv('LOGIN_LIMITE_CONTA', '5')),
+                                int(os.getenv('LOGIN_JANELA_CONTA', '900')), _armazenamento)
+
+# Verificações de disponibilidade no cadastro por IP (limita enumeração de emails/CPFs)
+limite_disponibilidade = JanelaDeslizante('disponibilidade', int(os.getenv('DISPONIBILIDADE_LIMITE_IP', '60')),
+                                          int(os.getenv('DISPONIBILIDADE_JANELA_IP', '60')), _armazenamento)
+
+# Contadores exportados como métricas
+_metricas = {'permitidas': 0, 'bloqueadas_ip': 0, 'bloqueadas_conta': 0, 'falhas': 0}
+_metricas_disponibilidade = {'bloqueadas': 0}
+
+metricas.registrar_coletor(lambda: [
+    (f'login_{nome}_total', 'counter', f'Tentativas de login: {nome}', valor)
+    for nome, valor in _metricas.items()
+] + [
+    ('cadastro_disponibilidade_bloqueadas_total', 'counter',
+     'Verificações de disponibilidade bloqueadas por IP', _metricas_disponibilidade['bloqueadas'])
+])
+
+
+def permitir_login(ip, email):
+    """
+    Decide se uma tentativa de login pode prosseguir
+    
+    Conta a tentativa para o IP e verifica o limite de falhas da conta.
+    
+    Args:
+        ip (str): Endereço IP do cliente
+        email (str): Email informado
+    
+    Returns:
+        str: None se permitido, 'ip' ou 'conta' indicando o limite atingido
+    """
+    # Estrutura de decisão: limite por IP, depois por conta
+    if not limite_ip.registrar(ip):
+        _metricas['bloqueadas_ip'] += 1
+        return 'ip'
+    
+    if email and limite_conta.excedido(email.strip().lower()):
+        _metricas['bloqueadas_conta'] += 1
+        return 'conta'
+    
+    _metricas['permitidas'] += 1
+    return None
+
+
+def registrar_falha(email):
+    """
+    Conta uma falha de login para a conta
+    
+    Args:
+        email (str): Email informado
+    """
+    _metricas['falhas'] += 1
+    if email:
+        limite_conta.registrar(email.strip().lower())
+
+
+def registrar_sucesso(email):
+    """
+    Zera as falhas da conta após login bem-sucedido
+    
+    Args:
+        email (str): Email informado
+    """
+    limite_conta.limpar(email.strip().lower())
+
+
+def permitir_disponibilidade(ip):
+    """
+    Conta uma verificação de disponibilidade do IP
+    
+    Args:
+        ip (str): Endereço IP do cliente
+    
+    Returns:
+        bool: True se ainda está dentro do limite
+    """
+    if limite_disponibilidade.registrar(ip):
+        return True
+    _metricas_disponibilidade['bloqueadas'] += 1
+    return False
+
+
+def metricas():
+    """
+    Retorna os contadores do throttling de login
+    
+    Returns:
+        dict: Tentativas permitidas, bloqueadas e falhas
+    """
+    return dict(_metricas)
@@ -0,0 +1,56 @@
+"""
+Worker da fila de tarefas em segundo plano
+Inicia um pool de processos que executam os jobs da tabela jobs
+
+Uso:
+    python worker.py --processos 4
+"""
+
+import argparse
+import multiprocessing
+import os
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente
+load_dotenv()
+
+from utils import jobs
+import utils.tarefas  # noqa: F401 - registra as tarefas disponíveis
+
+
+def main():
+    """Inicia os processos worker e aguarda o encerramento"""
+    parser = argparse.ArgumentParser(description='Worker da fila de tarefas')
+    parser.add_argument('--processos', type=int, default=int(os.getenv('JOBS_PROCESSOS', '2')),
+                        help='Quantidade de processos worker')
+    parser.add_argument('--intervalo', type=float, default=1.0,
+                        help='Espera (s) quando a fila está vazia')
+    parser.add_argument('--lote', type=int, default=10,
+                        help='Jobs reservados por vez em cada processo')
+    args = parser.parse_args()
+    
+    parar = multiprocessing.Event()
+    processos = []
+    
+    for indice in range(args.processos):
+        processo = multiprocessing.Process(
+            target=jobs.executar_worker,
+            args=(f'worker-{indice + 1}', parar, args.intervalo, args.lote)
+        )
+        processo.start()
+        processos.append(processo)
+    
+    print(f"🚀 Fila de tarefas com {args.processos} processo(s). Ctrl+C para encerrar")
+    
+    try:
+        for processo in processos:
+            processo.join()
+    except KeyboardInterrupt:
+        print("\n🛑 Encerrando workers...")
+        parar.set()
+        for processo in processos:
+            processo.join()
+
+
+if __name__ == '__main__':
+    main()